@@ -1,13 +1,66 @@
+import os
+import copy
+import time
+import asyncio
 from typing import List
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait, FIRST_COMPLETED
 from rich.pretty import pprint
 from pydantic import BaseModel, Field
 from agno.agent import Agent, RunResponse
 from agno.models.openai import OpenAIChat
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
+from cache import AgentResultCache, MISSING
+from transcripts import chunk_transcript, estimate_tokens
+from connections import openai_http_client
+from metrics import agent_cache_lookups, observe_llm_run
+from profiling import profiler
 
 
 load_dotenv()
 
+# Cache of agent results keyed by transcript hash + agent name, model and prompt.
+# AGENT_CACHE_SIZE=0 disables the in-memory tier, AGENT_CACHE_DB enables the SQLite tier.
+agentCache = AgentResultCache(
+    maxsize=int(os.getenv("AGENT_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("AGENT_CACHE_TTL", "86400")),
+    db_path=os.getenv("AGENT_CACHE_DB") or None,
+)
+
+def agentForRun(agent: Agent) -> Agent:
+    """A private copy of a module-level agent for one run.
+
+    agno keeps per-run state on the Agent and its model (run_response, memory, the model's
+    response_format), so the module-level agents are templates that are never run directly:
+    concurrent runs on one instance would return each other's results. The copy shares the
+    template's OpenAI clients, and with them the connection pool."""
+    model = copy.copy(agent.model)
+    if model.client is None:
+        model.client = agent.model.get_client()
+    return Agent(model=model, description=agent.description, instructions=agent.instructions,
+                 response_model=agent.response_model)
+
+def runCachedAgent(name: str, agent: Agent, text: str):
+    """Run an agent and return its response as a dict, reusing a cached result for the same input."""
+    key = agentCache.make_key(name, agent.model.id, agent.description, text)
+    cached = agentCache.get(key)
+    if cached is not MISSING:
+        agent_cache_lookups.inc(name, "hit")
+        return cached
+    agent_cache_lookups.inc(name, "miss")
+
+    start = time.perf_counter()
+    try:
+        with profiler.span(f"llm {name}"):
+            response = agentForRun(agent).run(text)
+    except Exception:
+        observe_llm_run(name, agent.model.id, time.perf_counter() - start, outcome="error")
+        raise
+    observe_llm_run(name, agent.model.id, time.perf_counter() - start, response.metrics)
+    result = response.content.dict() if isinstance(response.content, BaseModel) else response.content
+    agentCache.set(key, result)
+    return result
+
 class NotesData(BaseModel):
     title: str = Field(..., title="The title of the conversation.")
     summary: str = Field(..., title="A summarized version of the conversation only with the most important information and maximum length of 500 characters.")
@@ -16,16 +69,14 @@ class NotesData(BaseModel):
     decisions: List[str] = Field(..., title="A list of the most important decisions made in the conversation.")
 
 agentNotetaking = Agent(
-    model=OpenAIChat(id="gpt-4o"),
+    model=OpenAIChat(id="gpt-4o", http_client=openai_http_client),
     description="You are an AI Notetaker for a Company's Videoconferences and Meetings. Provide relevant notes about the key topics of a transcript of a meeting. Put the information in spanish",
     response_model=NotesData,
 )
 
 #create a function that will receive the text and return the data
 def runNotetakingAgent(transcript: str):
-    response = agentNotetaking.run(transcript)
-    print(response.content.dict())
-    return response.content.dict()
+    return runCachedAgent("notes", agentNotetaking, transcript)
 
 class ReportData(BaseModel):
     improvingPoints: List[str] = Field(..., title="A list of the most important points that can be improved in the conversation.")
@@ -35,34 +86,343 @@ class ReportData(BaseModel):
     nextSteps: List[str] = Field(..., title="A list of the next steps to be taken after the conversation.")
 
 agentReport = Agent(
-    model=OpenAIChat(id="gpt-4o"),
+    model=OpenAIChat(id="gpt-4o", http_client=openai_http_client),
     description="You are an AI that can analyze a conversation and provide feedback on the most important points discussed in the conversation. Give the information in spanish",
     response_model=ReportData,
 )
 
 #create a function that will receive the text and return the data
 def runReportAgent(transript: str):
-    response = agentReport.run(transript)
-    print(response.content.dict())
-    return response.content.dict()
+    return runCachedAgent("report", agentReport, transript)
 
 class EmailData(BaseModel):
     subject: str = Field(..., title="The subject of the email.")
     body: str = Field(..., title="The body of the email.")
 
 agentEmail = Agent(
-    model=OpenAIChat(id="gpt-4o"),
+    model=OpenAIChat(id="gpt-4o", http_client=openai_http_client),
     description="You are an AI that can write emails giving the next steps to be taken after the conversation basing it on the information provided asume they know you are an agent so do not put names or emails. Give the information in spanish",
     response_model=EmailData,
 )
 
 def runEmailAgent(information: str):
-    response = agentEmail.run(information)
-    print(response.content.dict())
-    return response.content.dict()
+    return runCachedAgent("email", agentEmail, information)
+
+
+# Shared, bounded executor for running independent agents at the same time.
+# The size caps how many LLM calls this process has in flight across all requests.
+AGENT_MAX_WORKERS = int(os.getenv("AGENT_MAX_WORKERS", "8"))
+AGENT_TIMEOUT = float(os.getenv("AGENT_TIMEOUT", "90"))
+
+agentExecutor = ThreadPoolExecutor(max_workers=AGENT_MAX_WORKERS, thread_name_prefix="agent")
+
+# Per-agent timeouts in seconds; fall back to AGENT_TIMEOUT
+agentTimeouts = {
+    "notes": float(os.getenv("NOTES_AGENT_TIMEOUT", AGENT_TIMEOUT)),
+    "report": float(os.getenv("REPORT_AGENT_TIMEOUT", AGENT_TIMEOUT)),
+}
+
+def runAgentsConcurrently(tasks: dict, timeouts: dict = None):
+    """Run several agents at the same time on the shared executor.
+
+    Args:
+        tasks (dict): name -> (function, argument)
+        timeouts (dict, optional): name -> seconds. Missing names use AGENT_TIMEOUT.
+
+    Returns:
+        (results, errors): results maps every name to its output (None if it failed),
+        errors maps the names that failed or were abandoned on timeout to an error message.
+    """
+    timeouts = timeouts or {}
+    start = time.monotonic()
+    futures = {name: agentExecutor.submit(profiler.propagate(fn), arg) for name, (fn, arg) in tasks.items()}
+
+    results, errors = {}, {}
+    for name, future in futures.items():
+        timeout = timeouts.get(name, AGENT_TIMEOUT)
+        remaining = max(0.0, start + timeout - time.monotonic())
+        try:
+            results[name] = future.result(timeout=remaining)
+        except FutureTimeoutError:
+            # A running thread can't be stopped: the run is abandoned, not cancelled, and keeps
+            # its executor slot until the LLM call returns. cancel() only drops it if still queued.
+            future.cancel()
+            results[name] = None
+            errors[name] = f"{name} agent abandoned after {timeout:g}s without a result"
+        except Exception as e:
+            results[name] = None
+            errors[name] = f"{name} agent failed: {str(e)}"
+    return results, errors
+
+#run the notes and report agents concurrently over the same transcript
+def runInsightAgents(transcript: str):
+    """Returns {"notes": ..., "report": ...} plus an "errors" key when an agent failed."""
+    results, errors = runAgentsConcurrently({
+        "notes": (runNotetakingAgent, transcript),
+        "report": (runReportAgent, transcript),
+    }, agentTimeouts)
+    if errors:
+        results["errors"] = errors
+    return results
+
+
+# Combined mode: one structured-output call that returns both notes and report,
+# so the transcript's input tokens are only paid once.
+class InsightData(BaseModel):
+    notes: NotesData = Field(..., title="Notes about the key topics of the conversation.")
+    report: ReportData = Field(..., title="Feedback on the most important points discussed in the conversation.")
+
+agentInsight = Agent(
+    model=OpenAIChat(id="gpt-4o", http_client=openai_http_client),
+    description="You are an AI Notetaker and analyst for a Company's Videoconferences and Meetings. From the transcript of a meeting provide relevant notes about the key topics and analyze the conversation giving feedback on the most important points discussed. Put the information in spanish",
+    response_model=InsightData,
+)
+
+def runCombinedInsightAgent(transcript: str):
+    return runCachedAgent("insight", agentInsight, transcript)
+
+# Map-reduce for long transcripts: transcripts above LONG_TRANSCRIPT_TOKENS are split on speaker
+# turns into chunks of TRANSCRIPT_CHUNK_TOKENS, summarized in parallel (TRANSCRIPT_MAP_PARALLELISM
+# at a time), and the joined summaries are what the notes/report agents receive.
+LONG_TRANSCRIPT_TOKENS = int(os.getenv("LONG_TRANSCRIPT_TOKENS", "12000"))
+TRANSCRIPT_CHUNK_TOKENS = int(os.getenv("TRANSCRIPT_CHUNK_TOKENS", "4000"))
+TRANSCRIPT_MAP_PARALLELISM = int(os.getenv("TRANSCRIPT_MAP_PARALLELISM", "4"))
+
+agentChunkSummary = Agent(
+    model=OpenAIChat(id="gpt-4o", http_client=openai_http_client),
+    description="You are an AI Notetaker for a Company's Videoconferences and Meetings. You receive one part of a long meeting transcript. Summarize that part keeping who said what, the topics, questions, decisions, positive and negative feedback and next steps. Put the information in spanish",
+)
+
+def runChunkSummaryAgent(chunk: str):
+    return runCachedAgent("chunk_summary", agentChunkSummary, chunk)
+
+def mapConcurrently(fn, items, parallelism: int):
+    """Apply fn to every item on the shared executor with at most `parallelism`
+    calls in flight, returning the results in input order. Raises the first error."""
+    results = [None] * len(items)
+    pending = {}
+    next_index = 0
+    while next_index < len(items) or pending:
+        while next_index < len(items) and len(pending) < parallelism:
+            pending[agentExecutor.submit(profiler.propagate(fn), items[next_index])] = next_index
+            next_index += 1
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                results[pending.pop(future)] = future.result()
+            except Exception:
+                for other in pending:
+                    other.cancel()
+                raise
+    return results
+
+def summarizeLongTranscript(transcript: str, chunk_tokens: int = None, parallelism: int = None):
+    """Map step: summarize each chunk of the transcript in parallel and join the summaries."""
+    chunks = chunk_transcript(transcript, chunk_tokens or TRANSCRIPT_CHUNK_TOKENS)
+    summaries = mapConcurrently(runChunkSummaryAgent, chunks, parallelism or TRANSCRIPT_MAP_PARALLELISM)
+    return joinChunkSummaries(summaries)
+
+def joinChunkSummaries(summaries: list):
+    return "\n\n".join(f"Parte {i} de {len(summaries)}:\n{summary}" for i, summary in enumerate(summaries, 1))
+
+# "parallel" runs the notes and report agents concurrently, "combined" uses agentInsight
+INSIGHT_MODES = ("parallel", "combined")
+INSIGHT_MODE = os.getenv("INSIGHT_MODE", "parallel")
+
+def generateInsights(transcript: str, mode: str = None):
+    """Generate {"notes": ..., "report": ...} for a transcript using the given mode
+    (defaults to INSIGHT_MODE). Failed parts are None and listed under "errors"."""
+    mode = mode or INSIGHT_MODE
+    if mode not in INSIGHT_MODES:
+        raise ValueError(f"Unknown insight mode: {mode}")
+
+    # Long meetings are condensed chunk by chunk first (map), the agents then reduce the summaries
+    if estimate_tokens(transcript) > LONG_TRANSCRIPT_TOKENS:
+        try:
+            transcript = summarizeLongTranscript(transcript)
+        except Exception as e:
+            return {"notes": None, "report": None, "errors": {"chunks": f"chunk summary agent failed: {str(e)}"}}
+
+    if mode == "combined":
+        try:
+            return runCombinedInsightAgent(transcript)
+        except Exception as e:
+            return {"notes": None, "report": None, "errors": {"insight": f"insight agent failed: {str(e)}"}}
+    return runInsightAgents(transcript)
+
+
+# Streaming helpers used by the SSE endpoints
+
+def iterInsightAgents(transcript: str, heartbeat: float = None):
+    """Run the notes and report agents concurrently and yield (name, result, error)
+    as soon as each one finishes. With heartbeat set, yields (None, None, None)
+    every heartbeat seconds while still waiting, so callers can keep the connection alive."""
+    if estimate_tokens(transcript) > LONG_TRANSCRIPT_TOKENS:
+        try:
+            transcript = summarizeLongTranscript(transcript)
+        except Exception as e:
+            for name in ("notes", "report"):
+                yield name, None, f"chunk summary agent failed: {str(e)}"
+            return
+
+    start = time.monotonic()
+    futures = {
+        agentExecutor.submit(profiler.propagate(runNotetakingAgent), transcript): "notes",
+        agentExecutor.submit(profiler.propagate(runReportAgent), transcript): "report",
+    }
+    pending = set(futures)
+    while pending:
+        now = time.monotonic()
+        deadline = min(start + agentTimeouts[futures[f]] for f in pending)
+        wait_for = max(0.0, deadline - now)
+        if heartbeat:
+            wait_for = min(wait_for, heartbeat)
+        done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+        for future in done:
+            name = futures[future]
+            try:
+                yield name, future.result(), None
+            except Exception as e:
+                yield name, None, f"{name} agent failed: {str(e)}"
+
+        for future in list(pending):
+            name = futures[future]
+            if time.monotonic() >= start + agentTimeouts[name]:
+                # abandoned like in runAgentsConcurrently: the thread keeps running to completion
+                future.cancel()
+                pending.discard(future)
+                yield name, None, f"{name} agent abandoned after {agentTimeouts[name]:g}s without a result"
+
+        if pending and not done and heartbeat:
+            yield None, None, None
+
+# Same prompt as agentEmail, but plain text output so it can be streamed token by token
+agentEmailStream = Agent(
+    model=OpenAIChat(id="gpt-4o", http_client=openai_http_client),
+    description=agentEmail.description,
+    instructions=["Write only the subject of the email on the first line, without any prefix, then an empty line and then the body of the email."],
+)
+
+def parseEmailText(text: str):
+    """Split the streamed email text into {"subject": ..., "body": ...}."""
+    subject, _, body = text.strip().partition("\n")
+    subject = subject.strip().strip("*#").strip()
+    for prefix in ("Asunto:", "Subject:"):
+        if subject.lower().startswith(prefix.lower()):
+            subject = subject[len(prefix):].strip()
+    return {"subject": subject, "body": body.strip()}
+
+def streamEmailAgent(information: str):
+    """Yield ("delta", text) for every generated chunk and finally ("email", {"subject", "body"}).
+    A cached email is yielded at once, without deltas."""
+    key = agentCache.make_key("email_stream", agentEmailStream.model.id, agentEmailStream.description, information)
+    cached = agentCache.get(key)
+    if cached is not MISSING:
+        agent_cache_lookups.inc("email_stream", "hit")
+        yield "email", cached
+        return
+    agent_cache_lookups.inc("email_stream", "miss")
+
+    chunks = []
+    runner = agentForRun(agentEmailStream)
+    start = time.perf_counter()
+    try:
+        for chunk in runner.run(information, stream=True):
+            if isinstance(chunk.content, str) and chunk.content:
+                chunks.append(chunk.content)
+                yield "delta", chunk.content
+    except Exception:
+        observe_llm_run("email_stream", agentEmailStream.model.id, time.perf_counter() - start, outcome="error")
+        raise
+    # Streamed chunks carry no usage, the totals are on this run's agent once the stream ends
+    observe_llm_run("email_stream", agentEmailStream.model.id, time.perf_counter() - start,
+                    runner.run_response.metrics if runner.run_response else None)
+
+    email = parseEmailText("".join(chunks))
+    agentCache.set(key, email)
+    yield "email", email
+
+
+
+# Async variants used by async_app.py: same agents, prompts and cache, but awaited on an
+# event loop, so an in-flight LLM call costs a coroutine instead of a thread.
+
+def setAsyncHttpClient(http_client):
+    """Give every agent model an AsyncOpenAI client on http_client (an httpx.AsyncClient).
+    agno would otherwise pass the sync http_client to AsyncOpenAI."""
+    client = AsyncOpenAI(http_client=http_client)
+    for agent in (agentNotetaking, agentReport, agentEmail, agentInsight, agentChunkSummary, agentEmailStream):
+        agent.model.async_client = client
+
+async def arunCachedAgent(name: str, agent: Agent, text: str):
+    """Async runCachedAgent."""
+    key = agentCache.make_key(name, agent.model.id, agent.description, text)
+    cached = agentCache.get(key)
+    if cached is not MISSING:
+        agent_cache_lookups.inc(name, "hit")
+        return cached
+    agent_cache_lookups.inc(name, "miss")
+
+    start = time.perf_counter()
+    try:
+        # a per-call copy, like runCachedAgent: the copy keeps the async_client set by setAsyncHttpClient
+        response = await agentForRun(agent).arun(text)
+    except Exception:
+        observe_llm_run(name, agent.model.id, time.perf_counter() - start, outcome="error")
+        raise
+    observe_llm_run(name, agent.model.id, time.perf_counter() - start, response.metrics)
+    result = response.content.dict() if isinstance(response.content, BaseModel) else response.content
+    agentCache.set(key, result)
+    return result
+
+async def arunWithTimeout(name: str, coroutine):
+    """Await an agent call with its timeout. Returns (result, error)."""
+    timeout = agentTimeouts.get(name, AGENT_TIMEOUT)
+    try:
+        return await asyncio.wait_for(coroutine, timeout), None
+    except asyncio.TimeoutError:
+        return None, f"{name} agent timed out after {timeout:g}s"
+    except Exception as e:
+        return None, f"{name} agent failed: {str(e)}"
+
+async def asummarizeLongTranscript(transcript: str, chunk_tokens: int = None, parallelism: int = None):
+    """Async summarizeLongTranscript, with at most `parallelism` chunk summaries in flight."""
+    chunks = chunk_transcript(transcript, chunk_tokens or TRANSCRIPT_CHUNK_TOKENS)
+    semaphore = asyncio.Semaphore(parallelism or TRANSCRIPT_MAP_PARALLELISM)
+
+    async def summarize(chunk):
+        async with semaphore:
+            return await arunCachedAgent("chunk_summary", agentChunkSummary, chunk)
+    return joinChunkSummaries(await asyncio.gather(*(summarize(chunk) for chunk in chunks)))
+
+async def agenerateInsights(transcript: str, mode: str = None):
+    """Async generateInsights, same result shape."""
+    mode = mode or INSIGHT_MODE
+    if mode not in INSIGHT_MODES:
+        raise ValueError(f"Unknown insight mode: {mode}")
 
+    if estimate_tokens(transcript) > LONG_TRANSCRIPT_TOKENS:
+        try:
+            transcript = await asummarizeLongTranscript(transcript)
+        except Exception as e:
+            return {"notes": None, "report": None, "errors": {"chunks": f"chunk summary agent failed: {str(e)}"}}
 
+    if mode == "combined":
+        try:
+            return await arunCachedAgent("insight", agentInsight, transcript)
+        except Exception as e:
+            return {"notes": None, "report": None, "errors": {"insight": f"insight agent failed: {str(e)}"}}
 
+    (notes, notes_error), (report, report_error) = await asyncio.gather(
+        arunWithTimeout("notes", arunCachedAgent("notes", agentNotetaking, transcript)),
+        arunWithTimeout("report", arunCachedAgent("report", agentReport, transcript)),
+    )
+    results = {"notes": notes, "report": report}
+    errors = {name: error for name, error in (("notes", notes_error), ("report", report_error)) if error}
+    if errors:
+        results["errors"] = errors
+    return results
 
-    
-    
+async def arunEmailAgent(information: str):
+    return await arunCachedAgent("email", agentEmail, information)
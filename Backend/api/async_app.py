@@ -0,0 +1,313 @@
+"""
+Async (aiohttp) server for the LLM-bound endpoints.
+
+The Flask app holds one thread per request for the whole 20-60 s of an agent
+call. This app serves the same /agent/txt, /agent/email and /call/insight/new
+endpoints on an event loop, with the async OpenAI (agno arun) and Supabase
+clients, so one process can keep hundreds of LLM calls in flight. Everything
+else stays in main.py; route these paths here at the proxy.
+
+Admission control: at most ASYNC_MAX_INFLIGHT requests run at once, up to
+ASYNC_MAX_QUEUED more wait for a slot for at most ASYNC_QUEUE_TIMEOUT seconds,
+anything beyond that gets a 503 with Retry-After.
+
+Run with:
+    python async_app.py
+    gunicorn async_app:create_app --worker-class aiohttp.GunicornWebWorker
+"""
+import asyncio
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+
+from aiohttp import web
+from dotenv import load_dotenv
+from supabase import acreate_client
+
+from agent import agenerateInsights, arunEmailAgent, setAsyncHttpClient, agentCache, INSIGHT_MODES
+from connections import ConnectionPool, use_pooled_async_clients, supabase_pool, supabase_auth_pool
+from metrics import registry, http_request_seconds, instrument_supabase_pool, cache_collector, pool_collector, operator_authorized, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from identity import identity_cache, alookup_identity
+from insights import agenerate_call_insight
+from responses import orjson
+from transcripts import compact_for
+
+load_dotenv()
+# agno posts telemetry and serializes the whole agent session on every run; on an event
+# loop that CPU time is shared by all in-flight requests. Set AGNO_TELEMETRY=true to keep it.
+os.environ.setdefault("AGNO_TELEMETRY", "false")
+
+ASYNC_MAX_INFLIGHT = int(os.environ.get("ASYNC_MAX_INFLIGHT", "256"))
+ASYNC_MAX_QUEUED = int(os.environ.get("ASYNC_MAX_QUEUED", "512"))
+ASYNC_QUEUE_TIMEOUT = float(os.environ.get("ASYNC_QUEUE_TIMEOUT", "30"))
+ASYNC_RETRY_AFTER = int(os.environ.get("ASYNC_RETRY_AFTER", "5"))
+
+# Many concurrent model calls: a larger pool than the sync app's, HTTP/2 multiplexes streams on it
+openai_async_pool = ConnectionPool.from_env("openai_async", "OPENAI_ASYNC_HTTP", max_connections=200,
+                                            max_keepalive=50, read_timeout=120)
+
+registry.register_collector(cache_collector(lambda: {"agent_results": agentCache, "identity": identity_cache}))
+registry.register_collector(pool_collector((supabase_pool, supabase_auth_pool, openai_async_pool)))
+
+
+def dumps(obj):
+    return orjson.dumps(obj).decode("utf-8") if orjson is not None else json.dumps(obj)
+
+
+def json_response(body, status=200, headers=None):
+    return web.json_response(body, status=status, headers=headers, dumps=dumps)
+
+
+class AdmissionLimiter:
+    """Bounds the requests running at once and the requests waiting for a slot.
+
+    Args:
+        max_inflight (int): Requests allowed to run at the same time.
+        max_queued (int): Requests allowed to wait; more are rejected at once.
+        queue_timeout (float): Seconds a request may wait for a slot.
+    """
+
+    def __init__(self, max_inflight, max_queued, queue_timeout):
+        self.max_inflight = max_inflight
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_inflight)
+        self.inflight = 0
+        self.queued = 0
+        self.rejected = 0
+
+    def _reject(self, message):
+        self.rejected += 1
+        raise web.HTTPServiceUnavailable(
+            text=dumps({"error": message}),
+            content_type="application/json",
+            headers={"Retry-After": str(ASYNC_RETRY_AFTER)},
+        )
+
+    @asynccontextmanager
+    async def slot(self):
+        if self.queued >= self.max_queued:
+            self._reject("Server busy, try again later")
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._reject("Server busy, timed out waiting for a free slot")
+        finally:
+            self.queued -= 1
+        self.inflight += 1
+        try:
+            yield
+        finally:
+            self.inflight -= 1
+            self._semaphore.release()
+
+    def stats(self):
+        return {
+            "max_inflight": self.max_inflight,
+            "inflight": self.inflight,
+            "queued": self.queued,
+            "rejected": self.rejected,
+        }
+
+
+async def read_json(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        raise web.HTTPBadRequest(text=dumps({"error": "Invalid JSON body"}), content_type="application/json")
+    if not isinstance(data, dict):
+        raise web.HTTPBadRequest(text=dumps({"error": "JSON body must be an object"}), content_type="application/json")
+    return data
+
+
+async def authenticate(request, data):
+    """require_auth for the async routes: returns an error response, or None if user_id is an employee.
+    Compare the result with None: an aiohttp Response is an empty mapping, so it is falsy."""
+    user_id = data.get("user_id")
+    if not user_id:
+        return json_response({"error": "user_id is required"}, 400)
+    try:
+        if not await alookup_identity(request.app["supabase"], user_id):
+            return json_response({"error": "User not found"}, 404)
+    except Exception as e:
+        return json_response({"error": str(e)}, 500)
+    return None
+
+
+async def agent_txt(request):
+    """
+    Async /agent/txt: notes and report for a transcript.
+
+    Request Body:
+        - user_id (str): ID of the authenticated user
+        - transcript (str): The text content to be processed
+        - mode (str, optional): "parallel" or "combined"
+
+    Returns:
+        - 200: JSON with generated notes and report, same as the Flask endpoint
+        - 400: Error if user_id or transcript is missing or mode is invalid
+        - 404: Error if the user is not found
+        - 500: Error if processing fails
+        - 503: Error if the server is at capacity
+    """
+    data = await read_json(request)
+    error = await authenticate(request, data)
+    if error is not None:
+        return error
+    if 'transcript' not in data:
+        return json_response({'error': 'No transcript provided in request'}, 400)
+    mode = data.get('mode')
+    if mode and mode not in INSIGHT_MODES:
+        return json_response({'error': f'Invalid mode, expected one of {list(INSIGHT_MODES)}'}, 400)
+
+    async with request.app["limiter"].slot():
+        try:
+            insights = await agenerateInsights(compact_for("agent_txt", data['transcript']), mode)
+        except Exception as e:
+            return json_response({'error': f'Error processing text with agent: {str(e)}'}, 500)
+    if insights["notes"] is None and insights["report"] is None:
+        return json_response({'error': 'Error processing text with agent', 'details': insights["errors"]}, 500)
+    return json_response(insights)
+
+
+async def agent_email(request):
+    """
+    Async /agent/email.
+
+    Request Body:
+        - information (str): The information to be used for email generation
+
+    Returns:
+        - 200: JSON with generated email {"email": {"subject": str, "body": str}}
+        - 400: Error if no information is provided
+        - 500: Error if processing fails
+        - 503: Error if the server is at capacity
+    """
+    data = await read_json(request)
+    if 'information' not in data:
+        return json_response({'error': 'No information provided in request'}, 400)
+
+    async with request.app["limiter"].slot():
+        try:
+            email = await arunEmailAgent(data['information'])
+        except Exception as e:
+            return json_response({'error': f'Error generating email: {str(e)}'}, 500)
+    return json_response({'email': email})
+
+
+async def new_call_insight(request):
+    """
+    Async /call/insight/new: save the transcript on the call, generate its insights
+    and insert them in the insight table.
+
+    Request Body:
+        - user_id (str): ID of the authenticated user
+        - transcript (str): Transcript of the call
+        - call_id (str, optional): ID of the call, defaults to the user's latest call
+        - mode (str, optional): "parallel" or "combined"
+
+    Returns:
+        - 201: JSON with the created insight {"call_id", "insightsjson"} (plus "errors" if one agent failed)
+        - 400: Error if user_id or transcript is missing or mode is invalid
+        - 404: Error if the user or the call is not found
+        - 500: Error if processing fails
+        - 503: Error if the server is at capacity
+    """
+    data = await read_json(request)
+    transcript = data.get("transcript")
+    mode = data.get("mode")
+
+    error = await authenticate(request, data)
+    if error is not None:
+        return error
+    if not transcript:
+        return json_response({'error': 'No transcript provided'}, 400)
+    if mode and mode not in INSIGHT_MODES:
+        return json_response({'error': f'Invalid mode, expected one of {list(INSIGHT_MODES)}'}, 400)
+
+    body, status = await agenerate_call_insight(request.app["supabase"], data.get("user_id"), transcript,
+                                                data.get("call_id"), mode, slot=request.app["limiter"].slot)
+    return json_response(body, status)
+
+
+def require_operator(request):
+    """An error response unless the caller sends "Authorization: Bearer <METRICS_TOKEN>"."""
+    if not operator_authorized(request.headers.get("Authorization")):
+        return json_response({"error": "Operator access required"}, 403)
+    return None
+
+
+async def stats(request):
+    """Admission and connection pool stats of this process (operators only)."""
+    error = require_operator(request)
+    if error is not None:
+        return error
+    return json_response({
+        "admission": request.app["limiter"].stats(),
+        "pools": {pool.name: pool.stats() for pool in (supabase_pool, supabase_auth_pool, openai_async_pool)},
+    })
+
+
+async def metrics(request):
+    """Metrics of this process in the Prometheus text format, same names as the Flask app's /metrics
+    (operators only)."""
+    error = require_operator(request)
+    if error is not None:
+        return error
+    return web.Response(body=registry.render(), headers={"Content-Type": METRICS_CONTENT_TYPE})
+
+
+@web.middleware
+async def metrics_middleware(request, handler):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await handler(request)
+        status = response.status
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        route = request.match_info.route.resource
+        http_request_seconds.observe(time.perf_counter() - started, request.method,
+                                     route.canonical if route is not None else "unmatched", str(status))
+
+
+@web.middleware
+async def cors_middleware(request, handler):
+    # Same policy as the Flask app: all origins allowed
+    if request.method == "OPTIONS":
+        response = web.Response()
+    else:
+        response = await handler(request)
+    response.headers["Access-Control-Allow-Origin"] = "*"
+    response.headers["Access-Control-Allow-Headers"] = request.headers.get("Access-Control-Request-Headers", "*")
+    response.headers["Access-Control-Allow-Methods"] = "GET, POST, OPTIONS"
+    return response
+
+
+async def on_startup(app):
+    supabase = await acreate_client(os.environ.get("SUPABASE_URL"), os.environ.get("SUPABASE_KEY"))
+    app["supabase"] = use_pooled_async_clients(supabase, supabase_pool, supabase_auth_pool)
+    instrument_supabase_pool(supabase_pool)
+    instrument_supabase_pool(supabase_auth_pool)
+    setAsyncHttpClient(openai_async_pool.async_client())
+
+
+async def create_app():
+    app = web.Application(middlewares=[metrics_middleware, cors_middleware], client_max_size=16 * 1024 * 1024)
+    app["limiter"] = AdmissionLimiter(ASYNC_MAX_INFLIGHT, ASYNC_MAX_QUEUED, ASYNC_QUEUE_TIMEOUT)
+    app.on_startup.append(on_startup)
+    app.router.add_post("/agent/txt", agent_txt)
+    app.router.add_post("/agent/email", agent_email)
+    app.router.add_post("/call/insight/new", new_call_insight)
+    app.router.add_get("/async/stats", stats)
+    app.router.add_get("/metrics", metrics)
+    return app
+
+
+if __name__ == "__main__":
+    web.run_app(create_app(), port=int(os.environ.get("ASYNC_PORT", "5001")))
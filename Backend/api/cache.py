@@ -0,0 +1,368 @@
+import copy
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Sentinel returned on a cache miss, so that None can be cached as a value
+MISSING = object()
+
+
+class TTLCache:
+    """Bounded, thread-safe LRU map where every entry expires after a TTL.
+
+    Args:
+        maxsize (int): Maximum number of entries; the least recently used entry is evicted first.
+        ttl (float): Default time to live of an entry in seconds.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class SqliteCache:
+    """Persistent cache tier: JSON-serializable values in a local SQLite file.
+
+    Args:
+        path (str): Path of the SQLite database file.
+        ttl (float): Time to live of an entry in seconds.
+    """
+
+    def __init__(self, path, ttl=86400):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return default
+            if row[1] <= time.time():
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return default
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        payload = json.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, payload, expires_at),
+            )
+            self._conn.commit()
+
+    def invalidate(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def purge_expired(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+def normalize_text(text: str) -> str:
+    """Normalize a transcript so that cosmetic differences hash the same."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class AgentResultCache:
+    """Content-addressed cache of agent outputs.
+
+    Keys are a hash of the normalized input text plus the agent name, model id
+    and prompt description, so changing the prompt or model never serves stale
+    results. Lookups go to the in-process LRU first and then to the optional
+    SQLite tier; disk hits are promoted to memory.
+
+    Args:
+        maxsize (int): Entries kept in memory. 0 disables the memory tier.
+        ttl (float): Time to live of an entry in seconds.
+        db_path (str, optional): SQLite file for the persistent tier.
+    """
+
+    def __init__(self, maxsize=256, ttl=86400, db_path=None):
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.disk = SqliteCache(db_path, ttl=ttl) if db_path else None
+        self.disk_hits = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(agent_name, model_id, description, text):
+        digest = hashlib.sha256()
+        for part in (agent_name, model_id, description, normalize_text(text)):
+            digest.update(str(part).encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is MISSING and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not MISSING:
+                with self._lock:
+                    self.disk_hits += 1
+                self.memory.set(key, value)
+        # Callers may mutate the result, never hand out the cached object itself
+        return value if value is MISSING else copy.deepcopy(value)
+
+    def set(self, key, value):
+        self.memory.set(key, copy.deepcopy(value))
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def stats(self):
+        memory = self.memory.stats()
+        hits = memory["hits"] + self.disk_hits
+        misses = memory["misses"] - self.disk_hits
+        total = hits + misses
+        return {
+            "memory": memory,
+            "disk": {"enabled": self.disk is not None, "hits": self.disk_hits, "size": len(self.disk) if self.disk else 0},
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+            "llm_calls_saved": hits,
+        }
+
+
+class RefreshAheadCache:
+    """TTL map that reloads an entry in the background once it is older than
+    refresh_after, so hot keys are refreshed before they expire and readers
+    only wait on the loader for keys that are missing or fully expired.
+
+    Args:
+        loader (callable): key -> value, called on a miss and to refresh.
+        ttl (float): Time after which an entry is no longer served.
+        refresh_after (float): Age after which a read schedules a background reload.
+        maxsize (int): Maximum number of entries.
+    """
+
+    def __init__(self, loader, ttl=300, refresh_after=240, maxsize=10000):
+        self.loader = loader
+        self.refresh_after = refresh_after
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._invalidations = 0
+        self._invalidated = {}  # key -> value of _invalidations when it was last invalidated
+        self._executor = None
+        self.refreshes = 0
+
+    def _load(self, key):
+        since = self.snapshot()
+        value = self.loader(key)
+        self.set(key, value, since)
+        return value
+
+    def _refresh(self, key):
+        try:
+            self._load(key)
+            self.refreshes += 1
+        except Exception as e:
+            print(f"Background refresh of {key} failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get(self, key):
+        entry = self._cache.get(key)
+        if entry is MISSING:
+            return self._load(key)
+
+        value, loaded_at = entry
+        if time.monotonic() - loaded_at > self.refresh_after:
+            with self._lock:
+                schedule = key not in self._refreshing
+                if schedule:
+                    self._refreshing.add(key)
+                    if self._executor is None:
+                        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+            if schedule:
+                self._executor.submit(self._refresh, key)
+        return value
+
+    def snapshot(self):
+        """Token to take before loading a value by other means and to pass to set()."""
+        with self._lock:
+            return self._invalidations
+
+    def set(self, key, value, since=None):
+        """Store a value that was loaded by other means (e.g. a joined query). With since
+        (a snapshot() taken before the load), a value loaded before an invalidation of the
+        key is not stored. Returns whether the value was stored."""
+        with self._lock:
+            if since is not None and self._invalidated.get(key, 0) > since:
+                return False
+            self._cache.set(key, (value, time.monotonic()))
+            return True
+
+    def invalidate(self, key):
+        with self._lock:
+            self._invalidations += 1
+            self._invalidated[key] = self._invalidations
+            self._cache.invalidate(key)
+
+    def stats(self):
+        return {**self._cache.stats(), "refreshes": self.refreshes}
+
+
+class PdfTextCache:
+    """Extracted PDF text keyed by the SHA-256 digest of the file.
+
+    The memory tier is an LRU bounded by the size of the cached text rather
+    than the number of entries, since one document can be a few bytes or many
+    megabytes. The optional SQLite tier keeps results across restarts; disk
+    hits are promoted to memory.
+
+    Args:
+        max_bytes (int): Memory budget for the cached text (UTF-8 bytes). 0 disables the memory tier.
+        db_path (str, optional): SQLite file for the persistent tier.
+        ttl (float): Time to live of a disk entry in seconds.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, db_path=None, ttl=30 * 86400):
+        self.max_bytes = max_bytes
+        self.disk = SqliteCache(db_path, ttl=ttl) if db_path else None
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(data, version=""):
+        """Digest of the file plus the extractor version, so upgrades don't serve old text."""
+        return f"{hashlib.sha256(data).hexdigest()}:{version}"
+
+    @staticmethod
+    def _size(value):
+        return sum(len(page.encode("utf-8")) for page in value["pages"])
+
+    @staticmethod
+    def _result(value):
+        # Only the pages are kept, the full text is rebuilt on every hit
+        return {"text": "".join(value["pages"]), "pages": list(value["pages"]), "page_count": value["page_count"]}
+
+    def _store(self, key, value, size):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._bytes -= self._data.pop(key)[1]
+            self._data[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._data.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._result(entry[0])
+        value = self.disk.get(key) if self.disk is not None else MISSING
+        with self._lock:
+            if value is MISSING:
+                self.misses += 1
+                return MISSING
+            self.disk_hits += 1
+        self._store(key, value, self._size(value))
+        return self._result(value)
+
+    def set(self, key, value):
+        value = {"pages": list(value["pages"]), "page_count": value["page_count"]}
+        self._store(key, value, self._size(value))
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def stats(self):
+        hits = self.hits + self.disk_hits
+        total = hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": hits,
+            "disk": {"enabled": self.disk is not None, "hits": self.disk_hits, "size": len(self.disk) if self.disk else 0},
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+            "parses_saved": hits,
+        }
@@ -0,0 +1,240 @@
+import os
+import threading
+import time
+
+import httpx
+from gotrue.http_clients import SyncClient as GotrueSyncClient
+from postgrest import AsyncPostgrestClient, SyncPostgrestClient
+from postgrest.utils import SyncClient as PostgrestSyncClient
+
+
+class ConnectionPool:
+    """One shared httpx transport (keep-alive pool, optional HTTP/2) plus its metrics.
+
+    Every client built with client() sends its requests through the same
+    transport, so connections and TLS sessions are reused across threads and
+    across clients that get recreated. Each request carries an httpcore trace
+    hook that records new TCP connections, TLS handshakes and the time spent
+    waiting for a free connection (time to the first request byte minus the
+    connect and TLS time). async_client() does the same for asyncio code with a
+    second transport (an httpx transport can't be shared between sync and
+    async clients); its connections count in the same stats.
+
+    Args:
+        name (str): Name shown in the stats.
+        http2 (bool): Negotiate HTTP/2 (needs the h2 package).
+        max_connections (int): Maximum open connections (httpx's default).
+        max_keepalive (int): Maximum idle connections kept open (httpx's default).
+        keepalive_expiry (float): Seconds an idle connection is kept (httpx's default).
+        connect_timeout (float): Seconds to open a connection.
+        read_timeout (float): Seconds to wait for response data.
+        write_timeout (float): Seconds to send request data.
+        pool_timeout (float, optional): Seconds to wait for a free connection, None waits
+            as long as it takes.
+        retries (int): Retries of failed connection attempts.
+    """
+
+    def __init__(self, name, http2=True, max_connections=100, max_keepalive=20, keepalive_expiry=5,
+                 connect_timeout=5, read_timeout=30, write_timeout=30, pool_timeout=None, retries=1):
+        self.name = name
+        self.http2 = http2
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive,
+                                   keepalive_expiry=keepalive_expiry)
+        self.timeout = httpx.Timeout(connect=connect_timeout, read=read_timeout, write=write_timeout, pool=pool_timeout)
+        self.retries = retries
+        self.transport = httpx.HTTPTransport(http2=http2, limits=self.limits, retries=retries)
+        self.async_transport = None
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connects = 0
+        self.tls_handshakes = 0
+        self.connect_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.request_hooks = []
+        self.response_hooks = []
+
+    @classmethod
+    def from_env(cls, name, prefix, **defaults):
+        """Build a pool from <prefix>_HTTP2, <prefix>_MAX_CONNECTIONS, <prefix>_MAX_KEEPALIVE,
+        <prefix>_KEEPALIVE_EXPIRY and <prefix>_{CONNECT,READ,WRITE,POOL}_TIMEOUT. Settings that
+        are neither in the environment nor in defaults keep the constructor's defaults."""
+        def flag(value):
+            return value.lower() in ("1", "true", "yes")
+
+        settings = {
+            "http2": ("HTTP2", flag),
+            "max_connections": ("MAX_CONNECTIONS", int),
+            "max_keepalive": ("MAX_KEEPALIVE", int),
+            "keepalive_expiry": ("KEEPALIVE_EXPIRY", float),
+            "connect_timeout": ("CONNECT_TIMEOUT", float),
+            "read_timeout": ("READ_TIMEOUT", float),
+            "write_timeout": ("WRITE_TIMEOUT", float),
+            "pool_timeout": ("POOL_TIMEOUT", float),
+        }
+        options = dict(defaults)
+        for option, (key, cast) in settings.items():
+            value = os.environ.get(f"{prefix}_{key}")
+            if value is not None:
+                options[option] = cast(value)
+        return cls(name, **options)
+
+    def _tracer(self, started):
+        timings = {}
+
+        def trace(event, info):
+            now = time.perf_counter()
+            if event in ("connection.connect_tcp.started", "connection.start_tls.started"):
+                timings[event] = now
+            elif event == "connection.connect_tcp.complete":
+                with self._lock:
+                    self.connects += 1
+                    self.connect_seconds += now - timings.get("connection.connect_tcp.started", now)
+                timings["setup"] = timings.get("setup", 0.0) + now - timings.get("connection.connect_tcp.started", now)
+            elif event == "connection.start_tls.complete":
+                with self._lock:
+                    self.tls_handshakes += 1
+                    self.connect_seconds += now - timings.get("connection.start_tls.started", now)
+                timings["setup"] = timings.get("setup", 0.0) + now - timings.get("connection.start_tls.started", now)
+            elif event.endswith("send_request_headers.started") and "waited" not in timings:
+                timings["waited"] = True
+                waited = max(0.0, now - started - timings.get("setup", 0.0))
+                with self._lock:
+                    self.wait_seconds += waited
+                    self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        return trace
+
+    def _on_request(self, request):
+        with self._lock:
+            self.requests += 1
+        request.extensions["trace"] = self._tracer(time.perf_counter())
+        for hook in self.request_hooks:
+            hook(request)
+
+    def _on_response(self, response):
+        for hook in self.response_hooks:
+            hook(response)
+
+    async def _on_async_request(self, request):
+        self._on_request(request)
+        trace = request.extensions["trace"]
+
+        async def async_trace(event, info):
+            trace(event, info)
+        request.extensions["trace"] = async_trace
+
+    async def _on_async_response(self, response):
+        self._on_response(response)
+
+    def async_client(self, client_class=httpx.AsyncClient, **kwargs):
+        """An httpx.AsyncClient (or subclass) on the pool's async transport, created on first use."""
+        if self.async_transport is None:
+            self.async_transport = httpx.AsyncHTTPTransport(http2=self.http2, limits=self.limits, retries=self.retries)
+        kwargs.setdefault("timeout", self.timeout)
+        return client_class(
+            transport=self.async_transport,
+            event_hooks={"request": [self._on_async_request], "response": [self._on_async_response]},
+            **kwargs,
+        )
+
+    def client(self, client_class=httpx.Client, **kwargs):
+        """An httpx client (or subclass) that uses the shared transport."""
+        kwargs.setdefault("timeout", self.timeout)
+        return client_class(
+            transport=self.transport,
+            event_hooks={"request": [self._on_request], "response": [self._on_response]},
+            **kwargs,
+        )
+
+    def _connections(self):
+        """The open connections of both transports, or None if httpx/httpcore no longer expose
+        them: transport._pool is a private attribute (checked against httpx 0.28 / httpcore 1.0)."""
+        try:
+            connections = list(self.transport._pool.connections)
+            if self.async_transport is not None:
+                connections += self.async_transport._pool.connections
+            return connections
+        except AttributeError:
+            return None
+
+    def stats(self):
+        """Request and connection counters. active and idle are None when the open connections
+        can't be inspected."""
+        connections = self._connections()
+        active = idle = None
+        if connections is not None:
+            idle = sum(1 for connection in connections if connection.is_idle())
+            closed = sum(1 for connection in connections if connection.is_closed())
+            active = len(connections) - idle - closed
+        with self._lock:
+            return {
+                "http2": self.http2,
+                "max_connections": self.limits.max_connections,
+                "max_keepalive": self.limits.max_keepalive_connections,
+                "active": active,
+                "idle": idle,
+                "requests": self.requests,
+                "connects": self.connects,
+                "tls_handshakes": self.tls_handshakes,
+                "connections_reused": max(0, self.requests - self.connects),
+                "avg_connect_ms": round(1000 * self.connect_seconds / self.connects, 2) if self.connects else 0.0,
+                "avg_wait_ms": round(1000 * self.wait_seconds / self.requests, 3) if self.requests else 0.0,
+                "max_wait_ms": round(1000 * self.max_wait_seconds, 3),
+            }
+
+
+def use_pooled_clients(supabase_client, postgrest_pool, auth_pool):
+    """Route a supabase-py client's PostgREST and GoTrue requests through the given pools.
+
+    supabase-py builds its PostgREST client lazily and rebuilds it on auth events,
+    so the factory is replaced on the instance; every rebuilt client shares the pool.
+
+    This relies on supabase-py internals (SyncClient._init_postgrest_client and
+    _postgrest, SyncGoTrueClient._http_client), written against the versions pinned
+    in requirements.txt (supabase 2.14.0, postgrest 0.19.3, gotrue 2.11.4): check
+    them again before upgrading any of the three.
+    """
+    class PooledPostgrestClient(SyncPostgrestClient):
+        def create_session(self, base_url, headers, timeout, verify=True, proxy=None):
+            return postgrest_pool.client(PostgrestSyncClient, base_url=base_url, headers=headers, follow_redirects=True)
+
+    def init_postgrest_client(rest_url, headers, schema, timeout=None, verify=True, proxy=None):
+        return PooledPostgrestClient(rest_url, headers=headers, schema=schema)
+
+    supabase_client._init_postgrest_client = init_postgrest_client
+    supabase_client._postgrest = None
+    auth_client = auth_pool.client(GotrueSyncClient, follow_redirects=True)
+    supabase_client.auth._http_client = auth_client
+    supabase_client.auth.admin._http_client = auth_client
+    return supabase_client
+
+
+def use_pooled_async_clients(supabase_client, postgrest_pool, auth_pool):
+    """use_pooled_clients for a supabase-py AsyncClient (acreate_client), with the same
+    dependency on supabase-py internals."""
+    class PooledAsyncPostgrestClient(AsyncPostgrestClient):
+        def create_session(self, base_url, headers, timeout, verify=True, proxy=None):
+            return postgrest_pool.async_client(base_url=base_url, headers=headers, follow_redirects=True)
+
+    def init_postgrest_client(rest_url, headers, schema, timeout=None, verify=True, proxy=None):
+        return PooledAsyncPostgrestClient(rest_url, headers=headers, schema=schema)
+
+    supabase_client._init_postgrest_client = init_postgrest_client
+    supabase_client._postgrest = None
+    auth_client = auth_pool.async_client(follow_redirects=True)
+    supabase_client.auth._http_client = auth_client
+    supabase_client.auth.admin._http_client = auth_client
+    return supabase_client
+
+
+supabase_pool = ConnectionPool.from_env("supabase", "SUPABASE_HTTP", read_timeout=30)
+supabase_auth_pool = ConnectionPool.from_env("supabase_auth", "SUPABASE_AUTH_HTTP")
+# Model calls are long, the read timeout is per chunk received, not for the whole response
+openai_pool = ConnectionPool.from_env("openai", "OPENAI_HTTP", read_timeout=120)
+
+# One client per upstream, httpx clients are thread safe
+openai_http_client = openai_pool.client()
+
+
+def pool_stats():
+    return {pool.name: pool.stats() for pool in (supabase_pool, supabase_auth_pool, openai_pool)}
@@ -0,0 +1,51 @@
+import os
+
+from cache import TTLCache, MISSING
+
+# Cache of auth_user_id -> (organization_id, emp_role), shared by the Flask and the async
+# app. Unknown users are cached too (as None) for a shorter time, so a user who just
+# signed up isn't rejected for the full TTL. Write paths that create or link employees
+# must call invalidate_identity.
+identity_cache = TTLCache(
+    maxsize=int(os.environ.get("IDENTITY_CACHE_SIZE", "10000")),
+    ttl=float(os.environ.get("IDENTITY_CACHE_TTL", "60")),
+)
+IDENTITY_CACHE_NEGATIVE_TTL = float(os.environ.get("IDENTITY_CACHE_NEGATIVE_TTL", "10"))
+
+
+def cache_identity(user_id, identity):
+    """Cache the (organization_id, emp_role) of a user, or None for an unknown user."""
+    if identity is None:
+        identity_cache.set(user_id, None, ttl=IDENTITY_CACHE_NEGATIVE_TTL)
+    else:
+        identity_cache.set(user_id, identity)
+    return identity
+
+
+def invalidate_identity(auth_user_id):
+    if auth_user_id:
+        identity_cache.invalidate(auth_user_id)
+
+
+def _identity_query(supabase, user_id):
+    return supabase.table("employee").select("organization_id,emp_role").eq("auth_user_id", user_id)
+
+
+def _identity(rows):
+    return (rows[0]["organization_id"], rows[0]["emp_role"]) if rows else None
+
+
+def lookup_identity(supabase, user_id):
+    """Return (organization_id, emp_role) of the employee with this auth user id, or None."""
+    identity = identity_cache.get(user_id)
+    if identity is MISSING:
+        identity = cache_identity(user_id, _identity(_identity_query(supabase, user_id).execute().data))
+    return identity
+
+
+async def alookup_identity(supabase, user_id):
+    """lookup_identity with a supabase-py AsyncClient."""
+    identity = identity_cache.get(user_id)
+    if identity is MISSING:
+        identity = cache_identity(user_id, _identity((await _identity_query(supabase, user_id).execute()).data))
+    return identity
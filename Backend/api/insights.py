@@ -0,0 +1,109 @@
+import json
+from contextlib import asynccontextmanager
+
+from agent import generateInsights, agenerateInsights
+from transcripts import compact_for
+
+# Call insights: save the transcript on the call, generate its insights and insert them
+# in the insight table. generate_call_insight serves the Flask route and the job workers,
+# agenerate_call_insight the async app; both return (body, status) with the same errors.
+
+
+def _failed(step, e):
+    return {"error": f"Error {step}: {str(e)}"}, 500
+
+
+NO_CALLS = ({"error": "No calls found for this employee"}, 404)
+UPDATE_FAILED = ({"error": "Failed to update call transcription"}, 500)
+INSERT_FAILED = ({"error": "Error creating the insight"}, 500)
+
+
+def _insight_row(call_id, insights):
+    """(row to insert or None if no agent produced anything, agent errors)."""
+    errors = insights.pop("errors", None)
+    if insights["notes"] is None and insights["report"] is None:
+        return None, errors
+    return {"call_id": call_id, "insightsjson": json.dumps(insights)}, errors
+
+
+def _no_insights(errors):
+    return {"error": "Error processing text with agent", "details": errors}, 500
+
+
+def _created(row, errors):
+    # Partial result: one of the agents failed or timed out
+    return ({**row, "errors": errors} if errors else row), 201
+
+
+def generate_call_insight(supabase, user_id, transcript, call_id=None, mode=None):
+    """Generate and store the insights of a call. call_id defaults to the user's latest call.
+
+    Returns:
+        (body, status): JSON-serializable body and the HTTP status it maps to
+    """
+    if not call_id:
+        try:
+            response = supabase.rpc("get_latest_call", {"auth_uid": user_id}).execute()
+        except Exception as e:
+            return _failed("fetching latest call", e)
+        if not response.data:
+            return NO_CALLS
+        call_id = response.data[0]["call_id"]
+
+    try:
+        update_response = supabase.table("call").update({"transcription": transcript}).eq("id", call_id).execute()
+    except Exception as e:
+        return _failed("updating call transcription", e)
+    if not update_response.data:
+        return UPDATE_FAILED
+
+    try:
+        row, errors = _insight_row(call_id, generateInsights(compact_for("call_insight", transcript), mode))
+        if row is None:
+            return _no_insights(errors)
+        if not supabase.table("insight").insert(row).execute().data:
+            return INSERT_FAILED
+    except Exception as e:
+        return _failed("processing text with agent", e)
+    return _created(row, errors)
+
+
+@asynccontextmanager
+async def _no_slot():
+    yield
+
+
+async def agenerate_call_insight(supabase, user_id, transcript, call_id=None, mode=None, slot=_no_slot):
+    """generate_call_insight with a supabase-py AsyncClient and the async agents. The
+    generation runs inside slot(), an async context manager (the admission limiter's)."""
+    if not call_id:
+        try:
+            response = await supabase.rpc("get_latest_call", {"auth_uid": user_id}).execute()
+        except Exception as e:
+            return _failed("fetching latest call", e)
+        if not response.data:
+            return NO_CALLS
+        call_id = response.data[0]["call_id"]
+
+    try:
+        update_response = await supabase.table("call").update({"transcription": transcript}).eq("id", call_id).execute()
+    except Exception as e:
+        return _failed("updating call transcription", e)
+    if not update_response.data:
+        return UPDATE_FAILED
+
+    # Outside the try: a full limiter rejects the request with its own 503
+    async with slot():
+        try:
+            insights = await agenerateInsights(compact_for("call_insight", transcript), mode)
+        except Exception as e:
+            return _failed("processing text with agent", e)
+    try:
+        row, errors = _insight_row(call_id, insights)
+        if row is None:
+            return _no_insights(errors)
+        if not (await supabase.table("insight").insert(row).execute()).data:
+            return INSERT_FAILED
+    except Exception as e:
+        return _failed("processing text with agent", e)
+    return _created(row, errors)
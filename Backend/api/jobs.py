@@ -0,0 +1,272 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+DEAD = "dead"  # failed permanently or ran out of retries
+
+
+class JobError(Exception):
+    """Raised by a job handler to fail the current attempt.
+
+    Args:
+        message (str): Error stored on the job.
+        retryable (bool): False sends the job to the dead-letter list without retrying.
+    """
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class JobQueue:
+    """Background job queue with its state persisted in a local SQLite file.
+
+    Jobs survive restarts: a job is claimed with a lease, and a job whose
+    lease expired (the process died while running it) is picked up again,
+    unless that was its last attempt. Failed attempts are retried with
+    exponential backoff; after the last attempt the job is moved to the
+    dead-letter list. Every claim gets a token, so a worker that lost its lease
+    can no longer update the job.
+
+    Args:
+        db_path (str): SQLite file holding the jobs table.
+        workers (int): Number of worker threads started by start().
+        max_attempts (int): Attempts before a job is dead-lettered.
+        retry_delay (float): Base delay in seconds, doubled on every retry.
+        lease_seconds (float): How long a running job is owned by a worker without
+            reporting progress.
+        poll_interval (float): Seconds an idle worker waits before polling again.
+    """
+
+    def __init__(self, db_path, workers=2, max_attempts=3, retry_delay=10, lease_seconds=600, poll_interval=1.0):
+        self.db_path = db_path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.handlers = {}
+        self._local = threading.local()
+        self._threads = []
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                progress TEXT,
+                claim TEXT,
+                run_after REAL NOT NULL,
+                lease_expires REAL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_run_after ON jobs (status, run_after)")
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        if "progress" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN progress TEXT")
+        if "claim" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN claim TEXT")
+
+    def _conn(self):
+        # One connection per thread; autocommit so transactions are explicit
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def register(self, kind, handler):
+        """Register the function that runs jobs of a kind. It receives the payload dict
+        and returns a JSON-serializable result, or raises JobError."""
+        self.handlers[kind] = handler
+
+    def submit(self, kind, payload):
+        """Queue a job and return its id."""
+        if kind not in self.handlers:
+            raise ValueError(f"No handler registered for job kind: {kind}")
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._conn().execute(
+            "INSERT INTO jobs (id, kind, payload, status, run_after, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job_id, kind, json.dumps(payload), QUEUED, now, now, now),
+        )
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id, include_payload=False):
+        """Return the public view of a job, or None if it does not exist."""
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row, include_payload) if row else None
+
+    def dead_letters(self, kind=None, limit=50):
+        """Return the most recent dead-lettered jobs, including their payload."""
+        query = "SELECT * FROM jobs WHERE status = ?"
+        params = [DEAD]
+        if kind:
+            query += " AND kind = ?"
+            params.append(kind)
+        query += " ORDER BY updated_at DESC LIMIT ?"
+        params.append(limit)
+        return [self._to_dict(row, include_payload=True) for row in self._conn().execute(query, params)]
+
+    def requeue(self, job_id):
+        """Move a dead-lettered job back to the queue with a fresh attempt budget."""
+        now = time.time()
+        cursor = self._conn().execute(
+            "UPDATE jobs SET status = ?, attempts = 0, error = NULL, run_after = ?, updated_at = ? WHERE id = ? AND status = ?",
+            (QUEUED, now, now, job_id, DEAD),
+        )
+        self._wakeup.set()
+        return cursor.rowcount > 0
+
+    def report_progress(self, progress):
+        """Store a JSON-serializable progress snapshot on the job running in this thread
+        and renew its lease, so a job that keeps reporting progress is not reclaimed by
+        another worker however long it runs."""
+        job_id = getattr(self._local, "job_id", None)
+        if job_id is None:
+            return
+        now = time.time()
+        self._conn().execute(
+            "UPDATE jobs SET progress = ?, lease_expires = ?, updated_at = ? WHERE id = ? AND status = ? AND claim = ?",
+            (json.dumps(progress), now + self.lease_seconds, now, job_id, RUNNING, getattr(self._local, "claim", None)),
+        )
+
+    def counts(self):
+        rows = self._conn().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")
+        return {row["status"]: row["n"] for row in rows}
+
+    def start(self):
+        """Start the worker threads (no-op if already started or workers is 0). Safe to call
+        from several threads at once."""
+        if self._threads:
+            return
+        with self._start_lock:
+            if self._threads:
+                return
+            self._stop.clear()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _claim(self):
+        """Atomically take the next runnable job: queued and due, or running with an expired lease.
+        Returns the job row after the claim (attempts includes this attempt)."""
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # The worker died (OOM, crash) on the last attempt: dead-letter instead of running it again
+            conn.execute(
+                """UPDATE jobs SET status = ?, error = ?, claim = NULL, lease_expires = NULL, updated_at = ?
+                   WHERE status = ? AND lease_expires <= ? AND attempts >= ?""",
+                (DEAD, "Lease expired on the last attempt, the worker stopped while running the job",
+                 now, RUNNING, now, self.max_attempts),
+            )
+            row = conn.execute(
+                """SELECT * FROM jobs
+                   WHERE (status = ? AND run_after <= ?) OR (status = ? AND lease_expires <= ?)
+                   ORDER BY run_after LIMIT 1""",
+                (QUEUED, now, RUNNING, now),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, claim = ?, lease_expires = ?, updated_at = ? WHERE id = ?",
+                    (RUNNING, uuid.uuid4().hex, now + self.lease_seconds, now, row["id"]),
+                )
+                row = conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return row
+
+    def _finish(self, row, status, result=None, error=None, run_after=None):
+        """Store the outcome of an attempt, unless the lease was lost and the job reclaimed meanwhile."""
+        now = time.time()
+        self._conn().execute(
+            """UPDATE jobs SET status = ?, result = ?, error = ?, run_after = COALESCE(?, run_after), claim = NULL,
+               lease_expires = NULL, updated_at = ? WHERE id = ? AND status = ? AND claim = ?""",
+            (status, json.dumps(result) if result is not None else None, error, run_after, now,
+             row["id"], RUNNING, row["claim"]),
+        )
+
+    def run_one(self):
+        """Claim and run a single job. Returns False when nothing was runnable."""
+        row = self._claim()
+        if row is None:
+            return False
+
+        attempts = row["attempts"]
+        self._local.job_id = row["id"]
+        self._local.claim = row["claim"]
+        try:
+            handler = self.handlers.get(row["kind"])
+            if handler is None:
+                raise JobError(f"No handler registered for job kind: {row['kind']}", retryable=False)
+            result = handler(json.loads(row["payload"]))
+            self._finish(row, SUCCEEDED, result=result)
+        except Exception as e:
+            retryable = getattr(e, "retryable", True)
+            if retryable and attempts < self.max_attempts:
+                delay = self.retry_delay * (2 ** (attempts - 1))
+                self._finish(row, QUEUED, error=str(e), run_after=time.time() + delay)
+            else:
+                self._finish(row, DEAD, error=str(e))
+        finally:
+            self._local.job_id = None
+            self._local.claim = None
+        return True
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                if self.run_one():
+                    continue
+            except Exception as e:
+                print(f"Job worker error: {e}")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    @staticmethod
+    def _to_dict(row, include_payload=False):
+        job = {
+            "job_id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "progress": json.loads(row["progress"]) if row["progress"] else None,
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+        if include_payload:
+            job["payload"] = json.loads(row["payload"])
+        return job
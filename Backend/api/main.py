@@ -1,28 +1,77 @@
 import os
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, Response, stream_with_context
 from flask_cors import CORS
 from supabase import create_client, Client
 from dotenv import load_dotenv
 from functools import wraps
-import pymupdf
-import tempfile
-from agent import runReportAgent, runNotetakingAgent, runEmailAgent
+from jobs import JobQueue, JobError
+from transcripts import estimate_tokens, truncate_to_tokens, compact_for
+from vector_index import VectorIndex
+from pdf_extract import PdfExtractor, PdfError
+from connections import use_pooled_clients, supabase_pool, supabase_auth_pool, openai_pool, openai_http_client, pool_stats
+from cache import TTLCache, RefreshAheadCache, PdfTextCache, MISSING
+from identity import identity_cache, lookup_identity, cache_identity, invalidate_identity
+from insights import generate_call_insight
+from responses import init_responses, etag_variants
+from metrics import registry, instrument_flask, instrument_supabase_pool, supabase_operation, cache_collector, pool_collector, observe_llm_run, operator_authorized, CONTENT_TYPE as METRICS_CONTENT_TYPE
+import profiling
+from profiling import profiler, PROFILE_HEADER
+from agent import runEmailAgent, generateInsights, INSIGHT_MODES, agentCache, iterInsightAgents, streamEmailAgent
 import jwt
 import json
+import re
+import csv
+import io
+import base64
+import hashlib
+import multiprocessing
+import threading
+import time
 import openai
+from urllib.parse import urlencode
 
 
 load_dotenv()
 app = Flask(__name__)
-CORS(app)  # Allow all origins (for development)
+CORS(app, expose_headers=["X-Next-Cursor", "Link", "ETag", "X-Profile-Id"])  # Allow all origins (for development)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # Limit upload size to 16MB
 
+# Route latency histograms for /metrics; registered first so its after_request runs last
+instrument_flask(app)
+# Opt-in request profiling (signed X-Profile header or admin sample rate), see profiling.py
+profiling.instrument_flask(app, profiler)
+
+# orjson for JSON bodies and gzip/brotli for responses above RESPONSE_COMPRESSION_MIN_BYTES
+response_compressor = init_responses(
+    app,
+    compression=os.environ.get("RESPONSE_COMPRESSION", "true").lower() in ("1", "true", "yes"),
+    min_size=int(os.environ.get("RESPONSE_COMPRESSION_MIN_BYTES", "1024")),
+    gzip_level=int(os.environ.get("RESPONSE_GZIP_LEVEL", "4")),
+    brotli_quality=int(os.environ.get("RESPONSE_BROTLI_QUALITY", "4")),
+)
+
 url: str = os.environ.get("SUPABASE_URL")
 key: str = os.environ.get("SUPABASE_KEY")
 SUPABASE_JWT_SECRET =  os.environ.get("SUPABASE_JWT_SECRET")
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
 supabase: Client = create_client(url, key)
+# Shared keep-alive pools (HTTP/2) for PostgREST, auth and OpenAI, see connections.py
+use_pooled_clients(supabase, supabase_pool, supabase_auth_pool)
+instrument_supabase_pool(supabase_pool)
+instrument_supabase_pool(supabase_auth_pool)
+profiling.instrument_pool(supabase_pool, profiler, lambda r: "supabase {1} {0}".format(*supabase_operation(r)))
+profiling.instrument_pool(supabase_auth_pool, profiler, lambda r: "supabase {1} {0}".format(*supabase_operation(r)))
+profiling.instrument_pool(openai_pool, profiler, lambda r: f"openai {r.method} {r.url.path}")
+openai.http_client = openai_http_client
+
+# Background workers for insight jobs; state lives in a local SQLite file so jobs survive restarts
+insight_jobs = JobQueue(
+    db_path=os.environ.get("INSIGHT_JOB_DB", "insight_jobs.db"),
+    workers=int(os.environ.get("INSIGHT_JOB_WORKERS", "2")),
+    max_attempts=int(os.environ.get("INSIGHT_JOB_MAX_ATTEMPTS", "3")),
+    retry_delay=float(os.environ.get("INSIGHT_JOB_RETRY_DELAY", "10")),
+)
 
 
 # FUNCION para requerir JWT 
@@ -45,12 +94,222 @@ Ejemplo de uso:
 """
 
 #funcion para generar embeddings
+EMBEDDING_MODEL = "text-embedding-3-small"
+# Limits of the embeddings API: inputs per request, tokens per input and tokens per request
+EMBEDDING_MAX_INPUTS = 2048
+EMBEDDING_MAX_INPUT_TOKENS = 8191
+EMBEDDING_MAX_REQUEST_TOKENS = 300000
+
 def generate_embedding(text):
-    response = openai.embeddings.create(
-        model="text-embedding-3-small",  
-        input=text
-    )
-    return response.data[0].embedding
+    return generate_embeddings([text])[0]
+
+def generate_embeddings(texts):
+    """Embed several texts in one request, returning the embeddings in input order."""
+    start = time.perf_counter()
+    try:
+        response = openai.embeddings.create(
+            model=EMBEDDING_MODEL,
+            input=[truncate_to_tokens(text, EMBEDDING_MAX_INPUT_TOKENS) for text in texts]
+        )
+    except Exception:
+        observe_llm_run("embeddings", EMBEDDING_MODEL, time.perf_counter() - start, outcome="error")
+        raise
+    observe_llm_run("embeddings", EMBEDDING_MODEL, time.perf_counter() - start, {"input_tokens": [response.usage.prompt_tokens]})
+    return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+def embedding_batches(items, max_inputs=EMBEDDING_MAX_INPUTS, max_tokens=EMBEDDING_MAX_REQUEST_TOKENS):
+    """Group (key, text) pairs into batches that fit in one embeddings request."""
+    batch, batch_tokens = [], 0
+    for key, text in items:
+        tokens = min(estimate_tokens(text), EMBEDDING_MAX_INPUT_TOKENS)
+        if batch and (len(batch) >= max_inputs or batch_tokens + tokens > max_tokens):
+            yield batch
+            batch, batch_tokens = [], 0
+        batch.append((key, text))
+        batch_tokens += tokens
+    if batch:
+        yield batch
+
+# In-memory semantic search index over transcript_embeddings, loaded per project
+def load_project_embeddings(project_id, page_size=1000):
+    rows, start = [], 0
+    while True:
+        page = supabase.table("transcript_embeddings").select("call_id,embedding").eq("project_id", project_id).order("id").range(start, start + page_size - 1).execute().data
+        rows.extend((row["call_id"], row["embedding"]) for row in page)
+        if len(page) < page_size:
+            return rows
+        start += page_size
+
+def count_project_embeddings(project_id):
+    return supabase.table("transcript_embeddings").select("id", count="exact", head=True).eq("project_id", project_id).execute().count
+
+vector_index = VectorIndex(
+    loader=load_project_embeddings,
+    max_bytes=int(os.environ.get("VECTOR_INDEX_MAX_MB", "1024")) * 1024 * 1024,
+    coarse_dims=int(os.environ.get("VECTOR_INDEX_COARSE_DIMS", "256")),
+    use_ann=os.environ.get("VECTOR_INDEX_ANN", "false").lower() == "true",
+    # Embeddings written by other processes are picked up after at most this many seconds
+    ttl=float(os.environ.get("VECTOR_INDEX_TTL", "60")),
+    counter=count_project_embeddings,
+)
+
+# PostgREST filters travel in the URL, so long in_() lists are split into several queries
+IN_QUERY_CHUNK = 200
+
+def fetch_in(table, columns, column, values, order=None, desc=False, **filters):
+    """Fetch the rows of `table` whose `column` is in `values`, with optional extra eq filters.
+    With `order`, rows are sorted by that column (within each chunk of values)."""
+    values = list(dict.fromkeys(values))
+    rows = []
+    for i in range(0, len(values), IN_QUERY_CHUNK):
+        query = supabase.table(table).select(columns).in_(column, values[i:i + IN_QUERY_CHUNK])
+        for name, value in filters.items():
+            query = query.eq(name, value)
+        if order:
+            query = query.order(order, desc=desc)
+        rows.extend(query.execute().data)
+    return rows
+
+def fetch_all(table, columns, page_size=1000, **filters):
+    """Fetch every row of `table` matching the eq filters, one page of page_size rows at a time."""
+    rows, start = [], 0
+    while True:
+        query = supabase.table(table).select(columns)
+        for name, value in filters.items():
+            query = query.eq(name, value)
+        page = query.order("id").range(start, start + page_size - 1).execute().data
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        start += page_size
+
+FIELD_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+def select_columns(fields, required=("id",)):
+    """
+    Build a select() column list from a comma separated `fields` parameter.
+    The `required` columns are always included. Returns "*" when fields is empty
+    and raises ValueError on anything that is not a plain column name.
+    """
+    if not fields:
+        return "*"
+    columns = [field.strip() for field in fields.split(",") if field.strip()]
+    invalid = [column for column in columns if not FIELD_NAME.match(column)]
+    if invalid:
+        raise ValueError(f"Invalid fields: {', '.join(invalid)}")
+    return ",".join(dict.fromkeys([*required, *columns]))
+
+# Cursor (keyset) pagination for list endpoints: rows are ordered by id and the
+# cursor is the last id of the previous page, so pages stay stable under inserts.
+# Opt-in: a request without limit or cursor gets every row, as before pagination existed.
+PAGE_SIZE_DEFAULT = int(os.environ.get("PAGE_SIZE_DEFAULT", "100"))
+PAGE_SIZE_MAX = int(os.environ.get("PAGE_SIZE_MAX", "500"))
+
+def encode_cursor(last_id):
+    return base64.urlsafe_b64encode(json.dumps(last_id).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def paginate(query, desc=False):
+    """
+    Run a select with the `limit` and `cursor` query parameters applied. A request with
+    neither gets all rows; a cursor without limit gets PAGE_SIZE_DEFAULT rows.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    Raises ValueError on an invalid limit or cursor.
+    """
+    if "limit" not in request.args and "cursor" not in request.args:
+        return query.order("id", desc=desc).execute().data, None
+
+    try:
+        limit = int(request.args.get("limit", PAGE_SIZE_DEFAULT))
+    except ValueError:
+        raise ValueError(f"limit must be an integer between 1 and {PAGE_SIZE_MAX}") from None
+    if not 1 <= limit <= PAGE_SIZE_MAX:
+        raise ValueError(f"limit must be between 1 and {PAGE_SIZE_MAX}")
+    cursor = request.args.get("cursor")
+    if cursor:
+        last_id = decode_cursor(cursor)
+        query = query.lt("id", last_id) if desc else query.gt("id", last_id)
+
+    # One extra row tells whether there is a next page
+    rows = query.order("id", desc=desc).limit(limit + 1).execute().data
+    if len(rows) > limit:
+        return rows[:limit], encode_cursor(rows[limit - 1]["id"])
+    return rows, None
+
+def paginated_response(rows, next_cursor):
+    """JSON array of the page; the next page is announced in X-Next-Cursor and Link headers."""
+    response = jsonify(rows)
+    if next_cursor:
+        args = {**request.args.to_dict(), "cursor": next_cursor}
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return response, 200
+
+# Conditional GET. Responses carry a strong ETag (sha256 of the body) and a request with a
+# matching If-None-Match gets a 304. Mutating endpoints bump a per-organization version;
+# while it is unchanged a repeated poll is answered with 304 without running the handler
+# (and its queries). Versions are per process, so that shortcut is only trusted for
+# ETAG_FAST_PATH_TTL seconds; after that the handler runs and the content hash decides.
+ETAG_FAST_PATH_TTL = float(os.environ.get("ETAG_FAST_PATH_TTL", "30"))
+tenant_versions = {}
+tenant_versions_lock = threading.Lock()
+etag_index = TTLCache(maxsize=int(os.environ.get("ETAG_INDEX_SIZE", "10000")), ttl=ETAG_FAST_PATH_TTL)
+
+def bump_version(org_id):
+    """Mark the data of an organization as changed (call from every write path)."""
+    if org_id is None:
+        return
+    with tenant_versions_lock:
+        tenant_versions[org_id] = tenant_versions.get(org_id, 0) + 1
+
+def matching_etag(etag):
+    """The entity tag in If-None-Match that matches etag or one of its compressed variants."""
+    for variant in etag_variants(etag):
+        if request.if_none_match.contains(variant):
+            return variant
+    return None
+
+def not_modified(etag):
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
+
+def conditional_get(f):
+    """ETag / If-None-Match support. Goes after the auth decorators so request.org_id is set;
+    without an org_id only the content-hash check is done."""
+    @wraps(f)
+    @profiler.traced("conditional_get")
+    def decorated_function(*args, **kwargs):
+        org_id = getattr(request, "org_id", None)
+        version = tenant_versions.get(org_id, 0)
+        # The same URL can return different data for different bodies (user_id, call_id)
+        key = (request.path, request.query_string, hashlib.sha256(request.get_data()).hexdigest(), org_id)
+
+        if org_id is not None and request.if_none_match:
+            indexed = etag_index.get(key)
+            if indexed is not MISSING and indexed[0] == version:
+                matched = matching_etag(indexed[1])
+                if matched:
+                    return not_modified(matched)
+
+        response = app.make_response(f(*args, **kwargs))
+        if response.status_code != 200:
+            return response
+
+        etag = hashlib.sha256(response.get_data()).hexdigest()
+        if org_id is not None:
+            etag_index.set(key, (version, etag))
+        matched = matching_etag(etag)
+        if matched:
+            return not_modified(matched)
+        response.set_etag(etag)
+        return response
+    return decorated_function
 
 def require_jwt(f):
     @wraps(f)
@@ -75,6 +334,13 @@ def require_jwt(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def request_user_id():
+    """user_id of the caller, from the JSON body or, for multipart uploads, from the form fields."""
+    if request.mimetype == "multipart/form-data":
+        return request.form.get("user_id")
+    data = request.get_json(silent=True)
+    return data.get("user_id") if isinstance(data, dict) else None
+
 def require_user(role=None):
     """Base decorator for user authentication and role checking.
     Args:
@@ -82,26 +348,25 @@ def require_user(role=None):
     """
     def decorator(f):
         @wraps(f)
+        @profiler.traced("require_user")
         def decorated_function(*args, **kwargs):
-            data = request.get_json()
-            if not data or 'user_id' not in data:
+            user_id = request_user_id()
+            if not user_id:
                 return {"error": "user_id is required"}, 400
 
-            user_id = data.get("user_id")
             try:
-                # Select fields based on whether we need to check role
-                fields = ["organization_id", "emp_role"] if role else ["organization_id"]
-                role_response = supabase.table("employee").select(",".join(fields)).eq("auth_user_id", user_id).execute()
+                identity = lookup_identity(supabase, user_id)
                 
-                if not role_response.data:
+                if not identity:
                     return {"error": "User not found"}, 404
+                org_id, emp_role = identity
                 
                 # Check role if specified
-                if role and role_response.data[0]["emp_role"] != role:
+                if role and emp_role != role:
                     return {"error": "User is not authorized"}, 403
                 
                 # Add organization_id to the request context
-                request.org_id = role_response.data[0]["organization_id"]
+                request.org_id = org_id
                 return f(*args, **kwargs)
             except Exception as e:
                 return {"error": str(e)}, 500
@@ -121,18 +386,33 @@ def require_auth(f):
 def require_leader(f):
     return require_user(role="leader")(f)
 
+def load_org_status(org_id):
+    """is_active flag of an organization, or None if it does not exist."""
+    org_response = supabase.table("organization").select("is_active").eq("id", org_id).execute()
+    return org_response.data[0]["is_active"] if org_response.data else None
+
+# org_id -> is_active. Entries are refreshed in the background before they expire and are
+# invalidated by update_organization / deactivate_organization; other workers see a
+# deactivation after at most ORG_STATUS_CACHE_TTL seconds.
+org_status_cache = RefreshAheadCache(
+    loader=load_org_status,
+    ttl=float(os.environ.get("ORG_STATUS_CACHE_TTL", "300")),
+    refresh_after=float(os.environ.get("ORG_STATUS_CACHE_REFRESH", "240")),
+)
+
 # Decorator for checking if organization is active
 def require_active_org(f):
     @wraps(f)
+    @profiler.traced("require_active_org")
     def decorated_function(*args, **kwargs):
         try:
             # Get org_id from request context (set by require_user decorators)
             org_id = request.org_id
-            org_response = supabase.table("organization").select("is_active").eq("id", org_id).execute()
+            is_active = org_status_cache.get(org_id)
             
-            if not org_response.data:
+            if is_active is None:
                 return {"error": "Organization not found"}, 404
-            if not org_response.data[0]["is_active"]:
+            if not is_active:
                 return {"error": "Organization is not active"}, 403
                 
             return f(*args, **kwargs)
@@ -140,6 +420,71 @@ def require_active_org(f):
             return {"error": str(e)}, 500
     return decorated_function
 
+def require_user_active_org(role=None):
+    """Fused require_user + require_active_org.
+    On a cache miss the employee role and the organization's is_active flag come from
+    one joined select instead of two round trips. Same 400/403/404 responses as the
+    stacked decorators, and it fills both caches.
+    Args:
+        role (str, optional): Required role ('admin' or 'employee' or leader). If None, any role is accepted.
+    """
+    def decorator(f):
+        @wraps(f)
+        @profiler.traced("require_user_active_org")
+        def decorated_function(*args, **kwargs):
+            user_id = request_user_id()
+            if not user_id:
+                return {"error": "user_id is required"}, 400
+
+            try:
+                identity = identity_cache.get(user_id)
+                is_active = MISSING
+                if identity is MISSING:
+                    # Taken before the query: a deactivation that lands meanwhile must win over the stale flag
+                    org_status_since = org_status_cache.snapshot()
+                    response = supabase.table("employee").select("organization_id,emp_role,organization(is_active)").eq("auth_user_id", user_id).execute()
+                    if response.data:
+                        row = response.data[0]
+                        identity = (row["organization_id"], row["emp_role"])
+                        is_active = row["organization"]["is_active"] if row.get("organization") else None
+                        cache_identity(user_id, identity)
+                        if not org_status_cache.set(identity[0], is_active, since=org_status_since):
+                            is_active = MISSING  # invalidated meanwhile, reload it below
+                    else:
+                        identity = cache_identity(user_id, None)
+
+                if not identity:
+                    return {"error": "User not found"}, 404
+                org_id, emp_role = identity
+
+                # Check role if specified
+                if role and emp_role != role:
+                    return {"error": "User is not authorized"}, 403
+
+                if is_active is MISSING:
+                    is_active = org_status_cache.get(org_id)
+                if is_active is None:
+                    return {"error": "Organization not found"}, 404
+                if not is_active:
+                    return {"error": "Organization is not active"}, 403
+
+                # Add organization_id to the request context
+                request.org_id = org_id
+                return f(*args, **kwargs)
+            except Exception as e:
+                return {"error": str(e)}, 500
+        return decorated_function
+    return decorator
+
+def require_active_admin(f):
+    return require_user_active_org(role="admin")(f)
+
+def require_active_employee(f):
+    return require_user_active_org(role="employee")(f)
+
+def require_active_auth(f):
+    return require_user_active_org()(f)
+
 @app.route("/", methods=["GET"])
 def index():
     """
@@ -153,6 +498,188 @@ def index():
     """
     return jsonify({"message": "Welcome to the Teamtrack API!"})
 
+def require_operator(f):
+    """Operator endpoints (stats and metrics): the caller sends "Authorization: Bearer <METRICS_TOKEN>"
+    or a signed X-Profile header for this method and path."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if operator_authorized(request.headers.get("Authorization")) or \
+                profiler.verify(request.headers.get(PROFILE_HEADER), request.method, request.path):
+            return f(*args, **kwargs)
+        return {"error": "Operator access required"}, 403
+    return decorated_function
+
+@app.route("/cache/stats", methods=["GET"])
+@require_operator
+def cache_stats():
+    """
+    Hit/miss counters of the in-process caches.
+    
+    Request Headers:
+        - Authorization: Bearer <METRICS_TOKEN> (or a signed X-Profile header)
+    
+    Returns:
+        - 200: JSON with the stats of each cache
+            {
+                "agent_results": {"hits": int, "misses": int, "hit_rate": float, "llm_calls_saved": int, ...},
+                "identity": {"hits": int, "misses": int, "hit_rate": float, ...},
+                "org_status": {"hits": int, "misses": int, "refreshes": int, ...},
+                "vector_index": {"projects": int, "vectors": int, "bytes": int, ...},
+                "compression": {"bytes_in": int, "bytes_out": int, "ratio": float, ...} or null,
+                "pdf_text": {"entries": int, "bytes": int, "hits": int, "parses_saved": int, ...}
+            }
+        - 403: Error if the caller is not an operator
+    """
+    return jsonify({
+        "agent_results": agentCache.stats(),
+        "identity": identity_cache.stats(),
+        "org_status": org_status_cache.stats(),
+        "vector_index": vector_index.stats(),
+        "compression": response_compressor.stats() if response_compressor else None,
+        "pdf_text": pdf_text_cache.stats(),
+    })
+
+@app.route("/connections/stats", methods=["GET"])
+@require_operator
+def connections_stats():
+    """
+    Connection pool metrics of the upstream HTTP clients.
+    
+    Request Headers:
+        - Authorization: Bearer <METRICS_TOKEN> (or a signed X-Profile header)
+    
+    Returns:
+        - 200: JSON with the stats of each pool (supabase, supabase_auth, openai)
+            {
+                "supabase": {"active": int or null, "idle": int or null, "requests": int, "connects": int,
+                             "tls_handshakes": int, "avg_wait_ms": float, "max_wait_ms": float, ...},
+                ...
+            }
+        - 403: Error if the caller is not an operator
+    """
+    return jsonify(pool_stats())
+
+registry.register_collector(cache_collector(lambda: {
+    "agent_results": agentCache,
+    "identity": identity_cache,
+    "org_status": org_status_cache,
+    "etag_index": etag_index,
+    "pdf_text": pdf_text_cache,
+}))
+registry.register_collector(pool_collector((supabase_pool, supabase_auth_pool, openai_pool)))
+
+@app.route("/metrics", methods=["GET"])
+@require_operator
+def metrics():
+    """
+    Metrics of this process in the Prometheus text format.
+    
+    Histograms: request latency per route, Supabase latency per table and operation,
+    LLM latency per agent. Counters: prompt/completion tokens per agent, agent cache
+    lookups, cache hits/misses and upstream connection pool usage.
+    
+    Request Headers:
+        - Authorization: Bearer <METRICS_TOKEN> (or a signed X-Profile header)
+    
+    Returns:
+        - 200: text/plain; version=0.0.4
+        - 403: Error if the caller is not an operator
+    """
+    return Response(registry.render(), content_type=METRICS_CONTENT_TYPE)
+
+def require_profiling_access(f):
+    """Operators send a signed X-Profile header for this method and path and see every
+    profile; otherwise the caller must be an active admin and only sees their organization.
+    request.org_id is None for operators."""
+    admin_view = require_active_admin(f)
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if profiler.verify(request.headers.get(PROFILE_HEADER), request.method, request.path):
+            request.org_id = None
+            return f(*args, **kwargs)
+        return admin_view(*args, **kwargs)
+    return decorated_function
+
+@app.route("/profiling/config", methods=["POST"])
+@require_profiling_access
+def configure_profiling():
+    """
+    Turn request sampling on or off for the caller's organization (every organization
+    for operators). Sampled requests are profiled and kept in the profile buffer.
+    
+    Request Body:
+        - user_id (str): ID of the authenticated admin
+        - sample_rate (float): Fraction of requests to profile, 0 to 1. 0 turns sampling off
+        - routes (list, optional): URL rules to sample, e.g. ["/employee/projects"]. Default: all
+        - duration (float, optional): Seconds until sampling turns itself off
+    
+    Returns:
+        - 200: JSON with the profiler settings {"header_enabled", "interval_ms", "active", "buffered", "rules", ...}
+        - 400: Error if sample_rate, routes or duration is invalid
+    """
+    data = request.get_json(silent=True) or {}
+    sample_rate = data.get("sample_rate")
+    routes = data.get("routes")
+    duration = data.get("duration")
+    if isinstance(sample_rate, bool) or not isinstance(sample_rate, (int, float)) or not 0 <= sample_rate <= 1:
+        return jsonify({"error": "sample_rate must be a number between 0 and 1"}), 400
+    if routes is not None and (not isinstance(routes, list) or not all(isinstance(route, str) for route in routes)):
+        return jsonify({"error": "routes must be a list of URL rules"}), 400
+    if duration is not None and (isinstance(duration, bool) or not isinstance(duration, (int, float)) or duration <= 0):
+        return jsonify({"error": "duration must be a positive number of seconds"}), 400
+
+    profiler.set_rule(request.org_id, sample_rate, routes, duration)
+    return jsonify(profiler.stats()), 200
+
+@app.route("/profiling/profiles", methods=["GET"])
+@require_profiling_access
+def list_profiles():
+    """
+    Profiled requests in the buffer, newest first.
+    
+    Request Body:
+        - user_id (str): ID of the authenticated admin
+    
+    Returns:
+        - 200: JSON list of [{"id", "method", "path", "route", "status", "trigger", "duration_ms", "samples", "spans", ...}]
+    """
+    return jsonify(profiler.list(request.org_id)), 200
+
+@app.route("/profiling/profiles/<profile_id>", methods=["GET"])
+@require_profiling_access
+def download_profile(profile_id):
+    """
+    Download one profile. Open speedscope files at https://www.speedscope.app, render
+    collapsed stacks with flamegraph.pl.
+    
+    Request Body:
+        - user_id (str): ID of the authenticated admin
+    
+    Query Parameters:
+        - format (str, optional): "speedscope" (default), "collapsed" or "spans"
+    
+    Returns:
+        - 200: speedscope JSON, collapsed stacks as text, or JSON {"profile": summary, "spans": [...]}
+          with each span's total and self time
+        - 400: Error if the format is unknown
+        - 404: Error if the profile is not in the buffer
+    """
+    profile = profiler.get(profile_id, request.org_id)
+    if profile is None:
+        return jsonify({"error": "Profile not found"}), 404
+
+    output = request.args.get("format", "speedscope")
+    if output == "speedscope":
+        response = jsonify(profile.speedscope())
+        response.headers["Content-Disposition"] = f"attachment; filename=profile-{profile.id}.speedscope.json"
+        return response
+    if output == "collapsed":
+        return Response(profile.collapsed(), mimetype="text/plain",
+                        headers={"Content-Disposition": f"attachment; filename=profile-{profile.id}.folded"})
+    if output == "spans":
+        return jsonify({"profile": profile.summary(), "spans": profile.span_report()}), 200
+    return jsonify({"error": "format must be speedscope, collapsed or spans"}), 400
+
 ## ADMIN ENDPOINTS
 @app.route("/organizations/create", methods=["POST"])
 def post_new_organization():
@@ -252,6 +779,7 @@ def post_new_organization():
             # Clean up the created organization and auth user if employee creation fails
             supabase.table("organization").delete().eq("id", org_id).execute()
             return jsonify({"error": "Error creating the employee"}), 500
+        invalidate_identity(user_id)
         
         # Return the created organization and employee details
         return jsonify({
@@ -266,8 +794,7 @@ def post_new_organization():
         return jsonify({"error": str(e)}), 500
 
 @app.route("/organization/update", methods=["POST"])
-@require_admin
-@require_active_org
+@require_active_admin
 def update_organization():
     """
     Update an existing organization.
@@ -304,6 +831,8 @@ def update_organization():
         # Check if the update was successful
         if not update_response.data:
             return {"error": "Error updating the organization"}, 500
+        org_status_cache.invalidate(request.org_id)
+        bump_version(request.org_id)
 
         # Return the updated organization details
         return jsonify(update_response.data[0]), 200
@@ -340,6 +869,8 @@ def deactivate_organization():
         # Check if the deactivation was successful
         if not deactivate_response.data:
             return {"error": "Error deactivating the organization"}, 500
+        org_status_cache.invalidate(org_id)
+        bump_version(org_id)
 
         # Return a success message
         return jsonify({"message": "Organization deactivated successfully"}), 200
@@ -349,42 +880,45 @@ def deactivate_organization():
         return {"error": str(e)}, 500
 
 @app.route("/organization/clients", methods=["GET"])
-@require_admin
-@require_active_org
+@require_active_admin
+@conditional_get
 def get_organization_clients():
     """
     Get all clients of a specific organization.
     
     Request Body:
         - user_id (str): ID of the authenticated user
+
+    Query Parameters:
+        - fields (str, optional): Comma separated columns to return (id is always included)
+        - limit (int, optional): Page size (max 500). Without limit or cursor all rows are returned
+        - cursor (str, optional): Value of X-Next-Cursor from the previous page
     
     Returns:
-        - 200: JSON array of client objects
+        - 200: JSON array of client objects, ordered by id
             [{client_object}, {client_object}, ...]
-        - 400: Error if required fields are missing
+          X-Next-Cursor / Link headers point to the next page, if any
+        - 400: Error if required fields are missing or pagination parameters are invalid
         - 403: Error if user is not authorized or organization is not active
         - []: Error if no clients are found
         - 500: Error if client retrieval fails
     """
     org_id = request.org_id
     try:
-        # Fetch the clients of the organization
-        client_response = supabase.table("client").select("*").eq("organization_id", org_id).execute()
-
-        # Validate the client response
-        if not client_response.data:
-            return jsonify([]), 200
+        # Fetch a page of the clients of the organization
+        query = supabase.table("client").select(select_columns(request.args.get("fields"))).eq("organization_id", org_id)
+        rows, next_cursor = paginate(query)
+        return paginated_response(rows, next_cursor)
 
-        # Return the list of clients
-        return jsonify(client_response.data), 200
+    except ValueError as e:
+        return {"error": str(e)}, 400
 
     except Exception as e:
         # Handle unexpected errors
         return {"error": str(e)}, 500
 
 @app.route("/employee/create", methods=["POST"])
-@require_admin
-@require_active_org
+@require_active_admin
 def create_employee():
     """
     Create a new employee.
@@ -429,6 +963,8 @@ def create_employee():
         # Check if the employee creation was successful
         if not emp_response.data:
             return jsonify({"error": "Error creating the employee"}), 500
+        invalidate_identity(emp_response.data[0].get("auth_user_id"))
+        bump_version(request.org_id)
 
         # Return the created employee details
         return jsonify(emp_response.data[0]), 201
@@ -437,6 +973,168 @@ def create_employee():
         # Handle unexpected errors during employee creation
         return jsonify({"error": str(e)}), 500
 
+EMPLOYEE_ROLES = ("admin", "employee", "leader")
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+BULK_IMPORT_MAX_ROWS = int(os.environ.get("BULK_IMPORT_MAX_ROWS", "5000"))
+BULK_IMPORT_BATCH_SIZE = int(os.environ.get("BULK_IMPORT_BATCH_SIZE", "500"))
+
+def iter_import_rows(upload):
+    """
+    Yield (row_number, record, error) for each data row of an uploaded CSV or JSON-lines file,
+    reading it line by line. record is None when the line can't be parsed.
+    """
+    stream = io.TextIOWrapper(upload.stream, encoding="utf-8-sig", newline="")
+    name = (upload.filename or "").lower()
+    if name.endswith((".jsonl", ".ndjson")) or upload.mimetype in ("application/x-ndjson", "application/jsonl"):
+        for row_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield row_number, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield row_number, None, "Each line must be a JSON object"
+                continue
+            yield row_number, record, None
+    else:
+        reader = csv.DictReader(stream)
+        for row_number, record in enumerate(reader, start=1):
+            if not any(isinstance(value, str) and value.strip() for value in record.values()):
+                continue  # blank line or a row of empty cells
+            yield row_number, record, None
+
+def validate_employee_record(record):
+    """Return (employee_fields, error) for one imported record."""
+    fields = {name: str(record.get(name) or "").strip() for name in ("first_name", "last_name", "email", "emp_role")}
+    missing = [name for name, value in fields.items() if not value]
+    if missing:
+        return None, f"Missing required fields: {', '.join(missing)}"
+    fields["email"] = fields["email"].lower()
+    if not EMAIL_PATTERN.match(fields["email"]):
+        return None, "Invalid email"
+    if fields["emp_role"] not in EMPLOYEE_ROLES:
+        return None, f"Invalid emp_role, expected one of {list(EMPLOYEE_ROLES)}"
+    return fields, None
+
+@app.route("/employee/import", methods=["POST"])
+@require_active_admin
+def import_employees():
+    """
+    Create many employees at once. Authentication and the organization check run once per import.
+    
+    Request Body (multipart/form-data):
+        - user_id (str): ID of the authenticated admin user
+        - file: CSV with a header row, or JSON lines (.jsonl / .ndjson), with
+          first_name, last_name, email and emp_role on every row
+    Or a JSON body:
+        - user_id (str): ID of the authenticated admin user
+        - employees (list): Objects with first_name, last_name, email and emp_role
+    
+    Rows whose email already belongs to an employee of the organization, or repeats an earlier
+    row, are skipped. Emails are compared case-insensitively.
+    Valid rows are inserted in batches of BULK_IMPORT_BATCH_SIZE.
+    
+    Returns:
+        - 200: JSON with a report for every row
+            {
+                "summary": {"total": int, "created": int, "skipped": int, "failed": int},
+                "results": [
+                    {"row": int, "email": str, "status": "created", "id": int},
+                    {"row": int, "email": str, "status": "skipped", "reason": str},
+                    {"row": int, "email": str, "status": "error", "error": str},
+                    ...
+                ]
+            }
+        - 400: Error if no file or employees list is provided
+        - 403: Error if user is not authorized or organization is not active
+        - 413: Error if there are more than BULK_IMPORT_MAX_ROWS rows
+        - 500: Error if the duplicate check fails
+    """
+    if request.mimetype == "multipart/form-data":
+        upload = request.files.get("file")
+        if upload is None:
+            return jsonify({"error": "No file provided in request"}), 400
+        rows = iter_import_rows(upload)
+    else:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({"error": "Request body must be a JSON object"}), 400
+        employees = data.get("employees")
+        if not isinstance(employees, list):
+            return jsonify({"error": "employees must be a list"}), 400
+        rows = ((row_number, record, None if isinstance(record, dict) else "Each employee must be an object")
+                for row_number, record in enumerate(employees, start=1))
+
+    results = {}
+    pending = {}  # email -> (row_number, fields)
+    try:
+        for row_number, record, error in rows:
+            if row_number > BULK_IMPORT_MAX_ROWS:
+                return jsonify({"error": f"Too many rows, the limit is {BULK_IMPORT_MAX_ROWS}"}), 413
+            fields = None
+            if error is None:
+                fields, error = validate_employee_record(record)
+            if fields:
+                email = fields["email"]
+            else:
+                email = str(record.get("email") or "").strip() if isinstance(record, dict) else ""
+            if error:
+                results[row_number] = {"row": row_number, "email": email, "status": "error", "error": error}
+            elif email in pending:
+                results[row_number] = {"row": row_number, "email": email, "status": "skipped",
+                                       "reason": f"Duplicate of row {pending[email][0]}"}
+            else:
+                pending[email] = (row_number, fields)
+    except (UnicodeDecodeError, csv.Error) as e:
+        return jsonify({"error": f"Could not read the file: {e}"}), 400
+
+    try:
+        # The organization's emails, lowercased like the imported ones: stored emails may have any case
+        existing = {row["email"].strip().lower() for row in fetch_all("employee", "id,email", organization_id=request.org_id) if row.get("email")}
+    except Exception as e:
+        return jsonify({"error": f"Error checking existing employees: {str(e)}"}), 500
+    for email in existing & pending.keys():
+        row_number, _ = pending.pop(email)
+        results[row_number] = {"row": row_number, "email": email, "status": "skipped", "reason": "Employee already exists"}
+
+    def record_created(row_number, created):
+        results[row_number] = {"row": row_number, "email": created["email"], "status": "created", "id": created.get("id")}
+        invalidate_identity(created.get("auth_user_id"))
+
+    to_insert = list(pending.values())
+    for i in range(0, len(to_insert), BULK_IMPORT_BATCH_SIZE):
+        batch = to_insert[i:i + BULK_IMPORT_BATCH_SIZE]
+        try:
+            response = supabase.table("employee").insert(
+                [{**fields, "organization_id": request.org_id} for _, fields in batch]
+            ).execute()
+            for (row_number, _), created in zip(batch, response.data):
+                record_created(row_number, created)
+        except Exception:
+            # The whole batch was rejected; retry its rows one by one so every row gets its own result
+            for row_number, fields in batch:
+                try:
+                    response = supabase.table("employee").insert({**fields, "organization_id": request.org_id}).execute()
+                    record_created(row_number, response.data[0])
+                except Exception as e:
+                    results[row_number] = {"row": row_number, "email": fields["email"], "status": "error", "error": str(e)}
+
+    report = [results[row_number] for row_number in sorted(results)]
+    created = sum(1 for result in report if result["status"] == "created")
+    if created:
+        bump_version(request.org_id)
+    return jsonify({
+        "summary": {
+            "total": len(report),
+            "created": created,
+            "skipped": sum(1 for result in report if result["status"] == "skipped"),
+            "failed": sum(1 for result in report if result["status"] == "error"),
+        },
+        "results": report,
+    })
+
 # ruta para probar el embedding.
 @app.route("/call/embedding/new", methods=["POST"])
 def create_call_embedding():
@@ -460,23 +1158,194 @@ def create_call_embedding():
             return jsonify({"message": "Embedding already exists"}), 200
 
         # Generar el embedding
-        embedding = generate_embedding(transcript)
+        embedding = generate_embedding(compact_for("embedding", transcript))
 
-        # Insertar el embedding
-        insert_response = supabase.table("transcript_embeddings").insert({
+        # Insertar el embedding (upsert on call_id: a concurrent request for the same call
+        # overwrites instead of hitting the unique constraint, see Backend/migrations)
+        insert_response = supabase.table("transcript_embeddings").upsert({
             "project_id": project_id,
             "call_id": call_id,
             "embedding": embedding
-        }).execute()
+        }, on_conflict="call_id").execute()
 
         if not insert_response.data:
             return jsonify({"error": "Error inserting embedding"}), 500
 
+        vector_index.add(project_id, call_id, embedding)
         return jsonify({"message": "Embedding created successfully"}), 201
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+EMBEDDING_BACKFILL_MAX_CALLS = int(os.environ.get("EMBEDDING_BACKFILL_MAX_CALLS", "10000"))
+
+def run_embedding_backfill_job(payload):
+    """
+    Job handler for "embedding_backfill" jobs: embeds the transcriptions of many calls.
+    Calls that already have an embedding are skipped, so running the job again with
+    the same call_ids resumes where a failed run stopped. Every batch reports progress,
+    which renews the job's lease.
+    """
+    org_id = payload["org_id"]
+    call_ids = payload["call_ids"]
+    batch_size = payload.get("batch_size") or EMBEDDING_MAX_INPUTS
+
+    # Set-based lookups: calls, the projects of the organization and existing embeddings
+    calls = fetch_in("call", "id,projectid,transcription", "id", call_ids)
+    org_projects = {row["id"] for row in fetch_in("project", "id", "id", [c["projectid"] for c in calls], organization_id=org_id)}
+    embedded = {row["call_id"] for row in fetch_in("transcript_embeddings", "call_id", "call_id", call_ids)}
+
+    found = {c["id"] for c in calls if c["projectid"] in org_projects}
+    pending = [c for c in calls if c["id"] in found and c["id"] not in embedded and c.get("transcription")]
+    project_by_call = {c["id"]: c["projectid"] for c in pending}
+
+    progress = {
+        "total": len(call_ids),
+        "not_found": [call_id for call_id in call_ids if call_id not in found],
+        "skipped_existing": len(embedded & found),
+        "skipped_no_transcript": len([c for c in calls if c["id"] in found and not c.get("transcription")]),
+        "embedded": 0,
+        "failed_call_ids": [],
+        "batches": [],
+    }
+    insight_jobs.report_progress(progress)
+
+    for batch in embedding_batches([(c["id"], compact_for("embedding", c["transcription"])) for c in pending], max_inputs=batch_size):
+        batch_ids = [call_id for call_id, _ in batch]
+        try:
+            embeddings = generate_embeddings([text for _, text in batch])
+            # Upsert on call_id (unique, see Backend/migrations): a retried or reclaimed batch overwrites instead of duplicating
+            insert_response = supabase.table("transcript_embeddings").upsert([
+                {"project_id": project_by_call[call_id], "call_id": call_id, "embedding": embedding}
+                for call_id, embedding in zip(batch_ids, embeddings)
+            ], on_conflict="call_id").execute()
+            if not insert_response.data:
+                raise RuntimeError("Error inserting embeddings")
+            for call_id, embedding in zip(batch_ids, embeddings):
+                vector_index.add(project_by_call[call_id], call_id, embedding)
+            progress["embedded"] += len(batch_ids)
+            progress["batches"].append({"size": len(batch_ids), "status": "ok"})
+        except Exception as e:
+            progress["failed_call_ids"].extend(batch_ids)
+            progress["batches"].append({"size": len(batch_ids), "status": "failed", "error": str(e)})
+        insight_jobs.report_progress(progress)
+
+    # Nothing went through: retry the whole job (already embedded calls are skipped on retry)
+    if pending and not progress["embedded"]:
+        raise JobError(progress["batches"][-1]["error"])
+    return progress
+
+insight_jobs.register("embedding_backfill", run_embedding_backfill_job)
+
+@app.route("/call/embedding/batch", methods=["POST"])
+@require_active_admin
+def create_call_embeddings_batch():
+    """
+    Queue the embedding of the transcriptions of many calls (backfill).
+    
+    Request Body:
+        - user_id (str): ID of the authenticated admin user
+        - call_ids (list[str]): IDs of the calls to embed
+        - batch_size (int, optional): Maximum transcripts per embeddings request
+    
+    Returns:
+        - 202: JSON with the job id; poll status_url for progress and the final report
+            {"job_id": "id", "status": "queued", "status_url": "/call/embedding/jobs/<job_id>"}
+          The job result lists embedded, skipped and failed calls. Submitting the
+          same call_ids again only embeds the ones still missing.
+        - 400: Error if call_ids is missing or too long
+        - 403: Error if user is not authorized or organization is not active
+        - 500: Error if the job could not be queued
+    """
+    data = request.get_json()
+    call_ids = data.get("call_ids")
+    batch_size = data.get("batch_size")
+
+    if not call_ids or not isinstance(call_ids, list):
+        return jsonify({"error": "call_ids must be a non-empty list"}), 400
+    if len(call_ids) > EMBEDDING_BACKFILL_MAX_CALLS:
+        return jsonify({"error": f"At most {EMBEDDING_BACKFILL_MAX_CALLS} call_ids per request"}), 400
+    if batch_size is not None and (not isinstance(batch_size, int) or not 1 <= batch_size <= EMBEDDING_MAX_INPUTS):
+        return jsonify({"error": f"batch_size must be between 1 and {EMBEDDING_MAX_INPUTS}"}), 400
+
+    try:
+        job_id = insight_jobs.submit("embedding_backfill", {
+            "org_id": request.org_id,
+            "call_ids": list(dict.fromkeys(call_ids)),
+            "batch_size": batch_size,
+        })
+    except Exception as e:
+        return jsonify({"error": f"Error queueing the embedding job: {str(e)}"}), 500
+
+    status_url = f"/call/embedding/jobs/{job_id}"
+    return jsonify({"job_id": job_id, "status": "queued", "status_url": status_url}), 202, {"Location": status_url}
+
+SEARCH_MAX_RESULTS = 50
+
+@app.route("/call/search", methods=["POST"])
+@require_active_auth
+def search_calls():
+    """
+    Semantic search over the call transcripts of a project or of the whole organization.
+    
+    Request Body:
+        - user_id (str): ID of the authenticated user
+        - query (str): Text to search for
+        - project_id (str, optional): Restrict the search to one project of the organization
+        - k (int, optional): Number of results (default 10, max 50)
+    
+    Returns:
+        - 200: JSON array of the most similar calls, best first
+            [{"call_id": "id", "project_id": "id", "score": float}, ...]
+        - 400: Error if query is missing or k is invalid
+        - 403: Error if user is not authorized or organization is not active
+        - 404: Error if the project is not found in the organization
+        - 500: Error if the search fails
+    """
+    data = request.get_json()
+    query = data.get("query")
+    project_id = data.get("project_id")
+    k = data.get("k", 10)
+
+    if not query:
+        return jsonify({"error": "query is required"}), 400
+    if not isinstance(k, int) or not 1 <= k <= SEARCH_MAX_RESULTS:
+        return jsonify({"error": f"k must be between 1 and {SEARCH_MAX_RESULTS}"}), 400
+
+    try:
+        # Only search projects that belong to the user's organization
+        projects = supabase.table("project").select("id").eq("organization_id", request.org_id)
+        if project_id:
+            projects = projects.eq("id", project_id)
+        project_ids = [row["id"] for row in projects.execute().data]
+        if project_id and not project_ids:
+            return jsonify({"error": "Project not found"}), 404
+
+        results = vector_index.search(project_ids, generate_embedding(query), k)
+        return jsonify(results), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/call/embedding/jobs/<job_id>", methods=["GET"])
+@require_active_auth
+def get_call_embedding_job(job_id):
+    """
+    Get the status, progress and result of an embedding backfill job of the user's organization.
+    
+    Request Body:
+        - user_id (str): ID of the authenticated user
+    
+    Returns:
+        - 200: JSON with the job (see /call/insight/jobs/<job_id>), including "progress"
+        - 403: Error if user is not authorized or organization is not active
+        - 404: Error if the job does not exist in the organization
+    """
+    job = get_org_job(job_id, "embedding_backfill")
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job), 200
+
 
 
 
@@ -484,8 +1353,7 @@ def create_call_embedding():
 
 
 @app.route("/project/create", methods=["POST"])
-@require_admin
-@require_active_org
+@require_active_admin
 def create_project():
     """
     Create a new project.
@@ -532,6 +1400,7 @@ def create_project():
         # Check if the project creation was successful
         if not project_response.data:
             return jsonify({"error": "Error creating the project"}), 500
+        bump_version(request.org_id)
 
         # Return the created project details
         return jsonify(project_response.data[0]), 201
@@ -541,8 +1410,7 @@ def create_project():
         return jsonify({"error": str(e)}), 500
 
 @app.route("/project/assign", methods=["POST"])
-@require_admin
-@require_active_org
+@require_active_admin
 def assign_employee():
     """
     Assign an employee to a project.
@@ -597,6 +1465,7 @@ def assign_employee():
         # Check if the assignment was successful
         if not assign_response.data:
             return jsonify({"error": "Error assigning the employee to the project"}), 500
+        bump_version(request.org_id)
 
         # Return a success message
         return jsonify({"message": "Employee assigned to project successfully"}), 200
@@ -608,45 +1477,170 @@ def assign_employee():
 
 
 
+BULK_ASSIGN_MAX_PAIRS = int(os.environ.get("BULK_ASSIGN_MAX_PAIRS", "5000"))
+
+@app.route("/project/assign/bulk", methods=["POST"])
+@require_active_admin
+def assign_employees_bulk():
+    """
+    Assign many employees to projects at once. Idempotent: pairs that are already
+    assigned are reported and left as they are, so a request can be safely retried.
+    Employees and projects must belong to the admin's organization.
+    
+    Request Body:
+        - user_id (str): ID of the authenticated admin user
+        - assignments (list, optional): Objects with employee_id and project_id
+        - project_id (str, optional) and employee_ids (list, optional): A whole team for one project
+    
+    Returns:
+        - 200: JSON with the result of every pair
+            {
+                "summary": {"requested": int, "assigned": int, "already_assigned": int, "failed": int},
+                "results": [
+                    {"employee_id": id, "project_id": id, "status": "assigned" | "already_assigned" | "error", "error": str},
+                    ...
+                ]
+            }
+        - 400: Error if no pairs are provided or they are malformed
+        - 403: Error if user is not authorized or organization is not active
+        - 413: Error if there are more than BULK_ASSIGN_MAX_PAIRS pairs
+        - 500: Error if a query fails
+    """
+    data = request.get_json()
+    if isinstance(data.get("assignments"), list):
+        items = data["assignments"]
+        if not all(isinstance(item, dict) and item.get("employee_id") is not None and item.get("project_id") is not None for item in items):
+            return jsonify({"error": "Every assignment needs employee_id and project_id"}), 400
+        pairs = [(item["employee_id"], item["project_id"]) for item in items]
+    elif data.get("project_id") is not None and isinstance(data.get("employee_ids"), list):
+        pairs = [(employee_id, data["project_id"]) for employee_id in data["employee_ids"]]
+    else:
+        return jsonify({"error": "Provide assignments, or project_id and employee_ids"}), 400
+
+    # Ids may come as numbers or strings, compare them as strings
+    pairs = list({(str(employee_id), str(project_id)): (employee_id, project_id) for employee_id, project_id in pairs}.items())
+    if not pairs:
+        return jsonify({"error": "No assignments provided"}), 400
+    if len(pairs) > BULK_ASSIGN_MAX_PAIRS:
+        return jsonify({"error": f"Too many assignments, the limit is {BULK_ASSIGN_MAX_PAIRS}"}), 413
+
+    employee_ids = list(dict.fromkeys(employee_id for (employee_id, _), _ in pairs))
+    project_ids = list(dict.fromkeys(project_id for (_, project_id), _ in pairs))
+
+    def existing_assignments():
+        # Query by the smaller side and keep only the requested pairs
+        if len(project_ids) <= len(employee_ids):
+            rows = fetch_in("project_employee", "employee_id,project_id", "project_id", project_ids)
+        else:
+            rows = fetch_in("project_employee", "employee_id,project_id", "employee_id", employee_ids)
+        return {(str(row["employee_id"]), str(row["project_id"])) for row in rows}
+
+    try:
+        employees = {str(row["id"]) for row in fetch_in("employee", "id", "id", employee_ids, organization_id=request.org_id)}
+        projects = {str(row["id"]) for row in fetch_in("project", "id", "id", project_ids, organization_id=request.org_id)}
+        assigned = existing_assignments()
+    except Exception as e:
+        return jsonify({"error": f"Error validating the assignments: {str(e)}"}), 500
+
+    results = {}
+    missing = []
+    for key, (employee_id, project_id) in pairs:
+        result = {"employee_id": employee_id, "project_id": project_id}
+        if key[0] not in employees:
+            results[key] = {**result, "status": "error", "error": "Employee not found"}
+        elif key[1] not in projects:
+            results[key] = {**result, "status": "error", "error": "Project not found"}
+        elif key in assigned:
+            results[key] = {**result, "status": "already_assigned"}
+        else:
+            missing.append(key)
+            results[key] = {**result, "status": "assigned"}
+
+    if missing:
+        try:
+            supabase.table("project_employee").insert(
+                [{"employee_id": results[key]["employee_id"], "project_id": results[key]["project_id"]} for key in missing]
+            ).execute()
+        except Exception as e:
+            # Another request may have assigned some of the pairs in the meantime: re-check and insert the rest once
+            try:
+                assigned = existing_assignments()
+                remaining = [key for key in missing if key not in assigned]
+                for key in missing:
+                    if key in assigned:
+                        results[key]["status"] = "already_assigned"
+                if remaining:
+                    supabase.table("project_employee").insert(
+                        [{"employee_id": results[key]["employee_id"], "project_id": results[key]["project_id"]} for key in remaining]
+                    ).execute()
+            except Exception:
+                for key in missing:
+                    if results[key]["status"] == "assigned":
+                        results[key] = {**results[key], "status": "error", "error": str(e)}
+        bump_version(request.org_id)
+
+    report = [results[key] for key, _ in pairs]
+    return jsonify({
+        "summary": {
+            "requested": len(report),
+            "assigned": sum(1 for result in report if result["status"] == "assigned"),
+            "already_assigned": sum(1 for result in report if result["status"] == "already_assigned"),
+            "failed": sum(1 for result in report if result["status"] == "error"),
+        },
+        "results": report,
+    })
+
 @app.route("/employee/projects", methods=["GET"])
+@conditional_get
 def get_employee_projects():
     """
     Get all projects assigned to an employee and the calls related to those projects.
+    Uses a constant number of queries (assignments, projects, calls) whatever the number of projects.
     
     Query Parameters:
         - user_id (str): ID of the authenticated employee
+        - project_fields (str, optional): Comma separated project columns to return (id is always included)
+        - call_fields (str, optional): Comma separated call columns to return (id and projectid are always included)
+        - calls_limit (int, optional): Only return the most recent calls of each project
     
     Returns:
         - 200: JSON array of project assignments
             [{project_assignment_object}, {project_assignment_object}, ...]
-        - 400: Error if required fields are missing
+        - 400: Error if required fields are missing or fields are invalid
         - 403: Error if user is not authorized or organization is not active
         - []: Error if no projects are found
         - 500: Error if project retrieval fails
     """
     user_id = request.args.get("user_id")
+    calls_limit = request.args.get("calls_limit", type=int)
+    try:
+        project_columns = select_columns(request.args.get("project_fields"))
+        call_columns = select_columns(request.args.get("call_fields"), required=("id", "projectid"))
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    if calls_limit is not None and calls_limit < 0:
+        return {"error": "calls_limit must be a positive number"}, 400
+
     try:
         # Fetch the projects assigned to the employee
-        project_response = supabase.table("project_employee").select("*").eq("employee_id", user_id).execute()
-
-        # Now fetch the project details
-        project_ids = [project["project_id"] for project in project_response.data]
-        projects = []
-        for project_id in project_ids:
-            project_details = supabase.table("project").select("*").eq("id", project_id).execute()
-            projects.append(project_details.data[0])
-        
-        # Fetch the calls related to the projects
-        for project in projects:
-            call_response = supabase.table("call").select("*").eq("projectid", project["id"]).execute()
-            project["calls"] = call_response.data
+        project_response = supabase.table("project_employee").select("project_id").eq("employee_id", user_id).execute()
+        project_ids = list(dict.fromkeys(project["project_id"] for project in project_response.data))
+        if not project_ids:
+            return jsonify([]), 200
 
+        # Now fetch the project details, keeping the assignment order
+        projects_by_id = {project["id"]: project for project in fetch_in("project", project_columns, "id", project_ids)}
+        projects = [projects_by_id[project_id] for project_id in project_ids if project_id in projects_by_id]
 
+        # Fetch the calls of all the projects at once and group them per project
+        calls = fetch_in("call", call_columns, "projectid", list(projects_by_id), order="datetime" if calls_limit is not None else None, desc=True)
+        calls_by_project = {project["id"]: [] for project in projects}
+        for call in calls:
+            calls_by_project[call["projectid"]].append(call)
+        for project in projects:
+            project_calls = calls_by_project[project["id"]]
+            project["calls"] = project_calls[:calls_limit] if calls_limit is not None else project_calls
         
-        # Validate the project response
-        if not projects:
-            return jsonify([]), 200
-
         # Return the list of projects
         return jsonify(projects), 200
 
@@ -655,42 +1649,44 @@ def get_employee_projects():
         return {"error": str(e)}, 500
 
 @app.route("/employee/clients", methods=["GET"])
-@require_employee
-@require_active_org
+@require_active_employee
 def get_employee_clients():
     """
     Get all clients related to the projects assigned to an employee.
     
     Request Body:
         - user_id (str): ID of the authenticated employee
+
+    Query Parameters:
+        - fields (str, optional): Comma separated columns to return (id is always included)
+        - limit (int, optional): Page size (max 500). Without limit or cursor all rows are returned
+        - cursor (str, optional): Value of X-Next-Cursor from the previous page
     
     Returns:
-        - 200: JSON array of client objects
+        - 200: JSON array of client objects, ordered by id
             [{client_object}, {client_object}, ...]
-        - 400: Error if required fields are missing
+          X-Next-Cursor / Link headers point to the next page, if any
+        - 400: Error if required fields are missing or pagination parameters are invalid
         - 403: Error if user is not authorized or organization is not active
         - []: Error if no clients are found
         - 500: Error if client retrieval fails
     """
-    user_id = request.get("user_id")
+    user_id = request.get_json().get("user_id")
     try:
-        # Fetch the clients related to the projects assigned to the employee
-        client_response = supabase.table("client").select("*").eq("auth_user_id", user_id).execute()
+        # Fetch a page of the clients related to the projects assigned to the employee
+        query = supabase.table("client").select(select_columns(request.args.get("fields"))).eq("auth_user_id", user_id)
+        rows, next_cursor = paginate(query)
+        return paginated_response(rows, next_cursor)
 
-        # Validate the client response
-        if not client_response.data:
-            return jsonify([]), 200
-
-        # Return the list of clients
-        return jsonify(client_response.data), 200
+    except ValueError as e:
+        return {"error": str(e)}, 400
 
     except Exception as e:
         # Handle unexpected errors
         return {"error": str(e)}, 500
 
 @app.route("/employee/calls/schedule", methods=["POST"])
-@require_employee
-@require_active_org
+@require_active_employee
 def schedule_call():
     """
     Schedule a call for a project assigned to an employee.
@@ -727,7 +1723,7 @@ def schedule_call():
         return jsonify({"error": "Project not found"}), 404
 
     # verify that the project is assigned to the employee
-    project_assignment_response = supabase.table("project_employee").select("id").eq("employee_id", request.user_id).eq("project_id", project_id).execute()
+    project_assignment_response = supabase.table("project_employee").select("id").eq("employee_id", request_user_id()).eq("project_id", project_id).execute()
     if not project_assignment_response.data:
         return jsonify({"error": "Project not assigned to this employee"}), 403
     
@@ -753,6 +1749,7 @@ def schedule_call():
         # Check if the scheduling was successful
         if not call_response.data:
             return jsonify({"error": "Error scheduling the call"}), 500
+        bump_version(request.org_id)
 
         # Return the scheduled call details
         return jsonify(call_response.data[0]), 201
@@ -764,42 +1761,45 @@ def schedule_call():
 
 
 @app.route("/employee/calls/recent", methods=["GET"])
-@require_employee
-@require_active_org
+@require_active_employee
 def get_employee_recent_calls():
     """
     Get all calls related to the projects assigned to an employee.
     
     Request Body:
         - user_id (str): ID of the authenticated employee
+
+    Query Parameters:
+        - fields (str, optional): Comma separated columns to return (id is always included)
+        - limit (int, optional): Page size (max 500). Without limit or cursor all rows are returned
+        - cursor (str, optional): Value of X-Next-Cursor from the previous page
     
     Returns:
-        - 200: JSON array of call objects
+        - 200: JSON array of call objects, newest id first
             [{call_object}, {call_object}, ...]
-        - 400: Error if required fields are missing
+          X-Next-Cursor / Link headers point to the next page, if any
+        - 400: Error if required fields are missing or pagination parameters are invalid
         - 403: Error if user is not authorized or organization is not active
         - []: Error if no calls are found
         - 500: Error if call retrieval fails
     """
     user_id = request.get_json().get("user_id")
     try:
-        # Fetch the calls related to the projects assigned to the employee
-        call_response = supabase.table("call").select("*").eq("employee_id", user_id).execute()
-
-        # Validate the call response
-        if not call_response.data:
-            return jsonify([]), 200
+        # Fetch a page of the calls related to the projects assigned to the employee
+        query = supabase.table("call").select(select_columns(request.args.get("fields"))).eq("employee_id", user_id)
+        rows, next_cursor = paginate(query, desc=True)
+        return paginated_response(rows, next_cursor)
 
-        # Return the list of calls
-        return jsonify(call_response.data), 200
+    except ValueError as e:
+        return {"error": str(e)}, 400
 
     except Exception as e:
         # Handle unexpected errors
         return {"error": str(e)}, 500
 
 @app.route("/project/call/insight", methods=["GET"])
-@require_employee
-@require_active_org
+@require_active_employee
+@conditional_get
 def get_call_insights():
     """
     Get insights for a specific call related to a project assigned to an employee.
@@ -807,11 +1807,17 @@ def get_call_insights():
     Request Body:
         - user_id (str): ID of the authenticated employee
         - call_id (str): ID of the call to get insights for
+
+    Query Parameters:
+        - fields (str, optional): Comma separated columns to return (id is always included)
+        - limit (int, optional): Page size (max 500). Without limit or cursor all rows are returned
+        - cursor (str, optional): Value of X-Next-Cursor from the previous page
     
     Returns:
-        - 200: JSON array of insight objects
+        - 200: JSON array of insight objects, ordered by id
             [{insight_object}, {insight_object}, ...]
-        - 400: Error if required fields are missing
+          X-Next-Cursor / Link headers point to the next page, if any
+        - 400: Error if required fields are missing or pagination parameters are invalid
         - 403: Error if user is not authorized or organization is not active
         - []: Error if no insights are found
         - 500: Error if insight retrieval fails
@@ -832,15 +1838,13 @@ def get_call_insights():
         return jsonify({"error": "Call not found"}), 404
 
     try:
-        # Fetch the insights for the specified call
-        insight_response = supabase.table("call_insights").select("*").eq("call_id", call_id).execute()
+        # Fetch a page of the insights for the specified call
+        query = supabase.table("call_insights").select(select_columns(request.args.get("fields"))).eq("call_id", call_id)
+        rows, next_cursor = paginate(query)
+        return paginated_response(rows, next_cursor)
 
-        # Validate the insight response
-        if not insight_response.data:
-            return jsonify([]), 200
-
-        # Return the list of insights
-        return jsonify(insight_response.data), 200
+    except ValueError as e:
+        return {"error": str(e)}, 400
 
     except Exception as e:
         # Handle unexpected errors
@@ -849,8 +1853,7 @@ def get_call_insights():
 
 # link a subclient to a client
 @app.route("/client/subclient/create", methods=["POST"])
-@require_auth
-@require_active_org
+@require_active_auth
 def create_subclient():
     """
     Create a new subclient for an existing client.
@@ -903,6 +1906,7 @@ def create_subclient():
         # Check if the subclient creation was successful
         if not subclient_response.data:
             return jsonify({"error": "Error creating the subclient"}), 500
+        bump_version(request.org_id)
 
         # Return the created subclient details
         return jsonify(subclient_response.data[0]), 201
@@ -912,8 +1916,7 @@ def create_subclient():
         return jsonify({"error": str(e)}), 500
 
 @app.route("/client/subclient/update", methods=["POST"])
-@require_auth
-@require_active_org
+@require_active_auth
 def update_subclient():
     """
     Update an existing subclient.
@@ -953,6 +1956,7 @@ def update_subclient():
         # Check if the update was successful
         if not update_response.data:
             return jsonify({"error": "Error updating the subclient"}), 500
+        bump_version(request.org_id)
 
         # Return the updated subclient details
         return jsonify(update_response.data[0]), 200
@@ -962,8 +1966,7 @@ def update_subclient():
         return jsonify({"error": str(e)}), 500
 
 @app.route("/client/subclient/delete", methods=["POST"])
-@require_auth
-@require_active_org
+@require_active_auth
 def delete_subclient():
     """
     Delete a subclient.
@@ -996,6 +1999,7 @@ def delete_subclient():
         # Check if the deletion was successful
         if not delete_response.data:
             return jsonify({"error": "Error deleting the subclient"}), 500
+        bump_version(request.org_id)
 
         # Return a success message
         return jsonify({"message": "Subclient deleted successfully"}), 200
@@ -1039,6 +2043,7 @@ def google_auth_callback():
     """
     data = request.get_json()
     user_id = data.get("user_id")
+    auth_user_id = user_id
     full_name = data.get("full_name")
 
     # Validate that user_id and full_name are present in the request data
@@ -1081,6 +2086,8 @@ def google_auth_callback():
             }).execute()
             emp = emp_response.data[0]
             user_id = emp["id"]
+        # The employee may have just been created or linked to this auth user
+        invalidate_identity(auth_user_id)
         
         print(user_id)
         # Return user data and role information
@@ -1113,33 +2120,44 @@ def log_auth_attempt(email, resultado, mensaje):
 
 
 
+# PDF uploads are parsed from memory; big documents are split across a process pool.
+# Extracted text is cached by file digest so re-uploads skip parsing.
+pdf_text_cache = PdfTextCache(
+    max_bytes=int(os.environ.get("PDF_CACHE_MB", "64")) * 1024 * 1024,
+    db_path=os.environ.get("PDF_CACHE_DB") or None,
+    ttl=float(os.environ.get("PDF_CACHE_TTL", str(30 * 86400))),
+)
+pdf_extractor = PdfExtractor(
+    cache=pdf_text_cache,
+    max_bytes=int(os.environ.get("PDF_MAX_MB", "16")) * 1024 * 1024,
+    max_pages=int(os.environ.get("PDF_MAX_PAGES", "1000")),
+    workers=int(os.environ.get("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1)))),
+    parallel_min_pages=int(os.environ.get("PDF_PARALLEL_MIN_PAGES", "100")),
+    timeout=float(os.environ.get("PDF_EXTRACT_TIMEOUT", "120")),
+)
+
 def extract_text_from_pdf(pdf_file):
     """Extract text from a PDF file."""
-    text = ""
     try:
-        # Create a temporary file to save the uploaded PDF
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp:
-            temp.write(pdf_file.read())
-            temp_path = temp.name
-        
-        # Open the PDF with PyMuPDF
-        doc = pymupdf.open(temp_path)
-        
-        # Extract text from each page
-        for page in doc:
-            text += page.get_text()
-        
-        # Close the document
-        doc.close()
-        
-        # Clean up the temporary file
-        os.unlink(temp_path)
-        
-        return text
+        with profiler.span("pdf_extract"):
+            return pdf_extractor.extract(pdf_file.read())["text"]
     except Exception as e:
         print(f"Error extracting text from PDF: {e}")
         return None
 
+def process_call_insight(user_id, transcript, call_id=None, mode=None, org_id=None):
+    """
+    Save the transcript on the call, generate its insights and insert them in the insight table.
+    Shared by /call/insight/new and the insight job workers (and, async, by async_app).
+    
+    Returns:
+        (body, status): JSON-serializable body and the HTTP status it maps to
+    """
+    body, status = generate_call_insight(supabase, user_id, transcript, call_id, mode)
+    if status == 201:
+        bump_version(org_id)
+    return body, status
+
 # modified version of /agent/txt route that will process a call but also smart insert call insight
 # into the database
 # and return the call insight object
@@ -1150,45 +2168,150 @@ def new_call_insight():
     user_id = data.get("user_id")
     transcript = data.get("transcript")
     call_id = data.get("call_id")  # Optional: Accept from frontend
+    mode = data.get("mode")  # Optional: "parallel" or "combined"
 
     if not transcript:
         return jsonify({'error': 'No transcript provided'}), 400
+    if mode and mode not in INSIGHT_MODES:
+        return jsonify({'error': f'Invalid mode, expected one of {list(INSIGHT_MODES)}'}), 400
+
+    body, status = process_call_insight(user_id, transcript, call_id, mode, request.org_id)
+    return jsonify(body), status
+
+def run_call_insight_job(payload):
+    """Job handler for "call_insight" jobs: 5xx outcomes are retried, 4xx are not."""
+    body, status = process_call_insight(payload["user_id"], payload["transcript"], payload.get("call_id"), payload.get("mode"), payload.get("org_id"))
+    if status >= 400:
+        raise JobError(body.get("error"), retryable=status >= 500)
+    return body
+
+insight_jobs.register("call_insight", run_call_insight_job)
+
+def start_job_workers():
+    if insight_jobs.workers > 0:
+        insight_jobs.start()
+
+# Job workers start with the app, so jobs persisted before a restart resume without waiting
+# for a request. Not in the processes spawned by the PDF pool, which re-import the main
+# module when it is run as a script. With gunicorn --preload, call start_job_workers() from
+# a post_fork hook instead: threads don't survive the fork.
+if multiprocessing.parent_process() is None:
+    start_job_workers()
+
+@app.route('/call/insight/jobs', methods=['POST'])
+@require_active_auth
+def submit_call_insight_job():
+    """
+    Queue the generation of a call insight and return immediately.
+    Same request body as /call/insight/new; the work is done by background workers.
+    
+    Request Body:
+        - user_id (str): ID of the authenticated user
+        - transcript (str): Transcript of the call
+        - call_id (str, optional): ID of the call, defaults to the user's latest call
+        - mode (str, optional): "parallel" or "combined"
+    
+    Returns:
+        - 202: JSON with the job id and where to poll for its status
+            {"job_id": "id", "status": "queued", "status_url": "/call/insight/jobs/<job_id>"}
+        - 400: Error if no transcript is provided or mode is invalid
+        - 403: Error if the organization is not active
+        - 500: Error if the job could not be queued
+    """
+    data = request.json
+    transcript = data.get("transcript")
+    mode = data.get("mode")
 
-    # Fetch latest call if call_id not provided
-    if not call_id:
-        try:
-            response = supabase.rpc("get_latest_call", {"auth_uid": user_id}).execute()
-            if not response.data:
-                return jsonify({"error": "No calls found for this employee"}), 404
-            call_id = response.data[0]["call_id"]
-        except Exception as e:
-            return jsonify({"error": f"Error fetching latest call: {str(e)}"}), 500
+    if not transcript:
+        return jsonify({'error': 'No transcript provided'}), 400
+    if mode and mode not in INSIGHT_MODES:
+        return jsonify({'error': f'Invalid mode, expected one of {list(INSIGHT_MODES)}'}), 400
 
-    # Update transcription for the call
     try:
-        update_response = supabase.table("call").update({"transcription": transcript}).eq("id", call_id).execute()
-        if not update_response.data:
-            return jsonify({"error": "Failed to update call transcription"}), 500
+        job_id = insight_jobs.submit("call_insight", {
+            "user_id": data.get("user_id"),
+            "org_id": request.org_id,
+            "transcript": transcript,
+            "call_id": data.get("call_id"),
+            "mode": mode,
+        })
     except Exception as e:
-        return jsonify({"error": f"Error updating call transcription: {str(e)}"}), 500
+        return jsonify({"error": f"Error queueing the insight job: {str(e)}"}), 500
 
-    # Generate insights using agents
-    try:
-        notes = runNotetakingAgent(transcript)
-        report = runReportAgent(transcript)
-        
-        # Insert insight into Supabase
-        insight_data = {
-            "call_id": call_id,
-            "insightsjson": json.dumps({"notes": notes, "report": report})  # Insert as JSON object
-        }
-        insight_response = supabase.table("insight").insert(insight_data).execute()
-        if not insight_response.data:
-            return jsonify({"error": "Error creating the insight"}), 500
-        
-        return jsonify(insight_data), 201
-    except Exception as e:
-        return jsonify({'error': f'Error processing text with agent: {str(e)}'}), 500
+    status_url = f"/call/insight/jobs/{job_id}"
+    return jsonify({"job_id": job_id, "status": "queued", "status_url": status_url}), 202, {"Location": status_url}
+
+def get_org_job(job_id, kind):
+    """The public view of a job of this kind queued by request.org_id's organization, or None."""
+    job = insight_jobs.get(job_id, include_payload=True)
+    if not job or job["kind"] != kind or job["payload"].get("org_id") != request.org_id:
+        return None
+    job.pop("payload")
+    return job
+
+@app.route('/call/insight/jobs/<job_id>', methods=['GET'])
+@require_active_auth
+def get_call_insight_job(job_id):
+    """
+    Get the status of an insight job of the user's organization.
+    
+    Request Body:
+        - user_id (str): ID of the authenticated user
+    
+    Returns:
+        - 200: JSON with the job
+            {
+                "job_id": "id",
+                "status": "queued" | "running" | "succeeded" | "dead",
+                "attempts": int,
+                "result": {insight_object} or null,
+                "error": "last error" or null
+            }
+        - 403: Error if user is not authorized or organization is not active
+        - 404: Error if the job does not exist in the organization
+    """
+    job = get_org_job(job_id, "call_insight")
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job), 200
+
+@app.route('/call/insight/jobs/dead', methods=['GET'])
+@require_active_admin
+def get_dead_insight_jobs():
+    """
+    List the insight jobs of the organization that failed permanently or ran out of retries.
+    
+    Request Body:
+        - user_id (str): ID of the authenticated admin user
+    
+    Returns:
+        - 200: JSON array of dead-lettered jobs, most recent first
+        - 403: Error if user is not authorized or organization is not active
+    """
+    jobs = [job for job in insight_jobs.dead_letters("call_insight", limit=200) if job["payload"].get("org_id") == request.org_id]
+    for job in jobs:
+        job["payload"].pop("transcript", None)
+    return jsonify(jobs), 200
+
+@app.route('/call/insight/jobs/<job_id>/retry', methods=['POST'])
+@require_active_admin
+def retry_dead_insight_job(job_id):
+    """
+    Move a dead-lettered insight job back to the queue.
+    
+    Request Body:
+        - user_id (str): ID of the authenticated admin user
+    
+    Returns:
+        - 202: {"job_id": "id", "status": "queued"}
+        - 404: Error if the job is not in the dead-letter list of the organization
+    """
+    job = insight_jobs.get(job_id, include_payload=True)
+    if not job or job["status"] != "dead" or job["payload"].get("org_id") != request.org_id:
+        return jsonify({"error": "Dead job not found"}), 404
+    if not insight_jobs.requeue(job_id):
+        return jsonify({"error": "Dead job not found"}), 404
+    return jsonify({"job_id": job_id, "status": "queued"}), 202
 
 @app.route('/agent/txt', methods=['POST'])
 @require_auth # to ensure that user is in org and to be able to determine 
@@ -1198,6 +2321,8 @@ def agent_txt():
     
     Request Body:
         - transcript (str): The text content to be processed
+        - mode (str, optional): "parallel" (two agents) or "combined" (one LLM call).
+          Defaults to the INSIGHT_MODE setting.
     
     Returns:
         - 200: JSON with generated notes and report
@@ -1205,7 +2330,9 @@ def agent_txt():
                 "notes": {notes_object},
                 "report": {report_object}
             }
-        - 400: Error if no transcript is provided
+            If one agent fails or times out its value is null and an
+            "errors" object describes what happened.
+        - 400: Error if no transcript is provided or mode is invalid
         - 500: Error if processing fails
     """
     data = request.json
@@ -1214,15 +2341,65 @@ def agent_txt():
         return jsonify({'error': 'No transcript provided in request'}), 400
     
     text = data['transcript']
+    mode = data.get('mode')
+    if mode and mode not in INSIGHT_MODES:
+        return jsonify({'error': f'Invalid mode, expected one of {list(INSIGHT_MODES)}'}), 400
     
     try:
-        notes = runNotetakingAgent(text)
-        report = runReportAgent(text)
-        
-        return jsonify({
-            'notes': notes,
-            'report': report
-        })
+        insights = generateInsights(compact_for("agent_txt", text), mode)
+        if insights["notes"] is None and insights["report"] is None:
+            return jsonify({'error': 'Error processing text with agent', 'details': insights["errors"]}), 500
+
+        return jsonify(insights)
+
+    except Exception as e:
+        return jsonify({'error': f'Error processing text with agent: {str(e)}'}), 500
+
+@app.route('/agent/pdf', methods=['POST'])
+def agent_pdf():
+    """
+    Extract the text of a PDF and process it with AI agents to generate notes and a report.
+    
+    Request Body (multipart/form-data):
+        - file: The PDF file
+        - mode (str, optional): "parallel" (two agents) or "combined" (one LLM call).
+          Defaults to the INSIGHT_MODE setting.
+    
+    Returns:
+        - 200: JSON with generated notes and report, same as /agent/txt, plus the page count
+            {
+                "notes": {notes_object},
+                "report": {report_object},
+                "pages": int
+            }
+        - 400: Error if no file is provided, the file is not a readable PDF, it has no text or mode is invalid
+        - 413: Error if the file is over the size or page limit
+        - 500: Error if processing fails
+    """
+    upload = request.files.get('file')
+    if upload is None or not upload.filename:
+        return jsonify({'error': 'No file provided in request'}), 400
+    
+    mode = request.form.get('mode')
+    if mode and mode not in INSIGHT_MODES:
+        return jsonify({'error': f'Invalid mode, expected one of {list(INSIGHT_MODES)}'}), 400
+    
+    try:
+        with profiler.span("pdf_extract"):
+            extracted = pdf_extractor.extract(upload.read())
+    except PdfError as e:
+        return jsonify({'error': str(e)}), e.status
+    
+    if not extracted["text"].strip():
+        return jsonify({'error': 'The PDF has no extractable text (scanned documents are not supported)'}), 400
+    
+    try:
+        insights = generateInsights(extracted["text"], mode)
+        if insights["notes"] is None and insights["report"] is None:
+            return jsonify({'error': 'Error processing text with agent', 'details': insights["errors"]}), 500
+
+        insights["pages"] = extracted["page_count"]
+        return jsonify(insights)
 
     except Exception as e:
         return jsonify({'error': f'Error processing text with agent: {str(e)}'}), 500
@@ -1262,6 +2439,95 @@ def agent_email():
         return jsonify({'error': f'Error processing information with agent: {str(e)}'}), 500
 
 
+# Streaming (Server-Sent Events) variants of the agent endpoints
+
+SSE_HEARTBEAT_SECONDS = float(os.environ.get("SSE_HEARTBEAT_SECONDS", "15"))
+
+def sse_event(event, data):
+    """Format one Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def sse_response(events):
+    return Response(stream_with_context(events), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",  # don't let proxies buffer the stream
+    })
+
+@app.route('/agent/txt/stream', methods=['POST'])
+@require_auth
+def agent_txt_stream():
+    """
+    Streaming version of /agent/txt. Sends each part as soon as it is ready.
+    
+    Request Body:
+        - transcript (str): The text content to be processed
+    
+    Returns:
+        - 200: text/event-stream with the events
+            event: notes   data: {notes_object}
+            event: report  data: {report_object}
+            event: error   data: {"agent": "notes" | "report", "error": "message"}
+            event: done    data: {}
+          Comment lines (": keep-alive") are sent while the agents are still working.
+        - 400: Error if no transcript is provided
+    """
+    data = request.json
+    
+    if not data or 'transcript' not in data:
+        return jsonify({'error': 'No transcript provided in request'}), 400
+    
+    text = data['transcript']
+
+    def events():
+        for name, result, error in iterInsightAgents(compact_for("agent_txt", text), heartbeat=SSE_HEARTBEAT_SECONDS):
+            if name is None:
+                yield ": keep-alive\n\n"
+            elif error:
+                yield sse_event("error", {"agent": name, "error": error})
+            else:
+                yield sse_event(name, result)
+        yield sse_event("done", {})
+
+    return sse_response(events())
+
+@app.route('/agent/email/stream', methods=['POST'])
+def agent_email_stream():
+    """
+    Streaming version of /agent/email. Sends the email text as it is generated.
+    
+    Request Body:
+        - information (str): The information to be used for email generation
+    
+    Returns:
+        - 200: text/event-stream with the events
+            event: delta  data: {"text": "next chunk of the email"}
+            event: email  data: {"subject": "email_subject", "body": "email_body"}
+            event: error  data: {"error": "message"}
+            event: done   data: {}
+          The first line of the streamed text is the subject, the rest is the body.
+        - 400: Error if no information is provided
+    """
+    data = request.json
+    
+    if not data or 'information' not in data:
+        return jsonify({'error': 'No information provided in request'}), 400
+    
+    information = data['information']
+
+    def events():
+        try:
+            for kind, value in streamEmailAgent(information):
+                if kind == "delta":
+                    yield sse_event("delta", {"text": value})
+                else:
+                    yield sse_event("email", value)
+        except Exception as e:
+            yield sse_event("error", {"error": f'Error processing information with agent: {str(e)}'})
+        yield sse_event("done", {})
+
+    return sse_response(events())
+
+
 
 
 if __name__ == "__main__":
@@ -0,0 +1,350 @@
+"""
+In-process metrics in the Prometheus text format, served by GET /metrics.
+
+Counters and histograms keep their values in plain dicts behind one lock per
+metric, so recording a value costs a dict lookup, a bisect and a few
+additions. Values that other objects already count (cache hits, connection
+pool stats) are read by collectors when /metrics is scraped, not on the hot path.
+
+Every process keeps its own values: with several gunicorn workers, scrape each
+worker (or sum over the instance label) instead of the load balancer address.
+"""
+import hmac
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, request
+import httpx
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds. Route and database buckets span a cache hit to a slow query,
+# LLM buckets span a cached answer to a long map-reduce run.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+LLM_BUCKETS = (0.5, 1, 2.5, 5, 10, 15, 20, 30, 45, 60, 90, 120, 180)
+
+
+def operator_authorized(authorization):
+    """True if an Authorization header is "Bearer <METRICS_TOKEN>". /metrics and the stats
+    routes are operator endpoints: without METRICS_TOKEN set, nobody is authorized."""
+    token = os.environ.get("METRICS_TOKEN")
+    if not token or not authorization:
+        return False
+    scheme, _, value = authorization.partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(value.strip().encode(), token.encode())
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names, values, extra=""):
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels.
+
+    Args:
+        name (str): Metric name, e.g. "teamtrack_llm_prompt_tokens_total".
+        documentation (str): HELP text.
+        labelnames (tuple): Label names; inc() takes the values in the same order.
+    """
+    type = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield self.name, format_labels(self.labelnames, labels), value
+
+
+class Histogram:
+    """Histogram of observed values with optional labels.
+
+    Args:
+        name (str): Metric name, e.g. "teamtrack_http_request_duration_seconds".
+        documentation (str): HELP text.
+        labelnames (tuple): Label names; observe() takes the values in the same order.
+        buckets (tuple): Upper bounds of the buckets, ascending. +Inf is implied.
+    """
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}  # labels -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            entry[index] += 1
+            entry[-1] += value
+
+    def samples(self):
+        with self._lock:
+            values = [(labels, list(entry)) for labels, entry in self._values.items()]
+        for labels, entry in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), entry):
+                cumulative += count
+                yield (f"{self.name}_bucket",
+                       format_labels(self.labelnames, labels, f'le="{format_value(float(bound))}"'), cumulative)
+            yield f"{self.name}_sum", format_labels(self.labelnames, labels), entry[-1]
+            yield f"{self.name}_count", format_labels(self.labelnames, labels), cumulative
+
+
+class Registry:
+    """Metrics plus collectors, rendered together by render().
+
+    A collector is a callable returning (name, type, documentation, samples)
+    tuples, where samples is a list of (labels dict, value).
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector):
+        self._collectors.append(collector)
+        return collector
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(f"{name}{labels} {format_value(value)}" for name, labels, value in metric.samples())
+        for collector in self._collectors:
+            for name, metric_type, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in samples:
+                    lines.append(f"{name}{format_labels(labels.keys(), labels.values())} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_seconds = registry.histogram(
+    "teamtrack_http_request_duration_seconds",
+    "Time to the response headers per route (streamed bodies are not included).",
+    ("method", "route", "status"),
+)
+supabase_request_seconds = registry.histogram(
+    "teamtrack_supabase_request_duration_seconds",
+    "Supabase round trips per table (or rpc function) and operation, including the response body.",
+    ("table", "operation"),
+)
+supabase_errors = registry.counter(
+    "teamtrack_supabase_errors_total",
+    "Supabase responses with an error status per table and operation.",
+    ("table", "operation", "status"),
+)
+llm_request_seconds = registry.histogram(
+    "teamtrack_llm_request_duration_seconds",
+    "Model calls per agent, including structured output parsing.",
+    ("agent", "outcome"),
+    buckets=LLM_BUCKETS,
+)
+llm_prompt_tokens = registry.counter(
+    "teamtrack_llm_prompt_tokens_total", "Prompt tokens sent per agent and model.", ("agent", "model"))
+llm_completion_tokens = registry.counter(
+    "teamtrack_llm_completion_tokens_total", "Completion tokens received per agent and model.", ("agent", "model"))
+agent_cache_lookups = registry.counter(
+    "teamtrack_agent_cache_lookups_total", "Agent result cache lookups per agent, by hit or miss.", ("agent", "result"))
+transcript_tokens = registry.counter(
+    "teamtrack_transcript_tokens_total",
+    "Transcript tokens per endpoint before (raw) and after (compacted) transcript compaction.",
+    ("endpoint", "stage"),
+)
+
+
+def observe_llm_run(agent, model, seconds, run_metrics=None, outcome="ok"):
+    """Record one model call. run_metrics is agno's RunResponse.metrics (lists of per-message counts)."""
+    llm_request_seconds.observe(seconds, agent, outcome)
+    if run_metrics:
+        llm_prompt_tokens.inc(agent, model, amount=sum(run_metrics.get("input_tokens") or run_metrics.get("prompt_tokens") or ()))
+        llm_completion_tokens.inc(agent, model, amount=sum(run_metrics.get("output_tokens") or run_metrics.get("completion_tokens") or ()))
+
+
+# Flask
+
+def instrument_flask(app):
+    """Time every request of app into http_request_seconds. The route label is the
+    URL rule (e.g. /project/<project_id>), not the path, to keep the label set small."""
+    def start_timer():
+        g.metrics_started = time.perf_counter()
+
+    def record(response):
+        started = g.pop("metrics_started", None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+            http_request_seconds.observe(time.perf_counter() - started, request.method, route, str(response.status_code))
+        return response
+
+    app.before_request(start_timer)
+    app.after_request(record)
+
+
+# Supabase (through the ConnectionPool hooks of connections.py)
+
+POSTGREST_OPERATIONS = {"GET": "select", "HEAD": "select", "PATCH": "update", "DELETE": "delete", "PUT": "upsert"}
+
+
+def supabase_operation(request):
+    """(table, operation) of a PostgREST or GoTrue request, from its path and method."""
+    path = request.url.path
+    if "/rest/v1/" in path:
+        target = path.split("/rest/v1/", 1)[1]
+        if target.startswith("rpc/"):
+            return target[4:], "rpc"
+        if request.method == "POST":
+            operation = "upsert" if "merge-duplicates" in request.headers.get("prefer", "") else "insert"
+        else:
+            operation = POSTGREST_OPERATIONS.get(request.method, request.method.lower())
+        return target.split("/", 1)[0], operation
+    if "/auth/v1/" in path:
+        # /auth/v1/admin/users/<id> -> admin/users, ids are dropped
+        parts = [part for part in path.split("/auth/v1/", 1)[1].split("/") if part][:2]
+        if len(parts) == 2 and parts[0] != "admin":
+            parts = parts[:1]
+        return "auth", f"{request.method.lower()} {'/'.join(parts)}"
+    return "other", request.method.lower()
+
+
+class _TimedStream:
+    def __init__(self, stream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+
+    def _closed(self):
+        on_close, self._on_close = self._on_close, None
+        if on_close is not None:
+            on_close()
+
+
+class TimedSyncStream(_TimedStream, httpx.SyncByteStream):
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            self._closed()
+
+
+class TimedAsyncStream(_TimedStream, httpx.AsyncByteStream):
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            self._closed()
+
+
+def instrument_supabase_pool(pool):
+    """Time the requests of a ConnectionPool into supabase_request_seconds, from sending
+    the request until the response body is read. Safe to call twice on the same pool."""
+    if getattr(pool, "metrics_instrumented", False):
+        return pool
+    pool.metrics_instrumented = True
+
+    def on_request(request):
+        request.extensions["metrics_started"] = time.perf_counter()
+
+    def on_response(response):
+        started = response.request.extensions.get("metrics_started")
+        if started is None:
+            return
+        table, operation = supabase_operation(response.request)
+        if response.status_code >= 400:
+            supabase_errors.inc(table, operation, str(response.status_code))
+
+        def record():
+            supabase_request_seconds.observe(time.perf_counter() - started, table, operation)
+        if isinstance(response.stream, httpx.AsyncByteStream):
+            response.stream = TimedAsyncStream(response.stream, record)
+        else:
+            response.stream = TimedSyncStream(response.stream, record)
+
+    pool.request_hooks.append(on_request)
+    pool.response_hooks.append(on_response)
+    return pool
+
+
+# Collectors
+
+def cache_collector(get_caches):
+    """Collector for objects with a stats() dict that has "hits" and "misses".
+
+    Args:
+        get_caches (callable): Returns cache label -> object, e.g. {"identity": identity_cache}.
+            Called at scrape time, so caches created later in the module can be listed.
+    """
+    def collect():
+        stats = {name: cache.stats() for name, cache in get_caches().items()}
+        yield ("teamtrack_cache_hits_total", "counter", "Cache hits per cache.",
+               [({"cache": name}, s["hits"]) for name, s in stats.items()])
+        yield ("teamtrack_cache_misses_total", "counter", "Cache misses per cache.",
+               [({"cache": name}, s["misses"]) for name, s in stats.items()])
+        yield ("teamtrack_cache_entries", "gauge", "Entries held per cache.",
+               [({"cache": name}, s.get("size", s.get("entries", s.get("memory", {}).get("size", 0))))
+                for name, s in stats.items()])
+    return collect
+
+
+def pool_collector(pools):
+    """Collector for connections.ConnectionPool stats."""
+    def collect():
+        stats = {pool.name: pool.stats() for pool in pools}
+        yield ("teamtrack_upstream_requests_total", "counter", "Requests sent per connection pool.",
+               [({"pool": name}, s["requests"]) for name, s in stats.items()])
+        yield ("teamtrack_upstream_connects_total", "counter", "New connections opened per connection pool.",
+               [({"pool": name}, s["connects"]) for name, s in stats.items()])
+        yield ("teamtrack_upstream_connections", "gauge", "Open connections per pool and state.",
+               [({"pool": name, "state": state}, s[state]) for name, s in stats.items() for state in ("active", "idle")
+                if s[state] is not None])
+    return collect
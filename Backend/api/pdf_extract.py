@@ -0,0 +1,142 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import pymupdf
+
+from cache import MISSING
+from pdf_worker import extract_pages, extract_range
+
+
+class PdfError(Exception):
+    """Raised when an upload can't be extracted.
+
+    Args:
+        message (str): Description returned to the client.
+        status (int): HTTP status it maps to (400 unreadable, 413 over a limit,
+            503 the process pool failed or timed out).
+    """
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def open_pdf(data):
+    """Open a PDF from bytes, without touching the disk."""
+    try:
+        doc = pymupdf.open(stream=data, filetype="pdf")
+    except (pymupdf.FileDataError, RuntimeError, ValueError) as e:
+        raise PdfError(f"Invalid PDF file: {e}") from e
+    if doc.needs_pass:
+        doc.close()
+        raise PdfError("The PDF is password protected")
+    return doc
+
+
+class PdfExtractor:
+    """Text extraction from in-memory PDFs.
+
+    Documents with at least parallel_min_pages pages are split into one
+    contiguous page range per worker and extracted in a process pool (PyMuPDF
+    holds the GIL, so threads don't help); smaller ones are extracted inline.
+    The pool is started on first use with the "spawn" method, since the app
+    process runs threads; its tasks live in pdf_worker. A pool that breaks (a
+    worker died) or doesn't answer within timeout seconds is replaced and the
+    upload fails with a 503 PdfError. With a PdfTextCache, a file that was
+    already extracted (same bytes, same PyMuPDF version) is not parsed again.
+
+    Args:
+        max_bytes (int): Largest accepted file.
+        max_pages (int): Largest accepted page count.
+        workers (int): Processes in the pool, 0 or 1 disables it.
+        parallel_min_pages (int): Page count from which the pool is used.
+        cache (PdfTextCache, optional): Cache of extracted text by file digest.
+        timeout (float): Seconds to wait for the pool to extract a document.
+    """
+
+    def __init__(self, max_bytes=16 * 1024 * 1024, max_pages=1000, workers=2, parallel_min_pages=100, cache=None, timeout=120):
+        self.cache = cache
+        self.max_bytes = max_bytes
+        self.max_pages = max_pages
+        self.workers = workers
+        self.parallel_min_pages = parallel_min_pages
+        self.timeout = timeout
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def _discard_pool(self, pool):
+        """Drop a broken or stuck pool; the next document starts a new one."""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _extract_parallel(self, data, page_count):
+        step = -(-page_count // self.workers)
+        ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+        pool = self._get_pool()
+        try:
+            futures = [pool.submit(extract_range, data, start, stop) for start, stop in ranges]
+            return [page for future in futures for page in future.result(timeout=self.timeout)]
+        except BrokenProcessPool as e:
+            self._discard_pool(pool)
+            raise PdfError("PDF extraction is temporarily unavailable, try again", 503) from e
+        except FutureTimeoutError as e:
+            self._discard_pool(pool)
+            raise PdfError(f"PDF extraction took longer than {self.timeout:g}s, try again", 503) from e
+
+    def _check_pages(self, page_count):
+        if page_count > self.max_pages:
+            raise PdfError(f"PDF has {page_count} pages, the limit is {self.max_pages}", 413)
+
+    def extract(self, data):
+        """Extract the text of every page.
+
+        Returns:
+            dict: {"text": str, "pages": [str], "page_count": int}
+
+        Raises:
+            PdfError: If the file is over a limit, unreadable or encrypted, or the
+                process pool failed.
+        """
+        if len(data) > self.max_bytes:
+            raise PdfError(f"PDF is larger than {self.max_bytes // (1024 * 1024)} MB", 413)
+
+        key = None
+        if self.cache is not None:
+            key = self.cache.make_key(data, pymupdf.VersionBind)
+            cached = self.cache.get(key)
+            if cached is not MISSING:
+                self._check_pages(cached["page_count"])
+                return cached
+
+        doc = open_pdf(data)
+        try:
+            page_count = doc.page_count
+            self._check_pages(page_count)
+
+            if self.workers > 1 and page_count >= self.parallel_min_pages:
+                pages = self._extract_parallel(data, page_count)
+            else:
+                pages = extract_pages(doc, 0, page_count)
+        finally:
+            doc.close()
+
+        result = {"text": "".join(pages), "pages": pages, "page_count": page_count}
+        if key is not None:
+            self.cache.set(key, result)
+        return result
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
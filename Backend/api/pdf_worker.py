@@ -0,0 +1,17 @@
+"""Tasks run in PdfExtractor's process pool.
+
+The pool uses the "spawn" start method, so every worker process imports this
+module (and re-imports the app's __main__). Keep it free of side effects: it
+must only depend on PyMuPDF, never on the app, its clients or its workers.
+"""
+import pymupdf
+
+
+def extract_pages(doc, start, stop):
+    return [doc[i].get_text() for i in range(start, stop)]
+
+
+def extract_range(data, start, stop):
+    """Process pool task: text of pages [start, stop) of the PDF in data."""
+    with pymupdf.open(stream=data, filetype="pdf") as doc:
+        return extract_pages(doc, start, stop)
@@ -0,0 +1,510 @@
+"""
+On-demand request profiling: sampled stacks plus named spans, kept in a ring buffer.
+
+A request is profiled when it carries a valid signed X-Profile header (see
+sign(), or `python profiling.py sign GET /employee/projects`), or when an
+admin turned on sampling for their organization with a sample rate. While a
+profiled request runs, a sampler thread reads its stack every
+PROFILE_INTERVAL_MS with sys._current_frames(); agent threads working for the
+request are sampled too (propagate()). Spans name the decorators and the
+external calls (Supabase, OpenAI, PDF parsing, agents); they show up as
+"span:<name>" frames in the stacks and as their own timeline in the speedscope
+export. Finished profiles go into a ring buffer of PROFILE_BUFFER_SIZE entries
+and can be downloaded as collapsed stacks (flamegraph.pl, speedscope) or
+speedscope JSON. When nothing is being profiled the hooks cost a dict lookup.
+"""
+import hashlib
+import hmac
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextlib import contextmanager
+from functools import lru_cache, wraps
+
+import httpx
+from dotenv import load_dotenv
+from flask import g, request
+
+from metrics import TimedAsyncStream, TimedSyncStream
+
+load_dotenv()
+
+PROFILE_HEADER = "X-Profile"
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+
+class Profile:
+    """Samples and spans of one request."""
+
+    def __init__(self, method, path, route, trigger, sample_rate=None, max_samples=20000):
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.route = route
+        self.trigger = trigger
+        self.sample_rate = sample_rate
+        self.max_samples = max_samples
+        self.org_id = None
+        self.status = None
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.end = None
+        self.samples = []  # (time, thread label, span names, code objects root first)
+        self.spans = []  # (name, thread label, depth, start, end)
+        self.dropped = 0
+
+    @property
+    def duration(self):
+        return (self.end or time.perf_counter()) - self.start
+
+    def add_sample(self, at, thread, spans, stack):
+        if len(self.samples) < self.max_samples:
+            self.samples.append((at, thread, spans, stack))
+        else:
+            self.dropped += 1
+
+    def summary(self):
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "trigger": self.trigger,
+            "started_at": self.started_at,
+            "duration_ms": round(1000 * self.duration, 2),
+            "samples": len(self.samples),
+            "dropped_samples": self.dropped,
+            "spans": len(self.spans),
+        }
+
+    def span_report(self):
+        """Spans in start order with their total and self time (minus child spans) in ms."""
+        spans = sorted(self.spans, key=lambda span: (span[1], span[3], -span[4]))
+        report, open_spans = [], []
+        for name, thread, depth, start, end in spans:
+            while open_spans and (open_spans[-1]["thread"] != thread or open_spans[-1]["depth"] >= depth):
+                open_spans.pop()
+            entry = {"name": name, "thread": thread, "depth": depth,
+                     "start_ms": round(1000 * (start - self.start), 3),
+                     "total_ms": round(1000 * (end - start), 3), "self_ms": round(1000 * (end - start), 3)}
+            if open_spans:
+                open_spans[-1]["self_ms"] = round(open_spans[-1]["self_ms"] - entry["total_ms"], 3)
+            report.append(entry)
+            open_spans.append(entry)
+        return sorted(report, key=lambda entry: entry["start_ms"])
+
+    def stacks(self):
+        """(thread, frame names root first) per sample, with the open spans as frames."""
+        for _, thread, spans, stack in self.samples:
+            yield thread, [f"span:{name}" for name in spans] + [frame_name(code) for code in stack]
+
+    def collapsed(self):
+        """Brendan Gregg's collapsed stack format, one "thread;frame;frame count" line per stack."""
+        counts = Counter(";".join([thread] + frames) for thread, frames in self.stacks())
+        return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+    def speedscope(self):
+        """speedscope file: one sampled profile and one span timeline per thread."""
+        frames, index = [], {}
+
+        def frame(name):
+            if name not in index:
+                index[name] = len(frames)
+                frames.append({"name": name})
+            return index[name]
+
+        end = (self.end or time.perf_counter()) - self.start
+        profiles = []
+        threads = sorted({sample[1] for sample in self.samples} | {span[1] for span in self.spans},
+                         key=lambda thread: (thread != "request", thread))
+        for thread in threads:
+            samples, weights, previous = [], [], None
+            for (at, sample_thread, _, _), (_, names) in zip(self.samples, self.stacks()):
+                if sample_thread != thread:
+                    continue
+                samples.append([frame(name) for name in names])
+                weights.append(at - previous if previous is not None else 0.0)
+                previous = at
+            if samples:
+                # A sample stands for the time since the previous one of the same thread
+                weights[0] = weights[1] if len(weights) > 1 else end
+                profiles.append({"type": "sampled", "name": f"{thread} stacks", "unit": "seconds",
+                                 "startValue": 0, "endValue": end, "samples": samples, "weights": weights})
+
+            events, open_spans = [], []
+            for name, _, _, start, stop in sorted((span for span in self.spans if span[1] == thread),
+                                                  key=lambda span: (span[3], -span[4])):
+                start, stop = start - self.start, stop - self.start
+                while open_spans and open_spans[-1][1] <= start:
+                    closed_frame, closed_at = open_spans.pop()
+                    events.append({"type": "C", "frame": closed_frame, "at": closed_at})
+                if open_spans:
+                    stop = min(stop, open_spans[-1][1])
+                events.append({"type": "O", "frame": frame(f"span:{name}"), "at": start})
+                open_spans.append((frame(f"span:{name}"), stop))
+            while open_spans:
+                closed_frame, closed_at = open_spans.pop()
+                events.append({"type": "C", "frame": closed_frame, "at": closed_at})
+            if events:
+                profiles.append({"type": "evented", "name": f"{thread} spans", "unit": "seconds",
+                                 "startValue": 0, "endValue": end, "events": events})
+
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": f"{self.method} {self.path} ({self.id})",
+            "exporter": "teamtrack profiling",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+
+@lru_cache(maxsize=8192)
+def frame_name(code):
+    filename = code.co_filename
+    if "site-packages" in filename:
+        filename = filename.split("site-packages", 1)[1].lstrip("/\\")
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class _ThreadState:
+    __slots__ = ("profile", "label", "spans")
+
+    def __init__(self, profile, label):
+        self.profile = profile
+        self.label = label
+        self.spans = []
+
+
+class SamplingRule:
+    def __init__(self, sample_rate, routes=None, until=None):
+        self.sample_rate = sample_rate
+        self.routes = set(routes) if routes else None
+        self.until = until
+
+    def matches(self, route, now):
+        return (self.until is None or now < self.until) and (self.routes is None or route in self.routes)
+
+    def as_dict(self):
+        return {"sample_rate": self.sample_rate, "routes": sorted(self.routes) if self.routes else None,
+                "until": self.until}
+
+
+class Profiler:
+    """Sampling profiler for requests, see the module docstring.
+
+    Args:
+        secret (str, optional): Key of the X-Profile HMAC. Without it the header is ignored.
+        interval (float): Seconds between samples.
+        buffer_size (int): Finished profiles kept.
+        max_samples (int): Samples kept per profile; later ones are only counted.
+        max_concurrent (int): Requests profiled at the same time; others run unprofiled.
+        max_signature_ttl (float): Longest accepted validity of a signed header, in seconds.
+    """
+
+    def __init__(self, secret=None, interval=0.005, buffer_size=50, max_samples=20000,
+                 max_concurrent=4, max_signature_ttl=3600):
+        self.secret = secret.encode("utf-8") if secret else None
+        self.interval = interval
+        self.max_samples = max_samples
+        self.max_concurrent = max_concurrent
+        self.max_signature_ttl = max_signature_ttl
+        self.profiles = deque(maxlen=buffer_size)
+        self.rules = {}  # org_id (None = every organization) -> SamplingRule
+        self._threads = {}  # thread ident -> _ThreadState
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._sampler = None
+        self.active = 0
+        self.discarded = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            secret=os.environ.get("PROFILE_SECRET") or None,
+            interval=float(os.environ.get("PROFILE_INTERVAL_MS", "5")) / 1000,
+            buffer_size=int(os.environ.get("PROFILE_BUFFER_SIZE", "50")),
+            max_samples=int(os.environ.get("PROFILE_MAX_SAMPLES", "20000")),
+            max_concurrent=int(os.environ.get("PROFILE_MAX_CONCURRENT", "4")),
+        )
+
+    # Triggers
+
+    def _signature(self, expires, method, path):
+        return hmac.new(self.secret, f"{expires}:{method.upper()}:{path}".encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def sign(self, method, path, ttl=300):
+        """X-Profile header value that profiles `method path` for the next ttl seconds."""
+        if self.secret is None:
+            raise ValueError("PROFILE_SECRET is not set")
+        expires = int(time.time() + ttl)
+        return f"{expires}.{self._signature(expires, method, path)}"
+
+    def verify(self, header, method, path):
+        """True if header is an unexpired signature of method and path."""
+        if not header or self.secret is None:
+            return False
+        expires, _, signature = header.partition(".")
+        try:
+            expires = int(expires)
+        except ValueError:
+            return False
+        now = time.time()
+        if not now <= expires <= now + self.max_signature_ttl:
+            return False
+        return hmac.compare_digest(signature, self._signature(expires, method, path))
+
+    def set_rule(self, org_id, sample_rate, routes=None, duration=None):
+        """Sample rate for an organization's requests (None = all), 0 turns it off."""
+        with self._lock:
+            if sample_rate <= 0:
+                self.rules.pop(org_id, None)
+            else:
+                self.rules[org_id] = SamplingRule(sample_rate, routes, time.time() + duration if duration else None)
+            return self.rules.get(org_id)
+
+    def _sample_rate(self, route):
+        # The organization is known only after the auth decorators ran, so requests are profiled
+        # at the highest matching rate and finish() keeps them with the rate of their organization
+        now = time.time()
+        rates = [rule.sample_rate for rule in list(self.rules.values()) if rule.matches(route, now)]
+        return max(rates) if rates else 0.0
+
+    def _keep(self, profile):
+        if profile.trigger != "sampled":
+            return True
+        rule = self.rules.get(profile.org_id) or self.rules.get(None)
+        if rule is None or not rule.matches(profile.route, time.time()):
+            return False
+        return random.random() < rule.sample_rate / profile.sample_rate
+
+    # Request lifecycle
+
+    def start(self, method, path, route, header=None):
+        """Start profiling the current request if it is signed or sampled. Returns the Profile or None."""
+        if self.verify(header, method, path):
+            trigger, sample_rate = "header", None
+        else:
+            sample_rate = self._sample_rate(route) if self.rules else 0.0
+            if not sample_rate or random.random() >= sample_rate:
+                return None
+            trigger = "sampled"
+        with self._lock:
+            if self.active >= self.max_concurrent:
+                return None
+            self.active += 1
+        profile = Profile(method, path, route, trigger, sample_rate, self.max_samples)
+        self.attach(profile, "request")
+        return profile
+
+    def finish(self, profile, status=None, org_id=None):
+        """Stop profiling the current request and keep the profile if it should be kept."""
+        self.detach()
+        profile.end = time.perf_counter()
+        profile.status = status
+        profile.org_id = org_id
+        with self._lock:
+            self.active -= 1
+            if self._keep(profile):
+                self.profiles.append(profile)
+            else:
+                self.discarded += 1
+
+    def attach(self, profile, label):
+        """Sample the current thread into profile until detach()."""
+        with self._lock:
+            self._threads[threading.get_ident()] = _ThreadState(profile, label)
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._sampler.start()
+        self._wake.set()
+
+    def detach(self):
+        with self._lock:
+            self._threads.pop(threading.get_ident(), None)
+
+    def current(self):
+        state = self._threads.get(threading.get_ident())
+        return state.profile if state is not None else None
+
+    def propagate(self, fn, label=None):
+        """Wrap fn so that, run on another thread, it is profiled with the caller's request.
+        The thread shows up under label, by default its thread name (e.g. agent_0)."""
+        profile = self.current()
+        if profile is None:
+            return fn
+
+        @wraps(fn)
+        def profiled(*args, **kwargs):
+            self.attach(profile, label or threading.current_thread().name)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.detach()
+        return profiled
+
+    # Spans
+
+    def begin(self, name):
+        """Open a span on the current thread. Returns a handle for end(), None if not profiling."""
+        state = self._threads.get(threading.get_ident())
+        if state is None:
+            return None
+        state.spans.append(name)
+        return state, name, len(state.spans) - 1, time.perf_counter()
+
+    def end(self, handle):
+        if handle is None:
+            return
+        state, name, depth, start = handle
+        state.profile.spans.append((name, state.label, depth, start, time.perf_counter()))
+        del state.spans[depth:]
+
+    @contextmanager
+    def span(self, name):
+        handle = self.begin(name)
+        try:
+            yield
+        finally:
+            self.end(handle)
+
+    def traced(self, name):
+        """Decorator that runs the function inside span(name)."""
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self._threads:
+                    return fn(*args, **kwargs)
+                with self.span(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    # Sampler
+
+    def _run(self):
+        own = threading.get_ident()
+        while True:
+            if not self._threads:
+                self._wake.clear()
+                self._wake.wait()
+                continue
+            now = time.perf_counter()
+            frames = sys._current_frames()
+            for ident, state in list(self._threads.items()):
+                frame = frames.get(ident)
+                if frame is None or ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                stack.reverse()
+                state.profile.add_sample(now, state.label, tuple(state.spans), tuple(stack))
+            del frames, frame
+            time.sleep(self.interval)
+
+    # Buffer
+
+    def list(self, org_id=None):
+        """Summaries of the kept profiles, newest first. org_id None lists every profile."""
+        with self._lock:
+            profiles = list(self.profiles)
+        return [profile.summary() for profile in reversed(profiles) if org_id is None or profile.org_id == org_id]
+
+    def get(self, profile_id, org_id=None):
+        with self._lock:
+            profiles = list(self.profiles)
+        for profile in profiles:
+            if profile.id == profile_id and (org_id is None or profile.org_id == org_id):
+                return profile
+        return None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "header_enabled": self.secret is not None,
+                "interval_ms": self.interval * 1000,
+                "active": self.active,
+                "buffered": len(self.profiles),
+                "buffer_size": self.profiles.maxlen,
+                "discarded": self.discarded,
+                "rules": {str(org_id) if org_id is not None else "*": rule.as_dict() for org_id, rule in self.rules.items()},
+            }
+
+
+def instrument_flask(app, profiler, skip_prefixes=("/profiling", "/metrics")):
+    """Profile app's requests that profiler.start() accepts and return the profile id in X-Profile-Id."""
+    def start_profile():
+        if request.path.startswith(skip_prefixes):
+            return
+        route = request.url_rule.rule if request.url_rule is not None else None
+        profile = profiler.start(request.method, request.path, route, request.headers.get(PROFILE_HEADER))
+        if profile is not None:
+            g.profile = profile
+
+    def add_header(response):
+        profile = g.get("profile")
+        if profile is not None:
+            profile.status = response.status_code
+            response.headers["X-Profile-Id"] = profile.id
+        return response
+
+    def finish_profile(exception=None):
+        profile = g.pop("profile", None)
+        if profile is not None:
+            profiler.finish(profile, profile.status or 500, getattr(request, "org_id", None))
+
+    app.before_request(start_profile)
+    app.after_request(add_header)
+    app.teardown_request(finish_profile)
+
+
+def instrument_pool(pool, profiler, name_request):
+    """Open a span for each request of a connections.ConnectionPool made on a profiled thread,
+    closed when the response body has been read.
+
+    Args:
+        name_request (callable): httpx.Request -> span name.
+    """
+    def on_request(http_request):
+        if profiler._threads:
+            handle = profiler.begin(name_request(http_request))
+            if handle is not None:
+                http_request.extensions["profile_span"] = handle
+
+    def on_response(response):
+        handle = response.request.extensions.pop("profile_span", None)
+        if handle is None:
+            return
+        if isinstance(response.stream, httpx.AsyncByteStream):
+            response.stream = TimedAsyncStream(response.stream, lambda: profiler.end(handle))
+        else:
+            response.stream = TimedSyncStream(response.stream, lambda: profiler.end(handle))
+
+    pool.request_hooks.append(on_request)
+    pool.response_hooks.append(on_response)
+    return pool
+
+
+profiler = Profiler.from_env()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sign an X-Profile header with PROFILE_SECRET.")
+    parser.add_argument("command", choices=["sign"])
+    parser.add_argument("method")
+    parser.add_argument("path")
+    parser.add_argument("--ttl", type=int, default=300)
+    args = parser.parse_args()
+    print(json.dumps({PROFILE_HEADER: Profiler.from_env().sign(args.method, args.path, args.ttl)}))
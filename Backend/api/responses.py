@@ -0,0 +1,151 @@
+import gzip
+
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson  # optional, faster JSON encoding/decoding
+except ImportError:
+    orjson = None
+
+try:
+    import brotli  # optional, enables Content-Encoding: br
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/javascript",
+    "text/plain",
+    "text/html",
+    "text/csv",
+}
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson.
+
+    Dates, dataclasses and other types orjson would format differently are
+    passed through to Flask's default hook, so the output matches the stdlib
+    provider except that non-ASCII text is written as UTF-8 instead of being
+    escaped. Calls with extra json.dumps/loads arguments fall back to the stdlib.
+    """
+
+    def _option(self, newline=False):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if self.compact is False or (self.compact is None and self._app.debug):
+            option |= orjson.OPT_INDENT_2
+        if newline:
+            option |= orjson.OPT_APPEND_NEWLINE
+        return option
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._option()).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=self._option(newline=True))
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def compress(data, encoding, gzip_level=4, brotli_quality=4):
+    if encoding == "br":
+        return brotli.compress(data, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+def etag_variants(etag):
+    """The ETag of a body plus the ETags of its compressed representations."""
+    return [etag] + [f"{etag}-{encoding}" for encoding in ("gzip", "br")]
+
+
+class ResponseCompressor:
+    """after_request hook that compresses text responses with brotli or gzip,
+    whichever the client prefers in Accept-Encoding (brotli only if installed).
+
+    Streamed responses (SSE, file downloads), responses that already have a
+    Content-Encoding and bodies smaller than min_size are sent as they are.
+    A strong ETag gets the encoding appended, since the bytes differ.
+
+    Args:
+        min_size (int): Smallest body in bytes worth compressing.
+        gzip_level (int): zlib compression level, 1-9.
+        brotli_quality (int): Brotli quality, 0-11.
+    """
+
+    def __init__(self, min_size=1024, gzip_level=4, brotli_quality=4):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.encodings = ("br", "gzip") if brotli is not None else ("gzip",)
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def choose_encoding(self, accept_encodings):
+        best, best_quality = None, 0
+        for encoding in self.encodings:
+            quality = accept_encodings[encoding]
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def __call__(self, response):
+        if (
+            response.status_code < 200
+            or response.status_code in (204, 304)
+            or response.direct_passthrough
+            or response.is_streamed
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        ):
+            return response
+
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = self.choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        compressed = compress(data, encoding, self.gzip_level, self.brotli_quality)
+        self.bytes_in += len(data)
+        self.bytes_out += len(compressed)
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f"{etag}-{encoding}", weak)
+        return response
+
+    def stats(self):
+        return {
+            "encodings": list(self.encodings),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "ratio": round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else 0.0,
+        }
+
+
+def init_responses(app, compression=True, min_size=1024, gzip_level=4, brotli_quality=4):
+    """Install the orjson provider (if orjson is installed) and the compression hook on app.
+
+    Returns:
+        ResponseCompressor or None: The compression hook, for its stats.
+    """
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
+    if not compression:
+        return None
+    compressor = ResponseCompressor(min_size, gzip_level, brotli_quality)
+    app.after_request(compressor)
+    return compressor
@@ -0,0 +1,234 @@
+import os
+import re
+
+from dotenv import load_dotenv
+
+from metrics import transcript_tokens
+
+load_dotenv()
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:  # tiktoken is optional, fall back to a character heuristic
+    _encoding = None
+
+# "Ana: hola", "[00:01:02] Ana: hola", "Speaker 1 - hola"
+SPEAKER_LINE = re.compile(r"^\s*(\[?\(?\d{1,2}:\d{2}(:\d{2})?(\.\d+)?\)?\]?\s*)?[^\s:][^:\n]{0,40}?\s*[:\-]\s")
+SENTENCE_END = re.compile(r"(?<=[.!?¿¡])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Number of tokens of a text for the gpt-4o tokenizer. Without tiktoken the estimate is
+    conservative, 3 characters a token like truncate_to_tokens, so budgets counted with it
+    hold for truncated texts."""
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // 3 + 1
+
+
+def split_speaker_turns(transcript: str):
+    """Split a transcript into speaker turns. Lines that don't start with a
+    speaker label are treated as the continuation of the previous turn."""
+    turns = []
+    for line in transcript.splitlines():
+        if not line.strip():
+            continue
+        if SPEAKER_LINE.match(line) or not turns:
+            turns.append(line.strip())
+        else:
+            turns[-1] += " " + line.strip()
+    return turns
+
+
+def _split_characters(text: str, max_tokens: int):
+    """Cut a text without usable whitespace (a URL, base64, a long run of characters)
+    into pieces of at most max_tokens tokens."""
+    pieces = []
+    while text:
+        size = len(text)
+        tokens = estimate_tokens(text)
+        while size > 1 and tokens > max_tokens:
+            size = max(1, min(size - 1, int(size * max_tokens / tokens)))
+            tokens = estimate_tokens(text[:size])
+        pieces.append(text[:size])
+        text = text[size:]
+    return pieces
+
+
+def _split_long_turn(turn: str, max_tokens: int):
+    """Split a single turn bigger than the budget on sentence boundaries, then words,
+    then characters for a single word bigger than the budget."""
+    parts = []
+    for sentence in SENTENCE_END.split(turn):
+        sentence_tokens = estimate_tokens(sentence)
+        if sentence_tokens <= max_tokens:
+            parts.append((sentence, sentence_tokens))
+            continue
+        words = sentence.split()
+        step = max(1, int(max_tokens * len(words) / sentence_tokens))
+        for i in range(0, len(words), step):
+            part = " ".join(words[i:i + step])
+            part_tokens = estimate_tokens(part)
+            if part_tokens <= max_tokens:
+                parts.append((part, part_tokens))
+                continue
+            for word in words[i:i + step]:
+                word_tokens = estimate_tokens(word)
+                if word_tokens <= max_tokens:
+                    parts.append((word, word_tokens))
+                else:
+                    parts.extend((piece, estimate_tokens(piece)) for piece in _split_characters(word, max_tokens))
+
+    pieces, current, current_tokens = [], [], 0
+    for part, part_tokens in parts:
+        if current and current_tokens + part_tokens > max_tokens:
+            pieces.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(part)
+        current_tokens += part_tokens + 1
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def chunk_transcript(transcript: str, max_tokens: int = 4000):
+    """Group consecutive speaker turns into chunks of at most max_tokens tokens.
+    Turns are never cut unless a single turn is bigger than the budget."""
+    chunks, current, current_tokens = [], [], 0
+    for turn in split_speaker_turns(transcript):
+        turn_tokens = estimate_tokens(turn)
+        parts = [turn] if turn_tokens <= max_tokens else _split_long_turn(turn, max_tokens)
+        for part in parts:
+            part_tokens = turn_tokens if len(parts) == 1 else estimate_tokens(part)
+            if current and current_tokens + part_tokens > max_tokens:
+                chunks.append("\n".join(current))
+                current, current_tokens = [], 0
+            current.append(part)
+            current_tokens += part_tokens + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut a text to at most max_tokens tokens (conservatively when tiktoken is not installed)."""
+    if _encoding is not None:
+        tokens = _encoding.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else _encoding.decode(tokens[:max_tokens])
+    max_chars = max_tokens * 3
+    return text if len(text) <= max_chars else text[:max_chars]
+
+
+# Compaction: a deterministic clean-up of captured transcripts (Vapi, Chrome extension)
+# before they reach a model. "light" strips timestamps and subtitle cue lines, replaces
+# partial ASR lines by the line that completes them (and drops a line that repeats the
+# one right before it), merges consecutive lines of the same speaker into one turn and
+# normalizes whitespace. "full" also removes Spanish/English fillers and
+# stuttered words. TRANSCRIPT_COMPACTION sets the level of every endpoint (default
+# "light"), <ENDPOINT>_COMPACTION overrides it for one (e.g. EMBEDDING_COMPACTION=off).
+# PDF text is not a captured transcript and is never compacted.
+COMPACTION_LEVELS = ("off", "light", "full")
+TRANSCRIPT_COMPACTION = os.getenv("TRANSCRIPT_COMPACTION", "light")
+compaction_levels = {
+    endpoint: os.getenv(f"{endpoint.upper()}_COMPACTION", TRANSCRIPT_COMPACTION)
+    for endpoint in ("agent_txt", "call_insight", "embedding")
+}
+for _endpoint, _level in compaction_levels.items():
+    if _level not in COMPACTION_LEVELS:
+        raise ValueError(f"Unknown transcript compaction level for {_endpoint}: {_level}")
+
+_TIMESTAMP = r"[\[(]?\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d+)?[\])]?"
+CUE_LINE = re.compile(rf"^\s*(?:WEBVTT.*|\d+|{_TIMESTAMP}\s*-->\s*{_TIMESTAMP}.*)\s*$")
+LEADING_TIMESTAMPS = re.compile(rf"^\s*(?:{_TIMESTAMP}\s*[-–|]?\s*)+(?=\S)")
+INLINE_TIMESTAMP = re.compile(r"\s*[\[(]\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d+)?[\])]")
+# "Ana: hola", or "Speaker 1 - hola" with a dash only after a numbered label, so text
+# like "Plan B - ..." is not taken for a speaker
+SPEAKER_LABEL = re.compile(r"^(?:([^\s:][^:\n]{0,40}?)\s*:|([^\W\d_]+ \d{1,3})\s[-–])\s+(.*)$")
+
+# Hesitations are always dropped. Discourse fillers only at the start of the line or of a
+# clause and set off by a comma ("Bueno, ..." / "..., you know."); words that are also
+# content words ("este", "well", "so", "like") are never treated as fillers.
+HESITATION = re.compile(r"(?<!\w)(?:e+h+|e+m+|m+h*m+|h+m+|a+h+|u+h+|u+m+|e+r+m+)(?!\w)[.…]*", re.IGNORECASE)
+_FILLER_PHRASES = r"o sea|pues|bueno|digamos|a ver|you know|I mean|basically"
+LEADING_FILLER = re.compile(rf"(^|[,.;!?¿¡]\s*)(?:{_FILLER_PHRASES})\s*,\s*", re.IGNORECASE)
+TRAILING_FILLER = re.compile(rf",\s*(?:{_FILLER_PHRASES})\s*(?=[.!?]|$)", re.IGNORECASE)
+# Repeated words separated by spaces only, and only words of letters: "4 4" and "No, no, no" stay
+STUTTER = re.compile(r"\b([^\W\d_]{2,})(?:\s+\1\b)+", re.IGNORECASE)
+SPACE_BEFORE_PUNCTUATION = re.compile(r"\s+([,.;:!?])")
+DANGLING_COMMA = re.compile(r"[,;]\s*(?=[,.;:!?])|^[\s,;.]+")
+EMPTY_QUESTION = re.compile(r"¿\s*\?|¡\s*!")
+NON_WORD = re.compile(r"[^\w\s]")
+WHITESPACE = re.compile(r"\s+")
+
+
+def _remove_fillers(text: str) -> str:
+    cleaned = HESITATION.sub("", text)
+    cleaned = LEADING_FILLER.sub(r"\1", cleaned)
+    cleaned = TRAILING_FILLER.sub("", cleaned)
+    cleaned = STUTTER.sub(r"\1", cleaned)
+    cleaned = EMPTY_QUESTION.sub("", cleaned)
+    cleaned = WHITESPACE.sub(" ", SPACE_BEFORE_PUNCTUATION.sub(r"\1", cleaned))
+    cleaned = DANGLING_COMMA.sub("", cleaned).strip()
+    if cleaned and text.lstrip()[:1].isupper():
+        cleaned = cleaned[0].upper() + cleaned[1:]
+    return cleaned
+
+
+def _extends(key: str, prefix: str) -> bool:
+    """Whether an utterance key is a partial ASR line (prefix) completed, cut at a word
+    boundary or long enough that a mid-word cut is not a coincidence ("sí" / "sin embargo")."""
+    return key.startswith(prefix) and (len(key) == len(prefix) or key[len(prefix)] == " " or len(prefix) >= 12)
+
+
+def _utterances(transcript: str):
+    """Yield (speaker or None, text) per line, without timestamps and cue lines."""
+    for line in transcript.splitlines():
+        if not line.strip() or CUE_LINE.match(line):
+            continue
+        line = INLINE_TIMESTAMP.sub("", LEADING_TIMESTAMPS.sub("", line))
+        match = SPEAKER_LABEL.match(line.strip())
+        if match:
+            yield WHITESPACE.sub(" ", match.group(1) or match.group(2)), match.group(3)
+        else:
+            yield None, line
+
+
+def compact_transcript(transcript: str, fillers: bool = True) -> str:
+    """Compact a transcript (see the compaction levels above); fillers=False is "light".
+    Lines without a speaker label continue the turn of the previous line. Only the line
+    right before is compared for partial results: an earlier "sí" or a restated number
+    in the same turn is content, not an ASR duplicate."""
+    turns = []  # [speaker, [(text, key), ...]]
+    for speaker, text in _utterances(transcript):
+        text = _remove_fillers(text) if fillers else WHITESPACE.sub(" ", text).strip()
+        key = WHITESPACE.sub(" ", NON_WORD.sub("", text.lower())).strip()
+        if not key:
+            continue
+        same_turn = turns and (speaker is None or (turns[-1][0] or "").lower() == speaker.lower())
+        if same_turn:
+            utterances = turns[-1][1]
+            if _extends(key, utterances[-1][1]):  # partial ASR result (or a repeat) followed by the final one
+                utterances[-1] = (text, key)
+            else:
+                utterances.append((text, key))
+        else:
+            turns.append([speaker, [(text, key)]])
+    lines = []
+    for speaker, utterances in turns:
+        text = " ".join(text for text, _ in utterances)
+        lines.append(f"{speaker}: {text}" if speaker else text)
+    return "\n".join(lines)
+
+
+def compact_for(endpoint: str, transcript: str) -> str:
+    """Compact a transcript with the level configured for an endpoint and count the tokens
+    before and after in teamtrack_transcript_tokens_total. Falls back to the original if
+    nothing would be left."""
+    level = compaction_levels.get(endpoint, TRANSCRIPT_COMPACTION)
+    if level == "off" or not transcript:
+        return transcript
+    compacted = compact_transcript(transcript, fillers=level == "full") or transcript
+    transcript_tokens.inc(endpoint, "raw", amount=estimate_tokens(transcript))
+    transcript_tokens.inc(endpoint, "compacted", amount=estimate_tokens(compacted))
+    return compacted
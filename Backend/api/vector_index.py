@@ -0,0 +1,283 @@
+import json
+import threading
+import time
+from collections import Counter, OrderedDict
+
+import numpy as np
+
+try:
+    import hnswlib  # optional, enables the approximate (HNSW) index
+except ImportError:
+    hnswlib = None
+
+
+def parse_embedding(value):
+    """PostgREST returns pgvector columns as a "[0.1,0.2,...]" string."""
+    if isinstance(value, str):
+        value = json.loads(value)
+    return np.asarray(value, dtype=np.float32)
+
+
+def normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class ProjectIndex:
+    """Cosine-similarity index over the call embeddings of one project.
+
+    Brute force is a matrix-vector product over L2-normalized vectors. With
+    coarse_dims set, the scan uses only the first coarse_dims dimensions of each
+    embedding (renormalized; text-embedding-3 vectors keep their meaning when
+    shortened) and the best candidates are re-ranked with the full vectors,
+    which are then stored as float16. That cuts the bytes scanned per query
+    ~6x for 1536-dim embeddings. Appends grow the matrices geometrically.
+    With use_ann and hnswlib installed, projects with at least ann_min_size
+    vectors are searched with an HNSW graph instead.
+    """
+
+    def __init__(self, project_id, call_ids, vectors, coarse_dims=256, use_ann=False, ann_min_size=20000):
+        self.project_id = project_id
+        self.call_ids = []
+        self.coarse_dims = coarse_dims
+        self.use_ann = use_ann and hnswlib is not None
+        self.ann_min_size = ann_min_size
+        self.dim = None
+        self._full = None
+        self._coarse = None
+        self._size = 0
+        self._positions = {}
+        self._ann = None
+        self._lock = threading.Lock()
+        self.loaded_at = time.monotonic()
+        if len(vectors):
+            self._allocate(vectors.shape[1], len(vectors))
+            vectors = normalize(np.asarray(vectors, dtype=np.float32))
+            self._full[:] = vectors
+            if self._coarse is not None:
+                self._coarse[:] = normalize(vectors[:, :self.coarse_dims])
+            self.call_ids = list(call_ids)
+            self._positions = {call_id: i for i, call_id in enumerate(self.call_ids)}
+            self._size = len(self.call_ids)
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def nbytes(self):
+        return sum(m.nbytes for m in (self._full, self._coarse) if m is not None)
+
+    def _allocate(self, dim, capacity):
+        self.dim = dim
+        use_coarse = 0 < self.coarse_dims < dim
+        self._full = np.empty((capacity, dim), dtype=np.float16 if use_coarse else np.float32)
+        self._coarse = np.empty((capacity, self.coarse_dims), dtype=np.float32) if use_coarse else None
+
+    def _grow(self):
+        capacity = max(16, len(self._full) * 3 // 2)
+        for name in ("_full", "_coarse"):
+            matrix = getattr(self, name)
+            if matrix is not None:
+                grown = np.empty((capacity, matrix.shape[1]), dtype=matrix.dtype)
+                grown[:self._size] = matrix[:self._size]
+                setattr(self, name, grown)
+
+    def _write(self, position, vector):
+        vector = normalize(np.asarray(vector, dtype=np.float32))
+        self._full[position] = vector
+        if self._coarse is not None:
+            self._coarse[position] = normalize(vector[:self.coarse_dims])
+        return vector
+
+    def _append(self, call_id, vector):
+        if self._size == len(self._full):
+            self._grow()
+        vector = self._write(self._size, vector)
+        self._positions[call_id] = self._size
+        self.call_ids.append(call_id)
+        self._size += 1
+        return vector
+
+    def add(self, call_id, vector):
+        with self._lock:
+            if call_id in self._positions:
+                self._write(self._positions[call_id], vector)
+                self._ann = None  # rebuilt on the next search
+                return
+            if self._full is None:
+                self._allocate(len(vector), 16)
+            vector = self._append(call_id, vector)
+            if self._ann is not None:
+                if self._ann.get_current_count() >= self._ann.get_max_elements():
+                    self._ann.resize_index(2 * self._ann.get_max_elements())
+                self._ann.add_items(vector[None, :], [self._size - 1])
+
+    def _build_ann(self):
+        index = hnswlib.Index(space="ip", dim=self.dim)
+        index.init_index(max_elements=max(2 * self._size, 1024), ef_construction=200, M=16)
+        index.add_items(self._full[:self._size].astype(np.float32), np.arange(self._size))
+        index.set_ef(64)
+        self._ann = index
+
+    @staticmethod
+    def _top(scores, k):
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top])]
+
+    def search(self, query, k=10):
+        """Return [(call_id, score)] of the k most similar calls; query must be normalized."""
+        with self._lock:
+            if self._size == 0:
+                return []
+            k = min(k, self._size)
+            if self.use_ann and self._size >= self.ann_min_size:
+                if self._ann is None:
+                    self._build_ann()
+                labels, distances = self._ann.knn_query(query, k=k)
+                return [(self.call_ids[i], float(1 - d)) for i, d in zip(labels[0], distances[0])]
+
+            if self._coarse is None:
+                scores = self._full[:self._size] @ query
+                return [(self.call_ids[i], float(scores[i])) for i in self._top(scores, k)]
+
+            # Coarse scan on the shortened vectors, exact re-rank of the candidates
+            coarse_scores = self._coarse[:self._size] @ normalize(query[:self.coarse_dims])
+            candidates = self._top(coarse_scores, min(self._size, max(10 * k, 100)))
+            scores = self._full[candidates].astype(np.float32) @ query
+            return [(self.call_ids[candidates[i]], float(scores[i])) for i in self._top(scores, k)]
+
+
+class VectorIndex:
+    """Per-project ProjectIndex objects, loaded on first use and evicted
+    least-recently-used first once the matrices use more than max_bytes.
+
+    add() only updates the index of this process. Embeddings written by other
+    workers, the async app or another host show up once the project is checked
+    again, ttl seconds after it was loaded. Projects used by a search in progress
+    are never evicted, so an organization whose matrices are bigger than max_bytes
+    is searched without reloading, but holds memory over the budget until other
+    projects are loaded: size max_bytes above the biggest organization.
+
+    Args:
+        loader (callable): project_id -> list of (call_id, embedding).
+        max_bytes (int): Memory budget for all loaded matrices.
+        coarse_dims (int): Dimensions used for the coarse scan, 0 scans the full vectors.
+        use_ann (bool): Use HNSW (hnswlib) for large projects.
+        ttl (float): Seconds after which a loaded project is checked against the database.
+        counter (callable, optional): project_id -> number of embeddings of the project.
+            A project older than ttl is reloaded only when its count changed; without a
+            counter it is reloaded every ttl seconds.
+    """
+
+    def __init__(self, loader, max_bytes=1 << 30, coarse_dims=256, use_ann=False, ann_min_size=20000,
+                 ttl=300, counter=None):
+        self.loader = loader
+        self.max_bytes = max_bytes
+        self.coarse_dims = coarse_dims
+        self.use_ann = use_ann
+        self.ann_min_size = ann_min_size
+        self.ttl = ttl
+        self.counter = counter
+        self._projects = OrderedDict()
+        self._pinned = Counter()  # project_id -> searches in progress that use it
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.reloads = 0
+        self.evictions = 0
+
+    def _load(self, project_id):
+        started = time.monotonic()
+        rows = self.loader(project_id)
+        call_ids = [call_id for call_id, _ in rows]
+        vectors = np.stack([parse_embedding(embedding) for _, embedding in rows]) if rows else np.empty((0, 0), dtype=np.float32)
+        index = ProjectIndex(project_id, call_ids, vectors, self.coarse_dims, self.use_ann, self.ann_min_size)
+        # Embeddings written while the rows were read may be missing: age from the start of the load
+        index.loaded_at = started
+        return index
+
+    def _evict(self, keep=None):
+        total = sum(index.nbytes for index in self._projects.values())
+        for project_id in list(self._projects):
+            if total <= self.max_bytes:
+                break
+            if project_id == keep or self._pinned[project_id]:
+                continue
+            total -= self._projects.pop(project_id).nbytes
+            self.evictions += 1
+
+    def _fresh(self, project_id, index):
+        if time.monotonic() - index.loaded_at <= self.ttl:
+            return True
+        if self.counter is not None and self.counter(project_id) == len(index):
+            index.loaded_at = time.monotonic()
+            return True
+        return False
+
+    def get(self, project_id):
+        with self._lock:
+            index = self._projects.get(project_id)
+            if index is not None:
+                self._projects.move_to_end(project_id)
+        if index is not None and self._fresh(project_id, index):
+            return index
+        # Load outside the lock, it is a network call
+        reload = index is not None
+        index = self._load(project_id)
+        with self._lock:
+            current = self._projects.get(project_id)
+            if current is None or current.loaded_at < index.loaded_at:
+                self._projects[project_id] = index
+            else:
+                index = current  # another thread loaded it meanwhile
+            self._projects.move_to_end(project_id)
+            self.loads += 1
+            self.reloads += reload
+            self._evict(keep=project_id)
+        return index
+
+    def add(self, project_id, call_id, embedding):
+        """Add a new embedding to an already loaded project (unloaded projects pick it up when loaded)."""
+        with self._lock:
+            index = self._projects.get(project_id)
+        if index is not None:
+            index.add(call_id, parse_embedding(embedding))
+            with self._lock:
+                self._evict(keep=project_id)
+
+    def invalidate(self, project_id):
+        with self._lock:
+            self._projects.pop(project_id, None)
+
+    def search(self, project_ids, query, k=10):
+        """Return [{"call_id", "project_id", "score"}] of the k best calls across the projects."""
+        query = normalize(parse_embedding(query))
+        project_ids = list(project_ids)
+        results = []
+        with self._lock:
+            self._pinned.update(project_ids)
+        try:
+            for project_id in project_ids:
+                results.extend(
+                    {"call_id": call_id, "project_id": project_id, "score": score}
+                    for call_id, score in self.get(project_id).search(query, k)
+                )
+        finally:
+            with self._lock:
+                self._pinned.subtract(project_ids)
+                self._pinned += Counter()  # drop the projects no search uses any more
+        results.sort(key=lambda result: result["score"], reverse=True)
+        return results[:k]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "projects": len(self._projects),
+                "vectors": sum(len(index) for index in self._projects.values()),
+                "bytes": sum(index.nbytes for index in self._projects.values()),
+                "max_bytes": self.max_bytes,
+                "loads": self.loads,
+                "reloads": self.reloads,
+                "evictions": self.evictions,
+                "ann": self.use_ann and hnswlib is not None,
+            }
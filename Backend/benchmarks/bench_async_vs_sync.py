@@ -0,0 +1,189 @@
+"""
+Load test /agent/txt on the sync Flask app against the async aiohttp app.
+
+Both apps talk to a local fake OpenAI server that answers every chat
+completion after --llm-latency seconds, so the numbers show how many slow LLM
+calls each design keeps in flight, not model speed. The Flask app runs on a
+WSGI server with a fixed pool of --sync-threads threads, like a gunicorn
+gthread worker (workers x threads); the async app runs on one event loop.
+The agent result cache is disabled and every request sends a different
+transcript. /agent/txt requires a user; the benchmark user is put in both
+apps' identity caches, so no Supabase is needed.
+
+Usage:
+    python bench_async_vs_sync.py [--requests 400] [--concurrency 200]
+                                  [--llm-latency 2] [--sync-threads 16]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector, web
+
+BENCH_USER_ID = "bench-user"
+BENCH_IDENTITY = (1, "employee")  # (organization_id, emp_role)
+
+FAKE_OPENAI_PORT = 8790
+SYNC_PORT = 8791
+ASYNC_PORT = 8792
+
+os.environ.update({
+    "OPENAI_BASE_URL": f"http://127.0.0.1:{FAKE_OPENAI_PORT}/v1",
+    "AGENT_CACHE_SIZE": "0",
+    "INSIGHT_JOB_WORKERS": "0",
+    "INSIGHT_JOB_DB": os.path.join(tempfile.mkdtemp(), "jobs.db"),
+})
+for name, value in (("OPENAI_API_KEY", "sk-test"), ("SUPABASE_URL", "http://127.0.0.1:9"), ("SUPABASE_KEY", "x.y.z")):
+    os.environ.setdefault(name, value)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+# One JSON object that satisfies every response model of agent.py
+FAKE_FIELDS = {
+    "title": "Reunión semanal", "summary": "Resumen", "importantTopics": ["avance"], "questions": [],
+    "decisions": ["entregar el lunes"], "improvingPoints": [], "positiveFeedback": [], "negativeFeedback": [],
+    "keywords": ["proyecto"], "nextSteps": ["enviar propuesta"], "subject": "Siguientes pasos", "body": "Hola",
+}
+
+
+def run_fake_openai(latency, ready):
+    content = dict(FAKE_FIELDS)
+    content["notes"] = {key: FAKE_FIELDS[key] for key in ("title", "summary", "importantTopics", "questions", "decisions")}
+    content["report"] = {key: FAKE_FIELDS[key] for key in ("improvingPoints", "positiveFeedback", "negativeFeedback", "keywords", "nextSteps")}
+    body = {
+        "id": "chatcmpl-bench", "object": "chat.completion", "created": 0, "model": "gpt-4o",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": json.dumps(content)}}],
+        "usage": {"prompt_tokens": 100, "completion_tokens": 50, "total_tokens": 150},
+    }
+
+    async def chat(request):
+        await request.read()
+        await asyncio.sleep(latency)
+        return web.json_response(body)
+
+    async def serve():
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", chat)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", FAKE_OPENAI_PORT, backlog=4096).start()
+        ready.set()
+        await asyncio.Event().wait()
+    asyncio.run(serve())
+
+
+class PooledWSGIServer(ThreadingMixIn, WSGIServer):
+    """WSGI server that handles connections on a fixed thread pool, like gunicorn's gthread worker."""
+    request_queue_size = 4096
+
+    def __init__(self, *args, threads=16, **kwargs):
+        self.pool = ThreadPoolExecutor(max_workers=threads)
+        super().__init__(*args, **kwargs)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def run_sync_app(threads, ready):
+    import main
+    main.identity_cache.ttl = float("inf")
+    main.identity_cache.set(BENCH_USER_ID, BENCH_IDENTITY)
+    server = make_server("127.0.0.1", SYNC_PORT, main.app, handler_class=QuietHandler,
+                         server_class=lambda *args, **kwargs: PooledWSGIServer(*args, threads=threads, **kwargs))
+    ready.set()
+    server.serve_forever()
+
+
+def run_async_app(ready):
+    import async_app
+    async_app.identity_cache.ttl = float("inf")
+    async_app.identity_cache.set(BENCH_USER_ID, BENCH_IDENTITY)
+
+    async def serve():
+        runner = web.AppRunner(await async_app.create_app(), access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", ASYNC_PORT, backlog=4096).start()
+        ready.set()
+        await asyncio.Event().wait()
+    asyncio.run(serve())
+
+
+def start(target, *args):
+    ready = threading.Event()
+    threading.Thread(target=target, args=(*args, ready), daemon=True).start()
+    ready.wait()
+
+
+async def load(port, requests, concurrency, label):
+    latencies, statuses = [], {}
+    queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(i)
+
+    async def user(session):
+        while not queue.empty():
+            i = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                async with session.post(f"http://127.0.0.1:{port}/agent/txt",
+                                        json={"user_id": BENCH_USER_ID,
+                                              "transcript": f"{label} {i}: Ana: ¿enviamos la propuesta el lunes?"}) as response:
+                    await response.read()
+                    status = response.status
+            except Exception as e:
+                status = type(e).__name__
+            statuses[status] = statuses.get(status, 0) + 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    connector = TCPConnector(limit=concurrency)
+    async with ClientSession(connector=connector, timeout=ClientTimeout(total=600)) as session:
+        await asyncio.gather(*(user(session) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "elapsed": elapsed,
+        "rps": requests / elapsed,
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "statuses": statuses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--llm-latency", type=float, default=2.0)
+    parser.add_argument("--sync-threads", type=int, default=16)
+    args = parser.parse_args()
+
+    start(run_fake_openai, args.llm_latency)
+    start(run_sync_app, args.sync_threads)
+    start(run_async_app)
+
+    print(f"{args.requests} requests, {args.concurrency} concurrent users, LLM latency {args.llm_latency:g}s "
+          f"(2 LLM calls per request)\n")
+    print(f"{'server':<22} {'seconds':>8} {'req/s':>7} {'p50 s':>7} {'p95 s':>7}  statuses")
+    for label, port in ((f"sync ({args.sync_threads} threads)", SYNC_PORT), ("async", ASYNC_PORT)):
+        result = asyncio.run(load(port, args.requests, args.concurrency, label))
+        print(f"{label:<22} {result['elapsed']:>8.1f} {result['rps']:>7.1f} {result['p50']:>7.2f} "
+              f"{result['p95']:>7.2f}  {result['statuses']}")
+
+
+if __name__ == "__main__":
+    main()
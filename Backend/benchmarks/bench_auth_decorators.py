@@ -0,0 +1,65 @@
+"""
+Benchmark the stacked (require_user + require_active_org) and fused
+(require_user_active_org) auth decorators against the configured Supabase.
+
+Each decorator wraps a no-op view. "cold" clears the identity and org-status
+caches before every call, so it measures the database round trips; "warm"
+keeps them. Needs SUPABASE_URL / SUPABASE_KEY (loaded from .env like the API)
+and the auth user id of an employee of an active organization.
+
+Usage:
+    python bench_auth_decorators.py <auth_user_id> [--iterations 50]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+import main  # noqa: E402
+
+
+def view():
+    return {"ok": True}, 200
+
+
+def measure(decorated, user_id, iterations, cold):
+    latencies = []
+    if cold:
+        main.identity_cache.clear()
+    for _ in range(iterations):
+        with main.app.test_request_context(json={"user_id": user_id}):
+            start = time.perf_counter()
+            body, status = decorated()
+            latencies.append((time.perf_counter() - start) * 1000)
+            if status != 200:
+                raise SystemExit(f"decorator returned {status}: {body}")
+            org_id = main.request.org_id
+        if cold:
+            main.identity_cache.clear()
+            main.org_status_cache.invalidate(org_id)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95)]
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("user_id", help="auth_user_id of an employee")
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    variants = {
+        "stacked": main.require_auth(main.require_active_org(view)),
+        "fused": main.require_active_auth(view),
+    }
+    print(f"{'decorator':<10} {'cache':<6} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, decorated in variants.items():
+        for cold in (True, False):
+            p50, p95 = measure(decorated, args.user_id, args.iterations, cold)
+            print(f"{name:<10} {'cold' if cold else 'warm':<6} {p50:>8.2f} {p95:>8.2f}")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,64 @@
+"""
+Benchmark the two insight modes against each other.
+
+    parallel: agentNotetaking + agentReport run concurrently (two LLM calls)
+    combined: agentInsight returns notes and report in one LLM call
+
+Reports wall-clock latency and prompt/completion tokens per mode.
+Needs OPENAI_API_KEY (loaded from .env like the API).
+
+Usage:
+    python bench_insight_modes.py transcript.txt [--runs 3]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+from agent import agentNotetaking, agentReport, agentInsight, agentExecutor  # noqa: E402
+
+
+def run_with_usage(agent, transcript):
+    response = agent.run(transcript)
+    metrics = response.metrics or {}
+    return sum(metrics.get("input_tokens", [])), sum(metrics.get("output_tokens", []))
+
+
+def run_parallel(transcript):
+    futures = [agentExecutor.submit(run_with_usage, agent, transcript) for agent in (agentNotetaking, agentReport)]
+    usages = [future.result() for future in futures]
+    return sum(u[0] for u in usages), sum(u[1] for u in usages)
+
+
+def run_combined(transcript):
+    return run_with_usage(agentInsight, transcript)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("transcript", help="Path to a transcript text file")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    with open(args.transcript, encoding="utf-8") as f:
+        transcript = f.read()
+
+    print(f"transcript: {len(transcript)} chars, {args.runs} runs per mode\n")
+    print(f"{'mode':<10} {'p50 s':>8} {'max s':>8} {'input tok':>10} {'output tok':>11}")
+    for mode, fn in (("parallel", run_parallel), ("combined", run_combined)):
+        latencies, inputs, outputs = [], [], []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            input_tokens, output_tokens = fn(transcript)
+            latencies.append(time.perf_counter() - start)
+            inputs.append(input_tokens)
+            outputs.append(output_tokens)
+        print(f"{mode:<10} {statistics.median(latencies):>8.2f} {max(latencies):>8.2f} "
+              f"{statistics.mean(inputs):>10.0f} {statistics.mean(outputs):>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark insight latency against transcript length, single pass vs map-reduce.
+
+The sample transcript is repeated until each target size (in tokens) is reached,
+then generateInsights runs once with map-reduce disabled and once enabled.
+The agent result cache is disabled so every run calls the model.
+Needs OPENAI_API_KEY (loaded from .env like the API).
+
+Usage:
+    python bench_map_reduce.py transcript.txt [--sizes 4000 16000 64000]
+                               [--chunk-tokens 4000] [--parallelism 4]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+import agent  # noqa: E402
+from cache import AgentResultCache  # noqa: E402
+from transcripts import chunk_transcript, estimate_tokens  # noqa: E402
+
+
+def build_transcript(sample, target_tokens):
+    sample_tokens = estimate_tokens(sample)
+    repeats = max(1, -(-target_tokens // sample_tokens))
+    return "\n".join([sample] * repeats)
+
+
+def timed_insights(transcript, map_reduce):
+    agent.LONG_TRANSCRIPT_TOKENS = 0 if map_reduce else float("inf")
+    start = time.perf_counter()
+    result = agent.generateInsights(transcript, "parallel")
+    return time.perf_counter() - start, result.get("errors")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("transcript", help="Path to a sample transcript text file")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4000, 16000, 64000])
+    parser.add_argument("--chunk-tokens", type=int, default=agent.TRANSCRIPT_CHUNK_TOKENS)
+    parser.add_argument("--parallelism", type=int, default=agent.TRANSCRIPT_MAP_PARALLELISM)
+    args = parser.parse_args()
+
+    with open(args.transcript, encoding="utf-8") as f:
+        sample = f.read()
+
+    agent.agentCache = AgentResultCache(maxsize=0)
+    agent.TRANSCRIPT_CHUNK_TOKENS = args.chunk_tokens
+    agent.TRANSCRIPT_MAP_PARALLELISM = args.parallelism
+
+    print(f"chunk size {args.chunk_tokens} tokens, parallelism {args.parallelism}\n")
+    print(f"{'tokens':>8} {'chunks':>7} {'single s':>9} {'map-reduce s':>13}  errors")
+    for size in args.sizes:
+        transcript = build_transcript(sample, size)
+        chunks = len(chunk_transcript(transcript, args.chunk_tokens))
+        single, single_errors = timed_insights(transcript, map_reduce=False)
+        reduced, reduced_errors = timed_insights(transcript, map_reduce=True)
+        errors = {k: v for k, v in (("single", single_errors), ("map-reduce", reduced_errors)) if v}
+        print(f"{estimate_tokens(transcript):>8} {chunks:>7} {single:>9.2f} {reduced:>13.2f}  {errors or ''}")
+
+
+if __name__ == "__main__":
+    main()
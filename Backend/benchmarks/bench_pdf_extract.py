@@ -0,0 +1,91 @@
+"""
+Benchmark PDF text extraction for /agent/pdf on 1, 50 and 500 page documents.
+
+Generates text-only PDFs with PyMuPDF and times the old temp-file extractor
+(write to disk, reopen, string +=), the in-memory extractor inline and the
+in-memory extractor with the process pool, plus a repeat upload served from
+the PdfTextCache. The agents that run afterwards are not included, their
+latency doesn't depend on the extractor.
+The pool only pays off with more than one CPU core.
+
+Usage:
+    python bench_pdf_extract.py [--pages 1 50 500] [--workers 4] [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import pymupdf
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+from cache import PdfTextCache  # noqa: E402
+from pdf_extract import PdfExtractor  # noqa: E402
+
+LINE = "Acuerdo: el equipo entrega el reporte de avance del proyecto cada viernes; follow-up on open tickets."
+
+
+def build_pdf(pages, lines_per_page=45):
+    doc = pymupdf.open()
+    for number in range(pages):
+        page = doc.new_page()
+        text = "\n".join(f"{number}.{i} {LINE}" for i in range(lines_per_page))
+        page.insert_textbox(pymupdf.Rect(36, 36, 576, 806), text, fontsize=9)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def legacy_extract(data):
+    text = ""
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp:
+        temp.write(data)
+        temp_path = temp.name
+    doc = pymupdf.open(temp_path)
+    for page in doc:
+        text += page.get_text()
+    doc.close()
+    os.unlink(temp_path)
+    return text
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    inline = PdfExtractor(workers=0)
+    pooled = PdfExtractor(workers=max(2, args.workers), parallel_min_pages=2)
+    pooled.extract(build_pdf(2))  # start the worker processes outside the timings
+    cached = PdfExtractor(workers=0, cache=PdfTextCache())
+
+    print(f"{os.cpu_count()} CPUs, pool of {pooled.workers} processes\n")
+    print(f"{'pages':>6} {'KB':>7} {'temp file ms':>13} {'in-memory ms':>13} {'pool ms':>9} {'cached ms':>10}")
+    for pages in args.pages:
+        data = build_pdf(pages)
+        legacy_ms, expected = timed(lambda: legacy_extract(data), args.repeat)
+        inline_ms, inline_result = timed(lambda: inline.extract(data), args.repeat)
+        pooled_ms, pooled_result = timed(lambda: pooled.extract(data), args.repeat)
+        cached.extract(data)
+        cached_ms, cached_result = timed(lambda: cached.extract(data), args.repeat)
+        assert inline_result["text"] == pooled_result["text"] == cached_result["text"] == expected
+        print(f"{pages:>6} {len(data) // 1024:>7} {legacy_ms:>13.2f} {inline_ms:>13.2f} {pooled_ms:>9.2f} {cached_ms:>10.2f}")
+    pooled.shutdown()
+
+
+if __name__ == "__main__":
+    main()
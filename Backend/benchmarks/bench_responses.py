@@ -0,0 +1,109 @@
+"""
+Benchmark JSON serialization CPU and bytes on the wire for the response layer.
+
+Builds a payload shaped like /employee/projects (projects with calls carrying
+full transcriptions and insight blobs) and compares the stdlib Flask JSON
+provider with the orjson provider, then the size and CPU cost of gzip and
+brotli (if installed) on the serialized body. Needs no external services.
+
+Usage:
+    python bench_responses.py [--projects 5] [--calls 20] [--transcript-words 6000]
+                              [--gzip-level 4] [--brotli-quality 4]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+from responses import OrjsonProvider, brotli, compress, orjson  # noqa: E402
+
+WORDS = (
+    "el cliente quiere revisar el presupuesto del proyecto antes de la próxima reunión "
+    "we need to follow up on the integration timeline and the open tickets "
+    "entonces acordamos enviar la propuesta actualizada el lunes "
+    "can you share the dashboard numbers from last quarter"
+).split()
+
+
+def transcript(rng, words):
+    lines, speakers = [], ("Ana", "Carlos", "Client")
+    while words > 0:
+        n = rng.randint(8, 40)
+        lines.append(f"{rng.choice(speakers)}: {' '.join(rng.choice(WORDS) for _ in range(n))}")
+        words -= n
+    return "\n".join(lines)
+
+
+def build_payload(projects, calls, transcript_words, seed=0):
+    rng = random.Random(seed)
+    return {"projects": [
+        {
+            "id": p,
+            "name": f"Project {p}",
+            "status": "active",
+            "calls": [
+                {
+                    "id": p * 1000 + c,
+                    "title": f"Weekly sync {c}",
+                    "transcription": transcript(rng, transcript_words),
+                    "insight": {
+                        "summary": " ".join(rng.choice(WORDS) for _ in range(120)),
+                        "keyPoints": [" ".join(rng.choice(WORDS) for _ in range(15)) for _ in range(8)],
+                        "nextSteps": [" ".join(rng.choice(WORDS) for _ in range(12)) for _ in range(5)],
+                    },
+                }
+                for c in range(calls)
+            ],
+        }
+        for p in range(projects)
+    ]}
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--projects", type=int, default=5)
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--transcript-words", type=int, default=6000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--gzip-level", type=int, default=4)
+    parser.add_argument("--brotli-quality", type=int, default=4)
+    args = parser.parse_args()
+
+    payload = build_payload(args.projects, args.calls, args.transcript_words)
+    app = Flask(__name__)
+    providers = [("stdlib", DefaultJSONProvider(app))]
+    if orjson is not None:
+        providers.append(("orjson", OrjsonProvider(app)))
+    else:
+        print("orjson is not installed, only the stdlib provider is measured")
+
+    print(f"{args.projects} projects x {args.calls} calls, ~{args.transcript_words} words per transcript\n")
+    print(f"{'provider':<10} {'encoding':<9} {'serialize ms':>13} {'compress ms':>12} {'bytes':>11}")
+    with app.app_context():
+        for name, provider in providers:
+            serialize_ms, response = timed(lambda: provider.response(payload), args.repeat)
+            body = response.get_data()
+            print(f"{name:<10} {'identity':<9} {serialize_ms:>13.2f} {'':>12} {len(body):>11,}")
+            for encoding in ("gzip", "br") if brotli is not None else ("gzip",):
+                compress_ms, compressed = timed(lambda: compress(body, encoding, args.gzip_level, args.brotli_quality), args.repeat)
+                print(f"{name:<10} {encoding:<9} {serialize_ms:>13.2f} {compress_ms:>12.2f} {len(compressed):>11,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Benchmark transcript compaction: tokens saved against fidelity.
+
+Builds meeting transcripts of real sizes (--minutes, about 150 spoken words a
+minute) from a clean reference, then adds what the Vapi / Chrome extension
+capture produces: timestamps, one speaker label per line, partial ASR lines
+before the final one, fillers in Spanish and English, stutters and extra
+whitespace. Each noisy transcript is compacted at the "light" and "full"
+levels and the report shows, per level:
+
+- tokens of the noisy transcript and after compaction, and the share saved;
+- milliseconds to compact;
+- recall: share of the reference words still in the compacted text (content
+  that compaction must not drop);
+- noise: share of the compacted words that are not in the reference (fillers
+  and duplicates left over).
+
+With --insights, generateInsights also runs on the noisy and the compacted
+transcript (needs OPENAI_API_KEY, the agent result cache is disabled) and the
+overlap of the words of both results is reported: 1.0 means the notes and
+report say the same thing.
+
+Real transcripts can be given as files; they have no reference, so only the
+token counts and times are shown for them.
+
+Usage:
+    python bench_transcript_compaction.py [transcript.txt ...] [--minutes 15 30 60 90] [--seed 1] [--insights]
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+from transcripts import compact_transcript, estimate_tokens  # noqa: E402
+
+SPEAKERS = ["Ana", "Luis", "María", "Jorge", "Sofía"]
+SUBJECTS = ["la propuesta comercial", "el presupuesto del trimestre", "la entrega del reporte", "los tickets abiertos",
+            "la migración a la nube", "el plan de capacitación", "la renovación del contrato", "the product roadmap",
+            "the customer onboarding", "the quarterly review"]
+SENTENCES = [
+    "¿Cómo vamos con {subject}?",
+    "Creo que podemos cerrar {subject} antes del viernes.",
+    "Necesitamos revisar {subject} con el cliente la próxima semana.",
+    "La verdad {subject} sigue pendiente porque faltan datos de ventas.",
+    "Entonces acordamos enviar {subject} el lunes por la mañana.",
+    "Yo me encargo de {subject} y les comparto el avance.",
+    "I think {subject} needs another review before we send it.",
+    "We agreed to move {subject} to next sprint.",
+    "Can someone share the numbers for {subject}?",
+]
+FILLERS = ["eh,", "mmm,", "este,", "o sea,", "bueno,", "pues,", "um,", "uh,", "you know,", "like,", "I mean,"]
+WORD = re.compile(r"\w+")
+
+
+def reference_transcript(rng, words):
+    """Clean transcript of about `words` words: speaker turns of one to four sentences."""
+    turns, count = [], 0
+    speakers = rng.sample(SPEAKERS, rng.randint(2, len(SPEAKERS)))
+    previous = None
+    while count < words:
+        speaker = rng.choice([s for s in speakers if s != previous])
+        # a speaker doesn't say the same sentence twice in a row; compaction drops such repeats as ASR duplicates
+        sentences = list(dict.fromkeys(rng.choice(SENTENCES).format(subject=rng.choice(SUBJECTS)) for _ in range(rng.randint(1, 4))))
+        turns.append((speaker, sentences))
+        count += sum(len(sentence.split()) for sentence in sentences)
+        previous = speaker
+    return turns
+
+
+def noisy(rng, sentence):
+    """A sentence as ASR writes it: fillers and a stutter now and then."""
+    words = sentence.split()
+    out = []
+    for word in words:
+        if rng.random() < 0.08:
+            out.append(rng.choice(FILLERS))
+        if rng.random() < 0.03:
+            out.append(word)  # stutter
+        out.append(word)
+    if rng.random() < 0.15:
+        out.insert(0, rng.choice(FILLERS).capitalize())
+    return "  ".join(out) if rng.random() < 0.1 else " ".join(out)
+
+
+def capture(rng, turns):
+    """The noisy capture of a reference: timestamped, one labeled line per sentence,
+    with partial ASR lines before some of them."""
+    lines, seconds = [], 0
+    for speaker, sentences in turns:
+        for sentence in sentences:
+            text = noisy(rng, sentence)
+            words = text.split()
+            if len(words) > 4 and rng.random() < 0.3:
+                for cut in sorted(rng.sample(range(2, len(words)), min(2, len(words) - 2))):
+                    lines.append(f"[{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}] {speaker}: {' '.join(words[:cut])}")
+                    seconds += 1
+            lines.append(f"[{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}] {speaker}: {text}")
+            seconds += rng.randint(2, 8)
+    return "\n".join(lines)
+
+
+def words(text):
+    return Counter(word.lower() for word in WORD.findall(text))
+
+
+def fidelity(reference, compacted):
+    """(recall, noise) of the compacted text against the clean reference, over words."""
+    expected, got = words(reference), words(compacted)
+    kept = sum((expected & got).values())
+    return kept / max(1, sum(expected.values())), 1 - kept / max(1, sum(got.values()))
+
+
+def insight_overlap(raw, compacted):
+    """Word overlap (Jaccard) of the insights generated from both transcripts."""
+    import agent
+    from cache import AgentResultCache
+    agent.agentCache = AgentResultCache(maxsize=0)
+    results = [agent.generateInsights(text, "parallel") for text in (raw, compacted)]
+    sets = [set(words(json.dumps({k: v for k, v in result.items() if k != "errors"}, ensure_ascii=False))) for result in results]
+    return len(sets[0] & sets[1]) / max(1, len(sets[0] | sets[1]))
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("transcripts", nargs="*", help="Real transcript files (no fidelity numbers)")
+    parser.add_argument("--minutes", type=int, nargs="+", default=[15, 30, 60, 90])
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--insights", action="store_true", help="Also compare generateInsights on raw and compacted")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    samples = []
+    for minutes in args.minutes:
+        turns = reference_transcript(rng, minutes * 150)
+        reference = "\n".join(f"{speaker}: {' '.join(sentences)}" for speaker, sentences in turns)
+        samples.append((f"synthetic {minutes} min", capture(rng, turns), reference))
+    for path in args.transcripts:
+        with open(path, encoding="utf-8") as f:
+            samples.append((os.path.basename(path), f.read(), None))
+
+    print(f"{'transcript':<22} {'level':<6} {'tokens':>8} {'compacted':>10} {'saved':>7} {'ms':>7} {'recall':>7} {'noise':>7}"
+          + (f" {'insights':>9}" if args.insights else ""))
+    for name, raw, reference in samples:
+        raw_tokens = estimate_tokens(raw)
+        for level in ("light", "full"):
+            compacted, ms = timed(compact_transcript, raw, fillers=level == "full")
+            tokens = estimate_tokens(compacted)
+            line = f"{name:<22} {level:<6} {raw_tokens:>8} {tokens:>10} {1 - tokens / raw_tokens:>7.1%} {ms:>7.1f}"
+            if reference is not None:
+                recall, noise = fidelity(reference, compacted)
+                line += f" {recall:>7.1%} {noise:>7.1%}"
+            else:
+                line += f" {'-':>7} {'-':>7}"
+            if args.insights:
+                line += f" {insight_overlap(raw, compacted):>9.2f}"
+            print(line)
+        if reference is not None:
+            recall, noise = fidelity(reference, raw)
+            print(f"{name:<22} {'raw':<6} {raw_tokens:>8} {'':>10} {'':>7} {'':>7} {recall:>7.1%} {noise:>7.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark semantic search query latency of the in-process vector index.
+
+Builds one project with N random 1536-dim embeddings and times queries for the
+exact scan, the coarse scan + re-rank and (if hnswlib is installed) HNSW.
+Random vectors have no structure in their leading dimensions, so the recall
+printed for the coarse scan is a lower bound of what real embeddings get.
+
+Usage:
+    python bench_vector_index.py [--size 100000] [--dim 1536] [--queries 50]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+from vector_index import VectorIndex, hnswlib, normalize  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.size, args.dim)).astype(np.float32)
+    rows = list(zip(range(args.size), vectors))
+    queries = [vectors[i] + 0.5 * rng.standard_normal(args.dim).astype(np.float32)
+               for i in rng.integers(0, args.size, args.queries)]
+    exact_scores = normalize(vectors) @ normalize(np.stack(queries)).T
+
+    variants = [("exact", dict(coarse_dims=0)), ("coarse-256", dict(coarse_dims=256))]
+    if hnswlib is not None:
+        variants.append(("hnsw", dict(coarse_dims=0, use_ann=True, ann_min_size=0)))
+
+    print(f"{args.size} vectors x {args.dim} dims, k={args.k}\n")
+    print(f"{'index':<12} {'load s':>7} {'MB':>7} {'p50 ms':>8} {'p99 ms':>8} {'recall':>7}")
+    for name, options in variants:
+        index = VectorIndex(lambda _: rows, max_bytes=1 << 40, **options)
+        start = time.perf_counter()
+        index.get("project")
+        index.search(["project"], queries[0], args.k)  # builds the HNSW graph if enabled
+        load = time.perf_counter() - start
+
+        latencies, recalls = [], []
+        for i, query in enumerate(queries):
+            start = time.perf_counter()
+            results = index.search(["project"], query, args.k)
+            latencies.append((time.perf_counter() - start) * 1000)
+            expected = set(np.argsort(-exact_scores[:, i])[:args.k])
+            recalls.append(len(expected & {r["call_id"] for r in results}) / args.k)
+
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"{name:<12} {load:>7.2f} {index.stats()['bytes'] / 2**20:>7.0f} "
+              f"{statistics.median(latencies):>8.2f} {p99:>8.2f} {statistics.mean(recalls):>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
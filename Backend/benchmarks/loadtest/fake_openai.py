@@ -0,0 +1,141 @@
+"""
+Fake OpenAI API for the load test, on aiohttp.
+
+Answers chat completions (plain and streamed) and embeddings after --latency
+seconds (+/- --jitter). The completion is one JSON object that satisfies every
+response model of agent.py; streamed completions send an email text in a few
+chunks followed by a usage chunk, like the real API with include_usage.
+Embeddings come from seed.embedding_for, so a query for a seeded transcript
+finds its call. Prompt tokens are estimated as characters / 4.
+
+GET /__stats returns the number of requests per endpoint and the token totals.
+
+Usage:
+    python fake_openai.py [--port 8802] [--latency 0.5] [--jitter 0.2] [--embedding-dims 1536]
+"""
+import argparse
+import asyncio
+import base64
+import json
+import random
+import struct
+from collections import Counter
+
+from aiohttp import web
+
+import seed
+
+# One JSON object that satisfies every response model of agent.py
+FAKE_FIELDS = {
+    "title": "Reunión semanal", "summary": "Resumen", "importantTopics": ["avance"], "questions": [],
+    "decisions": ["entregar el lunes"], "improvingPoints": [], "positiveFeedback": [], "negativeFeedback": [],
+    "keywords": ["proyecto"], "nextSteps": ["enviar propuesta"], "subject": "Siguientes pasos", "body": "Hola",
+}
+FAKE_CONTENT = dict(FAKE_FIELDS)
+FAKE_CONTENT["notes"] = {key: FAKE_FIELDS[key] for key in ("title", "summary", "importantTopics", "questions", "decisions")}
+FAKE_CONTENT["report"] = {key: FAKE_FIELDS[key] for key in ("improvingPoints", "positiveFeedback", "negativeFeedback", "keywords", "nextSteps")}
+STREAM_CHUNKS = ["Siguientes pasos", "\nHola equipo,", " les comparto", " los acuerdos de la reunión."]
+
+
+def count_tokens(text):
+    return max(1, len(text) // 4)
+
+
+def message_text(message):
+    content = message.get("content") or ""
+    if isinstance(content, list):  # content parts
+        return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content
+
+
+def create_app(latency=0.5, jitter=0.2, embedding_dims=1536):
+    stats = Counter()
+    rng = random.Random()
+
+    async def wait():
+        if latency:
+            await asyncio.sleep(latency * (1 + rng.uniform(-jitter, jitter)))
+
+    async def chat(request):
+        body = await request.json()
+        prompt_tokens = sum(count_tokens(message_text(message)) for message in body.get("messages", []))
+        stats["chat"] += 1
+        stats["prompt_tokens"] += prompt_tokens
+        await wait()
+
+        if not body.get("stream"):
+            content = json.dumps(FAKE_CONTENT, ensure_ascii=False)
+            completion_tokens = count_tokens(content)
+            stats["completion_tokens"] += completion_tokens
+            return web.json_response({
+                "id": "chatcmpl-loadtest", "object": "chat.completion", "created": 0, "model": body.get("model", "gpt-4o"),
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                          "total_tokens": prompt_tokens + completion_tokens},
+            })
+
+        stats["chat_stream"] += 1
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+
+        async def send(choices, usage=None):
+            chunk = {"id": "chatcmpl-loadtest", "object": "chat.completion.chunk", "created": 0,
+                     "model": body.get("model", "gpt-4o"), "choices": choices, "usage": usage}
+            await response.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode())
+
+        for text in STREAM_CHUNKS:
+            await send([{"index": 0, "delta": {"role": "assistant", "content": text}, "finish_reason": None}])
+            await asyncio.sleep(latency / 10 if latency else 0)
+        await send([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        completion_tokens = count_tokens("".join(STREAM_CHUNKS))
+        stats["completion_tokens"] += completion_tokens
+        if (body.get("stream_options") or {}).get("include_usage"):
+            await send([], {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                            "total_tokens": prompt_tokens + completion_tokens})
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def embeddings(request):
+        body = await request.json()
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        dims = body.get("dimensions") or embedding_dims
+        prompt_tokens = sum(count_tokens(text) for text in inputs)
+        stats["embeddings"] += 1
+        stats["embedding_inputs"] += len(inputs)
+        stats["prompt_tokens"] += prompt_tokens
+        await wait()
+
+        data = []
+        for index, text in enumerate(inputs):
+            vector = seed.embedding_for(text, dims)
+            if body.get("encoding_format") == "base64":
+                # the openai client asks for base64 float32 unless encoding_format is given
+                vector = base64.b64encode(struct.pack(f"<{len(vector)}f", *vector)).decode()
+            data.append({"object": "embedding", "index": index, "embedding": vector})
+        return web.json_response({"object": "list", "model": body.get("model"), "data": data,
+                                  "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens}})
+
+    async def get_stats(request):
+        return web.json_response(dict(stats))
+
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app.router.add_post("/v1/chat/completions", chat)
+    app.router.add_post("/v1/embeddings", embeddings)
+    app.router.add_get("/__stats", get_stats)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8802)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds per completion or embeddings request")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Latency varies by +/- this fraction")
+    parser.add_argument("--embedding-dims", type=int, default=1536)
+    args = parser.parse_args()
+    web.run_app(create_app(args.latency, args.jitter, args.embedding_dims), host="127.0.0.1", port=args.port,
+                access_log=None, print=None)
+
+
+if __name__ == "__main__":
+    main()
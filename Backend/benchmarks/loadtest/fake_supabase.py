@@ -0,0 +1,277 @@
+"""
+Fake Supabase (PostgREST + GoTrue) for the load test, on aiohttp.
+
+Serves the subset of PostgREST that main.py uses from the seed.py tables, in
+memory: select with column lists and one level of embedded resources
+(organization(is_active)), eq/neq/gt/gte/lt/lte/in/is filters, order, limit,
+offset, insert, update, delete and the get_latest_call rpc. /auth/v1/signup
+returns a new user. Every answer waits --latency seconds (+/- --jitter), like a
+round trip to a hosted database.
+
+GET /__stats returns the number of requests per kind and table, which run.py
+reads to count upstream round trips per API request.
+
+Usage:
+    python fake_supabase.py [--port 8801] [--latency 0.005] [--jitter 0.2] [--seed 1] [--orgs 5] ...
+"""
+import argparse
+import asyncio
+import csv
+import random
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+
+from aiohttp import web
+
+import seed
+
+OPERATORS = {
+    "eq": lambda value, arg: compare(value, arg) == 0,
+    "neq": lambda value, arg: compare(value, arg) != 0,
+    "gt": lambda value, arg: compare(value, arg) > 0,
+    "gte": lambda value, arg: compare(value, arg) >= 0,
+    "lt": lambda value, arg: compare(value, arg) < 0,
+    "lte": lambda value, arg: compare(value, arg) <= 0,
+    "in": lambda value, arg: any(compare(value, item) == 0 for item in parse_list(arg)),
+    "is": lambda value, arg: (value is None) if arg == "null" else str(value).lower() == arg,
+}
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+
+def compare(value, arg):
+    """Compare a row value with a filter argument from the query string (always text)."""
+    if value is None:
+        return -1
+    if isinstance(value, bool):
+        value, arg = str(value).lower(), arg.lower()
+    elif isinstance(value, (int, float)):
+        try:
+            arg = type(value)(arg)
+        except ValueError:
+            value = str(value)
+    else:
+        value = str(value)
+    return (value > arg) - (value < arg)
+
+
+def parse_list(arg):
+    """in.(1,2,"a,b") -> ["1", "2", "a,b"]"""
+    return next(csv.reader([arg.strip("()")], quotechar='"')) if arg.strip("()") else []
+
+
+def split_top_level(text):
+    """Split a select list on commas outside parentheses."""
+    parts, depth, current = [], 0, ""
+    for char in text:
+        if char == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        depth += char == "("
+        depth -= char == ")"
+        current += char
+    if current:
+        parts.append(current)
+    return [part.strip() for part in parts if part.strip()]
+
+
+class Database:
+    def __init__(self, tables):
+        self.tables = tables
+        self.next_ids = {name: len(rows) + 1 for name, rows in tables.items()}
+
+    def project(self, table, row, select):
+        if not select or select == "*":
+            return dict(row)
+        result = {}
+        for column in split_top_level(select):
+            if "(" in column:
+                relation, _, columns = column.partition("(")
+                result[relation] = self.embed(table, row, relation, columns.rstrip(")"))
+            elif column == "*":
+                result.update(row)
+            else:
+                result[column] = row.get(column)
+        return result
+
+    def embed(self, table, row, relation, columns):
+        rows = self.tables.get(relation, [])
+        foreign_key = f"{relation}_id"
+        if foreign_key in row:  # many-to-one, e.g. employee.organization_id -> organization
+            match = next((other for other in rows if other["id"] == row[foreign_key]), None)
+            return self.project(relation, match, columns) if match else None
+        # one-to-many, e.g. project -> subclient.project_id
+        return [self.project(relation, other, columns) for other in rows if other.get(f"{table}_id") == row["id"]]
+
+    def filtered(self, table, query):
+        rows = self.tables[table]
+        for column, expression in query.items():
+            if column in RESERVED_PARAMS:
+                continue
+            operator, _, arg = expression.partition(".")
+            if operator == "not":
+                operator, _, arg = arg.partition(".")
+                check = OPERATORS[operator]
+                rows = [row for row in rows if not check(row.get(column), arg)]
+            else:
+                check = OPERATORS[operator]
+                rows = [row for row in rows if check(row.get(column), arg)]
+        return rows
+
+    def select(self, table, query):
+        rows = list(self.filtered(table, query))
+        for term in reversed(query.get("order", "").split(",") if query.get("order") else []):
+            column, *modifiers = term.split(".")
+            rows.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse="desc" in modifiers)
+        offset = int(query.get("offset", 0))
+        limit = query.get("limit")
+        rows = rows[offset:offset + int(limit)] if limit is not None else rows[offset:]
+        return [self.project(table, row, query.get("select")) for row in rows]
+
+    def insert(self, table, body):
+        created = []
+        for values in body if isinstance(body, list) else [body]:
+            row = {"created_at": datetime.now(timezone.utc).isoformat(), **values}
+            if "id" not in row:
+                row["id"] = self.next_ids[table]
+                self.next_ids[table] += 1
+            self.tables[table].append(row)
+            created.append(dict(row))
+        return created
+
+    def upsert(self, table, body, on_conflict):
+        """Insert rows, or update the row with the same values in the on_conflict columns."""
+        columns = on_conflict.split(",")
+        saved = []
+        for values in body if isinstance(body, list) else [body]:
+            row = next((row for row in self.tables[table] if all(row.get(c) == values.get(c) for c in columns)), None)
+            if row is None:
+                saved.extend(self.insert(table, values))
+            else:
+                row.update(values)
+                saved.append(dict(row))
+        return saved
+
+    def update(self, table, query, values):
+        rows = self.filtered(table, query)
+        for row in rows:
+            row.update(values)
+        return [dict(row) for row in rows]
+
+    def delete(self, table, query):
+        doomed = {id(row) for row in self.filtered(table, query)}
+        removed = [dict(row) for row in self.tables[table] if id(row) in doomed]
+        self.tables[table] = [row for row in self.tables[table] if id(row) not in doomed]
+        return removed
+
+    def get_latest_call(self, auth_uid):
+        employee = next((row for row in self.tables["employee"] if row.get("auth_user_id") == auth_uid), None)
+        if employee is None:
+            return []
+        calls = [call for call in self.tables["call"] if call.get("employee_id") == employee["id"]]
+        latest = max(calls, key=lambda call: call.get("datetime") or "", default=None)
+        return [{"call_id": latest["id"]}] if latest else []
+
+
+def create_app(db, latency=0.005, jitter=0.2):
+    stats = Counter()
+    rng = random.Random()
+
+    async def wait():
+        if latency:
+            await asyncio.sleep(latency * (1 + rng.uniform(-jitter, jitter)))
+
+    def error(status, message):
+        return web.json_response({"message": message, "code": str(status), "details": None, "hint": None}, status=status)
+
+    async def rest(request):
+        table = request.match_info["table"]
+        stats["rest"] += 1
+        stats[f"{request.method.lower()} {table}"] += 1
+        await wait()
+        if table not in db.tables:
+            return error(404, f'relation "public.{table}" does not exist')
+        query = dict(request.query)
+        try:
+            if request.method in ("GET", "HEAD"):
+                rows = db.select(table, query)
+                headers = {}
+                if "count=" in request.headers.get("Prefer", ""):
+                    total = len(db.filtered(table, query))
+                    headers["Content-Range"] = f"0-{len(rows) - 1}/{total}" if rows else f"*/{total}"
+                return web.json_response(rows, headers=headers)
+            body = await request.json() if request.can_read_body else None
+            if request.method == "POST" and "merge-duplicates" in request.headers.get("Prefer", ""):
+                return web.json_response(db.upsert(table, body, query.get("on_conflict", "id")), status=201)
+            if request.method == "POST":
+                return web.json_response(db.insert(table, body), status=201)
+            if request.method == "PATCH":
+                return web.json_response(db.update(table, query, body or {}))
+            if request.method == "DELETE":
+                return web.json_response(db.delete(table, query))
+        except (KeyError, ValueError) as e:
+            return error(400, f"Bad request: {e}")
+        return error(405, "Method not allowed")
+
+    async def rpc(request):
+        function = request.match_info["function"]
+        stats["rpc"] += 1
+        stats[f"rpc {function}"] += 1
+        await wait()
+        body = await request.json() if request.can_read_body else {}
+        if function == "get_latest_call":
+            return web.json_response(db.get_latest_call(body.get("auth_uid")))
+        return error(404, f"Could not find the function public.{function}")
+
+    async def signup(request):
+        stats["auth"] += 1
+        stats["auth signup"] += 1
+        await wait()
+        body = await request.json()
+        now = datetime.now(timezone.utc).isoformat()
+        return web.json_response({
+            "id": str(uuid.uuid4()), "aud": "authenticated", "role": "authenticated", "email": body.get("email"),
+            "app_metadata": {"provider": "email"}, "user_metadata": {}, "created_at": now, "updated_at": now,
+        })
+
+    async def get_stats(request):
+        return web.json_response(dict(stats))
+
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app.router.add_get("/__stats", get_stats)
+    app.router.add_route("*", "/rest/v1/rpc/{function}", rpc)
+    app.router.add_route("*", "/rest/v1/{table}", rest)
+    app.router.add_post("/auth/v1/signup", signup)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8801)
+    parser.add_argument("--latency", type=float, default=0.005, help="Seconds per round trip")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Latency varies by +/- this fraction")
+    add_seed_arguments(parser)
+    args = parser.parse_args()
+
+    tables, _ = seed.build(**seed_options(args))
+    web.run_app(create_app(Database(tables), args.latency, args.jitter), host="127.0.0.1", port=args.port,
+                access_log=None, print=None)
+
+
+def add_seed_arguments(parser):
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--orgs", type=int, default=5)
+    parser.add_argument("--employees", type=int, default=20, help="Per organization")
+    parser.add_argument("--projects", type=int, default=20, help="Per organization")
+    parser.add_argument("--calls", type=int, default=10, help="Per project")
+    parser.add_argument("--embedding-dims", type=int, default=1536)
+
+
+def seed_options(args):
+    return {"seed": args.seed, "orgs": args.orgs, "employees": args.employees, "projects": args.projects,
+            "calls": args.calls, "embedding_dims": args.embedding_dims}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""
+End-to-end load test of main.app against a fake Supabase and a fake OpenAI.
+
+Starts fake_supabase.py, fake_openai.py and serve_app.py as subprocesses (the
+app with SUPABASE_URL and OPENAI_BASE_URL pointing at the fakes), then:
+
+1. warm-up: one request per seeded user and every scenario once, to fill the
+   identity/org caches like a running server;
+2. calibration: every scenario --calibrate times, one request at a time,
+   counting the requests each one makes to the fakes (from their /__stats,
+   after the counters settle, so work done by background jobs is included).
+   Read requests are sent twice and the second one is counted;
+3. load: --requests requests from --concurrency concurrent users, picking
+   scenarios by weight (see scenarios.py).
+
+The report has the throughput and, per endpoint, the number of requests,
+errors, p50/p95/p99 latency and the database (PostgREST, rpc and auth) and
+LLM (chat and embeddings) round trips per request. The round trip counts are
+the steady state of each route, so an extra query in a decorator or an N+1
+loop shows up as a higher number even when the fakes are fast.
+
+--json writes the report to a file. --baseline compares with an earlier
+--json report and exits with status 1 if an endpoint makes more round trips
+or its p95 grew by more than --max-p95-regression.
+
+Usage:
+    python run.py [--requests 2000] [--concurrency 50] [--db-latency 0.005] [--llm-latency 0.5]
+                  [--threads 16] [--scenarios employee_projects,call_insight] [--kinds read,write,llm]
+                  [--json report.json] [--baseline baseline.json] [--max-p95-regression 0.25]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+from aiohttp import ClientSession, ClientTimeout, FormData, TCPConnector
+
+import fake_supabase
+import scenarios
+import seed
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DB_COUNTERS = ("rest", "rpc", "auth")
+LLM_COUNTERS = ("chat", "embeddings")
+
+
+def start_process(script, *args, env=None, log_dir=None):
+    """Start a script of this directory; its stderr goes to <log_dir>/<script>.log."""
+    log = open(os.path.join(log_dir, f"{script}.log"), "w")
+    process = subprocess.Popen([sys.executable, os.path.join(HERE, script), *map(str, args)], env=env,
+                               stdout=subprocess.DEVNULL, stderr=log)
+    process.log_path = log.name
+    log.close()
+    return process
+
+
+async def wait_until_up(session, url, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            with open(process.log_path) as log:
+                raise RuntimeError(f"{url} exited with {process.returncode}:\n{log.read()}")
+        try:
+            async with session.get(url) as response:
+                await response.read()
+                return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not start in {timeout}s")
+
+
+async def send(session, base_url, request):
+    """Send a scenarios.Request and read the whole body. Returns (status, body); status is
+    the exception name if the request failed."""
+    options = {"params": request.params, "headers": request.headers}
+    if request.form is not None:
+        form = FormData()
+        for name, value in request.form.items():
+            if isinstance(value, tuple):
+                filename, content, content_type = value
+                form.add_field(name, content, filename=filename, content_type=content_type)
+            else:
+                form.add_field(name, value)
+        options["data"] = form
+    elif request.json is not None:
+        options["json"] = request.json
+    try:
+        async with session.request(request.method, base_url + request.path, **options) as response:
+            return response.status, await response.read()
+    except Exception as e:
+        return type(e).__name__, b""
+
+
+class Upstreams:
+    """Reads the request counters of both fakes."""
+
+    def __init__(self, session, supabase_url, openai_url):
+        self.session = session
+        self.urls = {"db": f"{supabase_url}/__stats", "llm": f"{openai_url}/__stats"}
+
+    async def snapshot(self):
+        stats = {}
+        for name, url in self.urls.items():
+            async with self.session.get(url) as response:
+                stats[name] = await response.json()
+        return stats
+
+    async def settled(self, quiet):
+        """Snapshot once nothing changed for `quiet` seconds."""
+        previous = await self.snapshot()
+        while True:
+            await asyncio.sleep(quiet)
+            current = await self.snapshot()
+            if current == previous:
+                return current
+            previous = current
+
+    @staticmethod
+    def round_trips(before, after):
+        def delta(name, keys):
+            return sum(after[name].get(key, 0) - before[name].get(key, 0) for key in keys)
+        operations = {key: after["db"][key] - before["db"].get(key, 0) for key in after["db"]
+                      if " " in key and after["db"][key] != before["db"].get(key, 0)}
+        return delta("db", DB_COUNTERS), delta("llm", LLM_COUNTERS), operations
+
+
+async def warm_up(session, base_url, state, selected, seed_value):
+    """Sign every seeded user in once (identity and org status caches) and run every scenario once."""
+    for org in state.index["orgs"]:
+        await send(session, base_url, scenarios.Request("GET", "/organization/clients", json={"user_id": org["admin"]}))
+        for employee in org["employees"]:
+            await send(session, base_url, scenarios.Request("GET", "/employee/clients", json={"user_id": employee["id"]}))
+    rng = random.Random(seed_value)
+    for scenario in selected:
+        request = scenario.build(state, rng)
+        if request is not None:
+            status, body = await send(session, base_url, request)
+            if scenario.on_response:
+                scenario.on_response(state, request, status, body)
+
+
+async def calibrate(session, base_url, upstreams, state, selected, repeats, quiet, llm_quiet):
+    """Median database and LLM round trips per request of every scenario, one request at a time.
+    The counters must be still for `quiet` seconds after a request (`llm_quiet` for LLM
+    scenarios, whose background jobs write after the model answers)."""
+    rng = random.Random(0)
+    results = {}
+    for scenario in selected:
+        db, llm, operations = [], [], Counter()
+        for _ in range(repeats):
+            request = scenario.build(state, rng)
+            if request is None:
+                break
+            if scenario.kind == "read":
+                # reads are repeatable: the first request loads what the route caches (e.g. the
+                # vector index of a project), the second one is counted
+                await send(session, base_url, request)
+            before = await upstreams.settled(quiet)
+            status, body = await send(session, base_url, request)
+            if scenario.on_response:
+                scenario.on_response(state, request, status, body)
+            after = await upstreams.settled(llm_quiet if scenario.kind == "llm" else quiet)
+            db_trips, llm_trips, ops = Upstreams.round_trips(before, after)
+            db.append(db_trips)
+            llm.append(llm_trips)
+            operations.update(ops)
+        if db:
+            results[scenario.name] = {
+                "db_round_trips": statistics.median(db),
+                "llm_round_trips": statistics.median(llm),
+                "db_operations": {op: round(count / len(db), 2) for op, count in operations.most_common()},
+            }
+    return results
+
+
+async def load(session, base_url, state, selected, requests, concurrency, seed_value):
+    latencies, statuses, errors = defaultdict(list), defaultdict(Counter), Counter()
+    remaining = iter(range(requests))
+    weights = [s.weight for s in selected]
+
+    async def user(number):
+        rng = random.Random(seed_value * 1000 + number)
+        for _ in remaining:
+            scenario = rng.choices(selected, weights)[0]
+            request = scenario.build(state, rng)
+            if request is None:
+                continue
+            start = time.perf_counter()
+            status, body = await send(session, base_url, request)
+            latencies[scenario.name].append(time.perf_counter() - start)
+            statuses[scenario.name][status] += 1
+            if status not in scenario.ok:
+                errors[scenario.name] += 1
+            if scenario.on_response:
+                scenario.on_response(state, request, status, body)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user(number) for number in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return elapsed, latencies, statuses, errors
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of sorted values."""
+    return values[max(0, min(len(values) - 1, int(round(fraction * len(values))) - 1))]
+
+
+def build_report(args, elapsed, latencies, statuses, errors, calibration):
+    endpoints = {}
+    for name in sorted(set(latencies) | set(calibration)):
+        values = sorted(latencies.get(name, ()))
+        entry = {"requests": len(values), "errors": errors.get(name, 0),
+                 "statuses": {str(status): count for status, count in statuses.get(name, {}).items()}}
+        if values:
+            entry.update({f"{label}_ms": round(percentile(values, fraction) * 1000, 2)
+                          for label, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))})
+        entry.update(calibration.get(name, {}))
+        endpoints[name] = entry
+    total = sum(len(values) for values in latencies.values())
+    return {
+        "config": {key: getattr(args, key) for key in ("requests", "concurrency", "threads", "db_latency",
+                                                      "llm_latency", "jitter", "orgs", "employees", "projects", "calls")},
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0,
+        "endpoints": endpoints,
+    }
+
+
+def print_report(report):
+    def number(entry, key, width, spec):
+        return format(entry[key], spec).rjust(width) if key in entry else "-".rjust(width)
+
+    print(f"\n{sum(e['requests'] for e in report['endpoints'].values())} requests in {report['elapsed_s']:.1f}s, "
+          f"{report['throughput_rps']:.1f} req/s\n")
+    print(f"{'endpoint':<22} {'n':>6} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'db/req':>7} {'llm/req':>7}  statuses")
+    for name, e in report["endpoints"].items():
+        print(f"{name:<22} {e['requests']:>6} {e['errors']:>6} {number(e, 'p50_ms', 8, '.1f')} {number(e, 'p95_ms', 8, '.1f')} "
+              f"{number(e, 'p99_ms', 8, '.1f')} {number(e, 'db_round_trips', 7, 'g')} {number(e, 'llm_round_trips', 7, 'g')}  "
+              f"{e['statuses']}")
+
+
+def compare(report, baseline, max_p95_regression):
+    """Regressions of report against baseline, as messages."""
+    problems = []
+    for name, entry in report["endpoints"].items():
+        before = baseline["endpoints"].get(name)
+        if not before:
+            continue
+        for key in ("db_round_trips", "llm_round_trips"):
+            if key in entry and key in before and entry[key] > before[key]:
+                problems.append(f"{name}: {key} {before[key]:g} -> {entry[key]:g}")
+        if entry.get("p95_ms") and before.get("p95_ms") and entry["p95_ms"] > before["p95_ms"] * (1 + max_p95_regression):
+            problems.append(f"{name}: p95 {before['p95_ms']:.1f}ms -> {entry['p95_ms']:.1f}ms")
+        if entry["errors"] > before["errors"] and entry["requests"]:
+            problems.append(f"{name}: errors {before['errors']} -> {entry['errors']}")
+    return problems
+
+
+async def run(args):
+    supabase_url = f"http://127.0.0.1:{args.supabase_port}"
+    openai_url = f"http://127.0.0.1:{args.openai_port}"
+    base_url = f"http://127.0.0.1:{args.app_port}"
+    seed_args = ["--seed", args.seed, "--orgs", args.orgs, "--employees", args.employees, "--projects", args.projects,
+                 "--calls", args.calls, "--embedding-dims", args.embedding_dims]
+    log_dir = tempfile.mkdtemp(prefix="teamtrack-loadtest-")
+    env = {
+        **os.environ,
+        "SUPABASE_URL": supabase_url,
+        "SUPABASE_KEY": "load.test.key",
+        "OPENAI_API_KEY": "sk-loadtest",
+        "OPENAI_BASE_URL": f"{openai_url}/v1",
+        "AGNO_TELEMETRY": "false",
+        "INSIGHT_JOB_DB": os.path.join(log_dir, "jobs.db"),
+        "METRICS_TOKEN": scenarios.OPERATOR_TOKEN,
+    }
+    env.pop("AGENT_CACHE_DB", None)
+    env.pop("PDF_CACHE_DB", None)
+
+    processes = [
+        ("fake supabase", start_process("fake_supabase.py", "--port", args.supabase_port, "--latency", args.db_latency,
+                                        "--jitter", args.jitter, *seed_args, log_dir=log_dir), f"{supabase_url}/__stats"),
+        ("fake openai", start_process("fake_openai.py", "--port", args.openai_port, "--latency", args.llm_latency,
+                                      "--jitter", args.jitter, "--embedding-dims", args.embedding_dims, log_dir=log_dir), f"{openai_url}/__stats"),
+        ("app", start_process("serve_app.py", "--port", args.app_port, "--threads", args.threads, env=env, log_dir=log_dir),
+         f"{base_url}/"),
+    ]
+    try:
+        _, index = seed.build(**fake_supabase.seed_options(args))
+        state = scenarios.State.create(index, args.seed)
+        selected = scenarios.select(args.scenarios, args.kinds)
+        connector = TCPConnector(limit=args.concurrency + 10)
+        async with ClientSession(connector=connector, timeout=ClientTimeout(total=600)) as session:
+            for _, process, url in processes:
+                await wait_until_up(session, url, process)
+            upstreams = Upstreams(session, supabase_url, openai_url)
+
+            await warm_up(session, base_url, state, selected, args.seed)
+            print(f"Calibrating {len(selected)} scenarios ({args.calibrate} requests each)...", file=sys.stderr)
+            calibration = await calibrate(session, base_url, upstreams, state, selected, args.calibrate,
+                                          quiet=max(0.05, args.db_latency * 4),
+                                          llm_quiet=max(0.05, args.db_latency * 4) + args.llm_latency * 1.5)
+            print(f"Load: {args.requests} requests, {args.concurrency} concurrent users...", file=sys.stderr)
+            elapsed, latencies, statuses, errors = await load(session, base_url, state, selected, args.requests,
+                                                              args.concurrency, args.seed)
+    finally:
+        for _, process, _ in processes:
+            process.terminate()
+        for _, process, _ in processes:
+            process.wait()
+        print(f"Server logs: {log_dir}", file=sys.stderr)
+
+    return build_report(args, elapsed, latencies, statuses, errors, calibration)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--calibrate", type=int, default=3, help="Serial requests per scenario to count round trips")
+    parser.add_argument("--threads", type=int, default=16, help="WSGI threads of the app")
+    parser.add_argument("--db-latency", type=float, default=0.005, help="Seconds per Supabase round trip")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds per OpenAI request")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Latencies vary by +/- this fraction")
+    parser.add_argument("--scenarios", type=lambda value: set(value.split(",")), help="Only these scenarios")
+    parser.add_argument("--kinds", type=lambda value: set(value.split(",")), help="Only these kinds: read, write, llm")
+    parser.add_argument("--app-port", type=int, default=8800)
+    parser.add_argument("--supabase-port", type=int, default=8801)
+    parser.add_argument("--openai-port", type=int, default=8802)
+    parser.add_argument("--json", help="Write the report to this file")
+    parser.add_argument("--baseline", help="Compare with a report written by --json")
+    parser.add_argument("--max-p95-regression", type=float, default=0.25, help="Allowed p95 growth over the baseline")
+    fake_supabase.add_seed_arguments(parser)
+    args = parser.parse_args()
+
+    unknown = (args.scenarios or set()) - {s.name for s in scenarios.SCENARIOS}
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = compare(report, json.load(f), args.max_p95_regression)
+        if problems:
+            print("\nRegressions against the baseline:\n  " + "\n  ".join(problems))
+            sys.exit(1)
+        print("\nNo regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
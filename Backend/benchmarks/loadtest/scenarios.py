@@ -0,0 +1,314 @@
+"""
+The request mix of the load test: one Scenario per endpoint with a weight, the
+statuses that count as success and a function that builds a request from the
+seed index.
+
+Weights follow how the frontend uses the API: dashboards (project, client and
+call lists) dominate, writes are occasional and LLM routes are a small but slow
+share. Users are picked at random across organizations. Transcripts come from
+a fixed pool, so repeated LLM requests hit the agent result cache about as
+often as re-submitted calls would.
+"""
+import itertools
+import json
+import random
+from dataclasses import dataclass, field
+
+import seed
+
+OK = frozenset({200, 201, 202, 304})
+# run.py starts the app with METRICS_TOKEN set to this, for the operator endpoints
+OPERATOR_TOKEN = "loadtest-operator-token"
+OPERATOR_HEADERS = {"Authorization": f"Bearer {OPERATOR_TOKEN}"}
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    json: dict = None
+    params: dict = None
+    form: dict = None  # multipart fields, values are str or (filename, bytes, content_type)
+    headers: dict = None
+
+
+@dataclass
+class Scenario:
+    name: str
+    weight: float
+    kind: str  # "read", "write" or "llm"
+    build: callable  # (state, rng) -> Request, or None when there is nothing left to do
+    ok: frozenset = OK
+    on_response: callable = None  # (state, request, status, body bytes), e.g. to remember created ids
+
+
+@dataclass
+class State:
+    """What the scenarios pick from: the seed index plus things created while running."""
+    index: dict
+    transcripts: list
+    counter: itertools.count = field(default_factory=itertools.count)
+    insight_jobs: list = field(default_factory=list)  # (job_id, user_id of the submitter)
+    pdf: bytes = None
+
+    @classmethod
+    def create(cls, index, seed_value=1, transcripts=200):
+        rng = random.Random(seed_value)
+        return cls(index=index, transcripts=[seed.transcript(rng, rng.randint(10, 60)) for _ in range(transcripts)],
+                   pdf=make_pdf(seed.transcript(rng, 40)))
+
+    def org(self, rng):
+        return rng.choice(self.index["orgs"])
+
+    def employee(self, rng, with_calls=False):
+        org = self.org(rng)
+        employees = [e for e in org["employees"] if e["calls"]] if with_calls else org["employees"]
+        return org, rng.choice(employees)
+
+    def unique(self):
+        return next(self.counter)
+
+
+def make_pdf(text):
+    """A small one-page PDF with text, or None without PyMuPDF."""
+    try:
+        import fitz
+    except ImportError:
+        return None
+    document = fitz.open()
+    page = document.new_page()
+    page.insert_textbox(page.rect + (36, 36, -36, -36), text, fontsize=9)
+    data = document.tobytes()
+    document.close()
+    return data
+
+
+# Reads
+
+def employee_projects(state, rng):
+    _, employee = state.employee(rng)
+    params = {"user_id": employee["id"]}
+    if rng.random() < 0.5:
+        params["calls_limit"] = "5"
+    return Request("GET", "/employee/projects", params=params)
+
+
+def organization_clients(state, rng):
+    return Request("GET", "/organization/clients", json={"user_id": state.org(rng)["admin"]}, params={"limit": "50"})
+
+
+def employee_clients(state, rng):
+    _, employee = state.employee(rng)
+    return Request("GET", "/employee/clients", json={"user_id": employee["id"]})
+
+
+def recent_calls(state, rng):
+    _, employee = state.employee(rng)
+    return Request("GET", "/employee/calls/recent", json={"user_id": employee["id"]},
+                   params={"limit": "20", "fields": "id,projectid,datetime,duration"})
+
+
+def call_insight(state, rng):
+    _, employee = state.employee(rng, with_calls=True)
+    return Request("GET", "/project/call/insight", json={"user_id": employee["id"], "call_id": rng.choice(employee["calls"])})
+
+
+def call_search(state, rng):
+    org, employee = state.employee(rng)
+    body = {"user_id": employee["id"], "query": rng.choice(seed.TOPICS), "k": 5}
+    if employee["projects"] and rng.random() < 0.5:
+        body["project_id"] = rng.choice(employee["projects"])
+    return Request("POST", "/call/search", json=body)
+
+
+def insight_job_status(state, rng):
+    if not state.insight_jobs:
+        return None
+    job_id, user_id = rng.choice(state.insight_jobs)
+    return Request("GET", f"/call/insight/jobs/{job_id}", json={"user_id": user_id})
+
+
+def cache_stats(state, rng):
+    return Request("GET", "/cache/stats", headers=OPERATOR_HEADERS)
+
+
+def metrics(state, rng):
+    return Request("GET", "/metrics", headers=OPERATOR_HEADERS)
+
+
+# Writes
+
+def schedule_call(state, rng):
+    _, employee = state.employee(rng)
+    return Request("POST", "/employee/calls/schedule", json={
+        "user_id": employee["id"], "project_id": rng.choice(employee["projects"]),
+        "call_time": f"2025-04-{rng.randint(1, 28):02d}T{rng.randint(8, 18):02d}:00:00", "duration": 30,
+    })
+
+
+def project_assign(state, rng):
+    org = state.org(rng)
+    return Request("POST", "/project/assign", json={
+        "user_id": org["admin"], "employee_id": rng.choice(org["employees"])["id"], "project_id": rng.choice(org["projects"]),
+    })
+
+
+def project_assign_bulk(state, rng):
+    org = state.org(rng)
+    team = rng.sample(org["employees"], min(5, len(org["employees"])))
+    return Request("POST", "/project/assign/bulk", json={
+        "user_id": org["admin"], "project_id": rng.choice(org["projects"]), "employee_ids": [e["id"] for e in team],
+    })
+
+
+def project_create(state, rng):
+    org = state.org(rng)
+    return Request("POST", "/project/create", json={
+        "user_id": org["admin"], "project_name": f"Proyecto carga {state.unique()}",
+        "description": f"Proyecto sobre {rng.choice(seed.TOPICS)}", "client_id": rng.choice(org["clients"]),
+        "start_date": "2025-04-01",
+    })
+
+
+def subclient_create(state, rng):
+    org, employee = state.employee(rng)
+    return Request("POST", "/client/subclient/create", json={
+        "user_id": employee["id"], "client_id": rng.choice(org["clients"]), "subclient_name": f"Contacto {state.unique()}",
+    })
+
+
+def subclient_update(state, rng):
+    org, employee = state.employee(rng)
+    return Request("POST", "/client/subclient/update", json={
+        "user_id": employee["id"], "subclient_id": rng.choice(org["subclients"]), "subclient_name": f"Contacto {state.unique()}",
+    })
+
+
+def subclient_delete(state, rng):
+    org, employee = state.employee(rng)
+    if not org["spare_subclients"]:
+        return None
+    return Request("POST", "/client/subclient/delete", json={
+        "user_id": employee["id"], "subclient_id": org["spare_subclients"].pop(),
+    })
+
+
+def employee_create(state, rng):
+    org = state.org(rng)
+    number = state.unique()
+    return Request("POST", "/employee/create", json={
+        "user_id": org["admin"], "first_name": "Nuevo", "last_name": f"Empleado {number}",
+        "email": f"nuevo.{number}@{org['domain']}", "emp_role": "employee",
+    })
+
+
+def organization_update(state, rng):
+    org = state.org(rng)
+    return Request("POST", "/organization/update", json={
+        "user_id": org["admin"], "org_name": f"Empresa {org['id']} ({state.unique()})", "domain": org["domain"],
+    })
+
+
+def google_callback(state, rng):
+    _, employee = state.employee(rng)
+    return Request("POST", "/auth/google/callback", json={
+        "user_id": employee["id"], "full_name": employee["name"], "email": employee["email"],
+    })
+
+
+def organization_create(state, rng):
+    number = state.unique()
+    return Request("POST", "/organizations/create", json={
+        "org_name": f"Empresa carga {number}", "domain": f"carga{number}.example.com", "first_name": "Admin",
+        "last_name": f"Carga {number}", "email": f"admin@carga{number}.example.com", "password": "load-test-password",
+    })
+
+
+# LLM
+
+def insight_new(state, rng):
+    _, employee = state.employee(rng, with_calls=True)
+    return Request("POST", "/call/insight/new", json={
+        "user_id": employee["id"], "call_id": rng.choice(employee["calls"]), "transcript": rng.choice(state.transcripts),
+    })
+
+
+def insight_job(state, rng):
+    _, employee = state.employee(rng, with_calls=True)
+    return Request("POST", "/call/insight/jobs", json={
+        "user_id": employee["id"], "call_id": rng.choice(employee["calls"]), "transcript": rng.choice(state.transcripts),
+    })
+
+
+def remember_insight_job(state, request, status, body):
+    if status == 202:
+        state.insight_jobs.append((json.loads(body)["job_id"], request.json["user_id"]))
+
+
+def agent_txt(state, rng):
+    _, employee = state.employee(rng)
+    return Request("POST", "/agent/txt", json={"user_id": employee["id"], "transcript": rng.choice(state.transcripts)})
+
+
+def agent_txt_stream(state, rng):
+    _, employee = state.employee(rng)
+    return Request("POST", "/agent/txt/stream", json={"user_id": employee["id"], "transcript": rng.choice(state.transcripts)})
+
+
+def agent_pdf(state, rng):
+    if state.pdf is None:
+        return None
+    return Request("POST", "/agent/pdf", form={"file": ("llamada.pdf", state.pdf, "application/pdf")})
+
+
+def agent_email(state, rng):
+    return Request("POST", "/agent/email", json={"information": rng.choice(state.transcripts)})
+
+
+def agent_email_stream(state, rng):
+    return Request("POST", "/agent/email/stream", json={"information": rng.choice(state.transcripts)})
+
+
+def embedding_new(state, rng):
+    org = state.org(rng)
+    return Request("POST", "/call/embedding/new", json={
+        "call_id": rng.choice(org["calls"]), "transcript": rng.choice(state.transcripts),
+    })
+
+
+SCENARIOS = [
+    Scenario("employee_projects", 20, "read", employee_projects),
+    Scenario("organization_clients", 8, "read", organization_clients),
+    Scenario("employee_clients", 8, "read", employee_clients),
+    Scenario("recent_calls", 12, "read", recent_calls),
+    Scenario("call_insight", 10, "read", call_insight),
+    Scenario("call_search", 4, "read", call_search),
+    Scenario("insight_job_status", 2, "read", insight_job_status),
+    Scenario("cache_stats", 0.5, "read", cache_stats),
+    Scenario("metrics", 0.5, "read", metrics),
+    # the project may already have the employee
+    Scenario("project_assign", 1, "write", project_assign, OK | {400}),
+    Scenario("project_assign_bulk", 1, "write", project_assign_bulk),
+    Scenario("schedule_call", 2, "write", schedule_call),
+    Scenario("project_create", 1, "write", project_create),
+    Scenario("subclient_create", 1, "write", subclient_create),
+    Scenario("subclient_update", 1, "write", subclient_update),
+    Scenario("subclient_delete", 0.5, "write", subclient_delete),
+    Scenario("employee_create", 0.5, "write", employee_create),
+    Scenario("organization_update", 0.5, "write", organization_update),
+    Scenario("google_callback", 3, "write", google_callback),
+    Scenario("organization_create", 0.2, "write", organization_create),
+    Scenario("insight_new", 2, "llm", insight_new),
+    Scenario("insight_job", 1, "llm", insight_job, on_response=remember_insight_job),
+    Scenario("agent_txt", 2, "llm", agent_txt),
+    Scenario("agent_txt_stream", 1, "llm", agent_txt_stream),
+    Scenario("agent_pdf", 0.5, "llm", agent_pdf),
+    Scenario("agent_email", 1, "llm", agent_email),
+    Scenario("agent_email_stream", 1, "llm", agent_email_stream),
+    Scenario("embedding_new", 1, "llm", embedding_new),
+]
+
+
+def select(names=None, kinds=None):
+    """Scenarios filtered by name and kind (None keeps all)."""
+    return [s for s in SCENARIOS if (not names or s.name in names) and (not kinds or s.kind in kinds)]
@@ -0,0 +1,148 @@
+"""
+Seed data for the load test: organizations with their admins, employees, clients,
+projects, assignments, subclients, calls, insights and transcript embeddings.
+
+build() is deterministic for the same arguments, so the fake Supabase server and
+the load generator (separate processes) agree on every id without talking.
+Employees use their auth user id as row id: the API filters project_employee
+and call by either one depending on the route.
+"""
+import json
+import math
+import random
+import uuid
+from datetime import datetime, timedelta
+
+FIRST_NAMES = ["Ana", "Luis", "María", "Jorge", "Sofía", "Carlos", "Lucía", "Diego", "Valeria", "Pedro"]
+LAST_NAMES = ["García", "Martínez", "López", "Hernández", "González", "Pérez", "Sánchez", "Ramírez"]
+TOPICS = ["la propuesta comercial", "el presupuesto del trimestre", "la entrega del reporte", "los tickets abiertos",
+          "la migración a la nube", "el plan de capacitación", "la renovación del contrato", "el roadmap del producto"]
+LINES = [
+    "¿Cómo vamos con {topic}?",
+    "Creo que podemos cerrar {topic} antes del viernes.",
+    "Necesitamos revisar {topic} con el cliente.",
+    "Mmm, este, la verdad {topic} sigue pendiente.",
+    "Ok, entonces acordamos enviar {topic} el lunes.",
+    "I think {topic} needs another review, you know.",
+    "Perfecto, yo me encargo de {topic}.",
+]
+
+
+def transcript(rng, turns):
+    """A meeting transcript of `turns` speaker turns."""
+    speakers = rng.sample(FIRST_NAMES, 3)
+    return "\n".join(
+        f"{rng.choice(speakers)}: {rng.choice(LINES).format(topic=rng.choice(TOPICS))}" for _ in range(turns)
+    )
+
+
+def embedding_for(text, dims):
+    """Deterministic unit vector for a text; fake_openai.py embeds queries the same way."""
+    rng = random.Random(text)
+    vector = [rng.gauss(0, 1) for _ in range(dims)]
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [round(value / norm, 6) for value in vector]
+
+
+def insight_json(rng):
+    return json.dumps({
+        "notes": {"title": "Reunión semanal", "summary": f"Se habló de {rng.choice(TOPICS)}.",
+                  "importantTopics": rng.sample(TOPICS, 2), "questions": [], "decisions": ["enviar la propuesta"]},
+        "report": {"improvingPoints": [], "positiveFeedback": ["buena coordinación"], "negativeFeedback": [],
+                   "keywords": ["proyecto"], "nextSteps": ["agendar seguimiento"]},
+    }, ensure_ascii=False)
+
+
+def build(seed=1, orgs=5, employees=20, clients=10, projects=20, calls=10, assignments=3,
+          embedded_calls=3, embedding_dims=1536):
+    """Returns (tables, index). tables maps table name -> list of rows, index groups the
+    ids the load generator picks from (per organization, per employee, ...).
+
+    Args:
+        seed (int): Random seed.
+        orgs (int): Organizations.
+        employees (int): Employees per organization, the first one is the admin.
+        clients (int): Clients per organization.
+        projects (int): Projects per organization.
+        calls (int): Calls per project.
+        assignments (int): Projects each employee is assigned to.
+        embedded_calls (int): Calls per project with a transcript embedding.
+        embedding_dims (int): Size of the embeddings.
+    """
+    rng = random.Random(seed)
+    tables = {name: [] for name in ("organization", "employee", "client", "project", "project_employee", "subclient",
+                                    "call", "insight", "call_insights", "transcript_embeddings", "auth_logs")}
+    index = {"orgs": []}
+    now = datetime(2025, 3, 1, 9, 0)
+
+    def insert(table, row):
+        row = {"id": len(tables[table]) + 1, **row}
+        tables[table].append(row)
+        return row
+
+    for org_number in range(1, orgs + 1):
+        domain = f"empresa{org_number}.example.com"
+        org = insert("organization", {"org_name": f"Empresa {org_number}", "domain": domain, "is_active": True})
+        org_index = {"id": org["id"], "domain": domain, "admin": None, "employees": [], "clients": [],
+                     "projects": [], "calls": [], "subclients": [], "spare_subclients": []}
+        index["orgs"].append(org_index)
+
+        for number in range(employees):
+            auth_id = str(uuid.UUID(int=rng.getrandbits(128)))
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            email = f"{first.lower()}.{last.lower()}.{number}@{domain}"
+            insert("employee", {"id": auth_id, "auth_user_id": auth_id, "first_name": first, "last_name": last,
+                                "email": email, "emp_role": "admin" if number == 0 else "employee",
+                                "organization_id": org["id"]})
+            if number == 0:
+                org_index["admin"] = auth_id
+            else:
+                org_index["employees"].append({"id": auth_id, "name": f"{first} {last}", "email": email,
+                                               "projects": [], "calls": []})
+
+        for number in range(clients):
+            owner = rng.choice(org_index["employees"])["id"] if org_index["employees"] else None
+            client = insert("client", {"client_name": f"Cliente {org_number}-{number}", "email": f"cliente{number}@{domain}",
+                                       "organization_id": org["id"], "auth_user_id": owner})
+            org_index["clients"].append(client["id"])
+
+        for number in range(projects):
+            project = insert("project", {
+                "project_name": f"Proyecto {org_number}-{number}", "description": f"Proyecto sobre {rng.choice(TOPICS)}",
+                "start_date": (now - timedelta(days=rng.randint(30, 365))).date().isoformat(), "end_date": None,
+                "organization_id": org["id"], "client_id": rng.choice(org_index["clients"]) if org_index["clients"] else None,
+            })
+            org_index["projects"].append(project["id"])
+            for kind in ("subclients", "spare_subclients"):
+                subclient = insert("subclient", {"project_id": project["id"], "client_id": project["client_id"],
+                                                 "subclient_name": f"Contacto {project['id']}", "subclient_email": None,
+                                                 "subclient_phone": None})
+                org_index[kind].append(subclient["id"])
+
+        for employee in org_index["employees"]:
+            for project_id in rng.sample(org_index["projects"], min(assignments, len(org_index["projects"]))):
+                insert("project_employee", {"employee_id": employee["id"], "project_id": project_id})
+                employee["projects"].append(project_id)
+
+        for project_id in org_index["projects"]:
+            members = [employee for employee in org_index["employees"] if project_id in employee["projects"]]
+            for number in range(calls):
+                employee = rng.choice(members) if members else None
+                text = transcript(rng, rng.randint(8, 40))
+                call = insert("call", {
+                    "projectid": project_id, "employee_id": employee["id"] if employee else None,
+                    "datetime": (now - timedelta(hours=rng.randint(1, 2000))).isoformat(),
+                    "duration": rng.choice([15, 30, 45, 60]), "transcription": text,
+                })
+                org_index["calls"].append(call["id"])
+                if employee:
+                    employee["calls"].append(call["id"])
+                insight = insert("insight", {"call_id": call["id"], "insightsjson": insight_json(rng)})
+                insert("call_insights", {"call_id": call["id"], "insight_id": insight["id"],
+                                         "insightsjson": insight["insightsjson"], "datetime": call["datetime"]})
+                if number < embedded_calls:
+                    # pgvector columns come back from PostgREST as text
+                    insert("transcript_embeddings", {"project_id": project_id, "call_id": call["id"],
+                                                     "embedding": json.dumps(embedding_for(text, embedding_dims))})
+
+    return tables, index
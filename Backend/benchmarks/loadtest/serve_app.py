@@ -0,0 +1,49 @@
+"""
+Serve main.app for the load test on a WSGI server with a fixed thread pool,
+like one gunicorn gthread worker. run.py starts it with SUPABASE_URL and
+OPENAI_BASE_URL pointing at the fakes.
+
+Usage:
+    python serve_app.py [--port 8800] [--threads 16]
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "api"))
+
+
+class PooledWSGIServer(ThreadingMixIn, WSGIServer):
+    """WSGI server that handles connections on a fixed thread pool, like gunicorn's gthread worker."""
+    request_queue_size = 4096
+
+    def __init__(self, *args, threads=16, **kwargs):
+        self.pool = ThreadPoolExecutor(max_workers=threads)
+        super().__init__(*args, **kwargs)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+
+    import main as api
+    server = make_server("127.0.0.1", args.port, api.app, handler_class=QuietHandler,
+                         server_class=lambda *a, **kw: PooledWSGIServer(*a, threads=args.threads, **kw))
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+-- One embedding per call: /call/embedding/new and the embedding backfill upsert
+-- transcript_embeddings on call_id, which PostgREST only accepts with a unique constraint.
+-- Run once in the Supabase SQL editor (or psql) before deploying.
+
+-- Calls embedded more than once keep their newest row
+DELETE FROM transcript_embeddings older
+USING transcript_embeddings newer
+WHERE older.call_id = newer.call_id
+  AND older.id < newer.id;
+
+ALTER TABLE transcript_embeddings
+  ADD CONSTRAINT transcript_embeddings_call_id_key UNIQUE (call_id);
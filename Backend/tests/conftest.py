@@ -0,0 +1,42 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+# main.py builds its clients and job queue on import: point them at nothing (tests never
+# reach the network) and keep the job database and caches out of the working tree.
+_state_dir = tempfile.mkdtemp(prefix="teamtrack-tests-")
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("SUPABASE_KEY", "test.test.test")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("AGNO_TELEMETRY", "false")
+os.environ["INSIGHT_JOB_WORKERS"] = "0"
+os.environ["INSIGHT_JOB_DB"] = os.path.join(_state_dir, "jobs.db")
+os.environ.pop("AGENT_CACHE_DB", None)
+os.environ.pop("PDF_CACHE_DB", None)
+
+
+@pytest.fixture
+def fake_supabase(monkeypatch):
+    """Replace main.supabase with a FakeSupabase built from the given tables, with the auth,
+    organization status and ETag state of main emptied around the test."""
+    import main
+    from cache import RefreshAheadCache
+    from fakes import FakeSupabase
+
+    def reset():
+        main.identity_cache.clear()
+        main.etag_index.clear()
+        main.tenant_versions.clear()
+    reset()
+    monkeypatch.setattr(main, "org_status_cache", RefreshAheadCache(main.load_org_status, ttl=300, refresh_after=240))
+
+    def install(**tables):
+        db = FakeSupabase(**tables)
+        monkeypatch.setattr(main, "supabase", db)
+        return db
+    yield install
+    reset()
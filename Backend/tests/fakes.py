@@ -0,0 +1,113 @@
+import re
+from types import SimpleNamespace
+
+EMBEDDED = re.compile(r"^(\w+)\((.*)\)$")
+
+
+class FakeQuery:
+    """The subset of the supabase-py query builder used by main.py, over in-memory rows.
+    Filters compare values as strings, like PostgREST does with query parameters."""
+
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.columns = "*"
+        self.filters = []
+        self.order_by = None
+        self.bounds = None
+        self.inserted = None
+        self.updated = None
+
+    def select(self, columns="*", count=None, head=None):
+        self.columns = columns
+        return self
+
+    def _filter(self, column, check):
+        self.filters.append(lambda row: check(row.get(column)))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, lambda current: str(current) == str(value))
+
+    def in_(self, column, values):
+        values = {str(value) for value in values}
+        return self._filter(column, lambda current: str(current) in values)
+
+    def gt(self, column, value):
+        return self._filter(column, lambda current: current > value)
+
+    def lt(self, column, value):
+        return self._filter(column, lambda current: current < value)
+
+    def order(self, column, desc=False):
+        self.order_by = (column, desc)
+        return self
+
+    def limit(self, count):
+        self.bounds = (0, count)
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end + 1)
+        return self
+
+    def insert(self, rows):
+        self.inserted = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def update(self, values):
+        self.updated = values
+        return self
+
+    def _project(self, row):
+        if self.columns == "*":
+            return dict(row)
+        projected = {}
+        for column in re.split(r",(?![^(]*\))", self.columns):
+            embedded = EMBEDDED.match(column)
+            if embedded:
+                # organization(is_active): the row of the referenced table
+                name, columns = embedded.groups()
+                target = next((other for other in self.db.tables.get(name, []) if other["id"] == row.get(f"{name}_id")), None)
+                projected[name] = {c: target[c] for c in columns.split(",")} if target else None
+            else:
+                projected[column] = row.get(column)
+        return projected
+
+    def execute(self):
+        self.db.queries.append(self.table)
+        rows = self.db.tables.setdefault(self.table, [])
+        if self.inserted is not None:
+            created = []
+            for values in self.inserted:
+                self.db.next_id += 1
+                created.append({"id": self.db.next_id, **values})
+            rows.extend(created)
+            return SimpleNamespace(data=[dict(row) for row in created], count=None)
+
+        matched = [row for row in rows if all(check(row) for check in self.filters)]
+        if self.updated is not None:
+            for row in matched:
+                row.update(self.updated)
+            return SimpleNamespace(data=[dict(row) for row in matched], count=None)
+        if self.order_by:
+            column, desc = self.order_by
+            matched.sort(key=lambda row: row[column], reverse=desc)
+        count = len(matched)
+        if self.bounds:
+            matched = matched[slice(*self.bounds)]
+        return SimpleNamespace(data=[self._project(row) for row in matched], count=count)
+
+
+class FakeSupabase:
+    """In-memory stand-in for main.supabase. queries records the table of every executed
+    query, to count round trips."""
+
+    def __init__(self, **tables):
+        self.tables = {name: [dict(row) for row in rows] for name, rows in tables.items()}
+        self.next_id = max((row.get("id", 0) for rows in self.tables.values() for row in rows
+                            if isinstance(row.get("id"), int)), default=0) + 1000
+        self.queries = []
+
+    def table(self, name):
+        return FakeQuery(self, name)
@@ -0,0 +1,80 @@
+import pytest
+
+import main
+
+
+@pytest.fixture
+def db(fake_supabase):
+    return fake_supabase(
+        organization=[{"id": 1, "is_active": True}, {"id": 2, "is_active": True}],
+        employee=[
+            {"id": 1, "auth_user_id": "admin-1", "organization_id": 1, "emp_role": "admin"},
+            {"id": 2, "auth_user_id": "employee-2", "organization_id": 1, "emp_role": "employee"},
+            {"id": 3, "auth_user_id": "employee-3", "organization_id": 1, "emp_role": "employee"},
+            {"id": 9, "auth_user_id": "other-org", "organization_id": 2, "emp_role": "employee"},
+        ],
+        project=[{"id": 10, "organization_id": 1}, {"id": 11, "organization_id": 1}, {"id": 20, "organization_id": 2}],
+        project_employee=[{"id": 100, "employee_id": 2, "project_id": 10}],
+    )
+
+
+def assign(**body):
+    response = main.app.test_client().post("/project/assign/bulk", json={"user_id": "admin-1", **body})
+    return response.status_code, response.get_json()
+
+
+def pairs(db):
+    return sorted((int(row["employee_id"]), int(row["project_id"])) for row in db.tables["project_employee"])
+
+
+def test_bulk_assign_reports_every_pair(db):
+    status, body = assign(assignments=[
+        {"employee_id": 2, "project_id": 10},    # already assigned
+        {"employee_id": 3, "project_id": 10},
+        {"employee_id": "3", "project_id": "10"},  # same pair with string ids
+        {"employee_id": 2, "project_id": 11},
+        {"employee_id": 9, "project_id": 11},    # employee of another organization
+        {"employee_id": 3, "project_id": 20},    # project of another organization
+    ])
+    assert status == 200
+    assert body["summary"] == {"requested": 5, "assigned": 2, "already_assigned": 1, "failed": 2}
+    assert [result["status"] for result in body["results"]] == ["already_assigned", "assigned", "assigned", "error", "error"]
+    assert [result.get("error") for result in body["results"][3:]] == ["Employee not found", "Project not found"]
+    assert pairs(db) == [(2, 10), (2, 11), (3, 10)]
+    assert main.tenant_versions.get(1) == 1
+
+
+def test_bulk_assign_is_idempotent(db):
+    team = {"project_id": 11, "employee_ids": [2, 3]}
+    assert assign(**team)[1]["summary"]["assigned"] == 2
+
+    db.queries.clear()
+    status, body = assign(**team)
+    assert status == 200
+    assert body["summary"] == {"requested": 2, "assigned": 0, "already_assigned": 2, "failed": 0}
+    assert db.queries.count("project_employee") == 1  # the existing assignments, no insert
+    assert pairs(db) == [(2, 10), (2, 11), (3, 11)]
+    assert main.tenant_versions.get(1) == 1  # nothing written, no new version
+
+
+def test_bulk_assign_uses_set_based_queries(db):
+    db.queries.clear()
+    assign(project_id=11, employee_ids=[2, 3])
+    # the caller's identity, then employees, projects and existing assignments once each, then one insert
+    assert db.queries == ["employee", "employee", "project", "project_employee", "project_employee"]
+
+
+@pytest.mark.parametrize("body, status", [
+    ({}, 400),
+    ({"assignments": []}, 400),
+    ({"assignments": [{"employee_id": 2}]}, 400),
+    ({"project_id": 10, "employee_ids": "2,3"}, 400),
+])
+def test_bulk_assign_rejects_malformed_requests(db, body, status):
+    assert assign(**body)[0] == status
+    assert pairs(db) == [(2, 10)]
+
+
+def test_bulk_assign_limit(db, monkeypatch):
+    monkeypatch.setattr(main, "BULK_ASSIGN_MAX_PAIRS", 2)
+    assert assign(project_id=10, employee_ids=[1, 2, 3])[0] == 413
@@ -0,0 +1,42 @@
+import asyncio
+
+from aiohttp.test_utils import TestClient, TestServer
+
+import async_app
+from identity import identity_cache
+
+
+def request(method, path, **kwargs):
+    """Send one request to a fresh async app and return (status, JSON body)."""
+    async def send():
+        async with TestClient(TestServer(await async_app.create_app())) as client:
+            response = await client.request(method, path, **kwargs)
+            return response.status, await response.json()
+    return asyncio.run(send())
+
+
+def test_unknown_user_is_rejected():
+    identity_cache.set("unknown-user", None)  # cached as unknown: no query is sent
+    try:
+        for path in ("/agent/txt", "/call/insight/new"):
+            status, body = request("POST", path, json={"user_id": "unknown-user", "transcript": "Ana: hola"})
+            assert (status, body) == (404, {"error": "User not found"})
+    finally:
+        identity_cache.invalidate("unknown-user")
+
+
+def test_user_id_is_required():
+    status, body = request("POST", "/agent/txt", json={"transcript": "Ana: hola"})
+    assert (status, body) == (400, {"error": "user_id is required"})
+
+
+def test_operator_endpoints_need_the_metrics_token(monkeypatch):
+    monkeypatch.setenv("METRICS_TOKEN", "operator-secret")
+    for path in ("/async/stats", "/metrics"):
+        status, body = request("GET", path)
+        assert (status, body) == (403, {"error": "Operator access required"})
+        status, _ = request("GET", path, headers={"Authorization": "Bearer wrong"})
+        assert status == 403
+
+    status, body = request("GET", "/async/stats", headers={"Authorization": "Bearer operator-secret"})
+    assert status == 200 and "admission" in body
@@ -0,0 +1,78 @@
+import pytest
+
+import main
+
+ORGANIZATIONS = [{"id": 1, "is_active": True}, {"id": 2, "is_active": False}]
+EMPLOYEES = [
+    {"id": 1, "auth_user_id": "admin-1", "organization_id": 1, "emp_role": "admin"},
+    {"id": 2, "auth_user_id": "employee-1", "organization_id": 1, "emp_role": "employee"},
+    {"id": 3, "auth_user_id": "admin-2", "organization_id": 2, "emp_role": "admin"},
+    {"id": 4, "auth_user_id": "orphan", "organization_id": 3, "emp_role": "admin"},
+]
+
+
+@pytest.fixture
+def db(fake_supabase):
+    return fake_supabase(organization=ORGANIZATIONS, employee=EMPLOYEES, client=[])
+
+
+def list_clients(user_id):
+    """GET /organization/clients, an admin route behind require_user_active_org."""
+    response = main.app.test_client().get("/organization/clients", json={"user_id": user_id})
+    return response.status_code, response.get_json()
+
+
+def test_cache_miss_checks_role_and_organization_in_one_query(db):
+    assert list_clients("admin-1") == (200, [])
+    assert db.queries == ["employee", "client"]  # the organization came joined to the employee
+
+    db.queries.clear()
+    assert list_clients("admin-1") == (200, [])
+    assert db.queries == ["client"]  # both caches were filled
+
+
+@pytest.mark.parametrize("user_id, expected", [
+    ("employee-1", (403, {"error": "User is not authorized"})),
+    ("admin-2", (403, {"error": "Organization is not active"})),
+    ("orphan", (404, {"error": "Organization not found"})),
+    ("nobody", (404, {"error": "User not found"})),
+])
+def test_rejected_callers(db, user_id, expected):
+    assert list_clients(user_id) == expected
+    # Same answer from the caches
+    db.queries.clear()
+    assert list_clients(user_id) == expected
+    assert db.queries == []
+
+
+def test_user_id_is_required(db):
+    assert list_clients(None) == (400, {"error": "user_id is required"})
+
+
+def test_deactivation_is_seen_through_the_cache(db):
+    assert list_clients("admin-1")[0] == 200
+    db.tables["organization"][0]["is_active"] = False
+    main.org_status_cache.invalidate(1)  # what deactivate_organization does
+    assert list_clients("admin-1") == (403, {"error": "Organization is not active"})
+
+
+def test_invalidation_during_the_joined_select_wins(db, monkeypatch):
+    """A deactivation that lands while the joined select is in flight must not be
+    overwritten by the stale is_active it returned."""
+    real_table = db.table
+
+    def table(name):
+        query = real_table(name)
+        if name == "employee":
+            execute = query.execute
+
+            def deactivated_meanwhile():
+                response = execute()
+                db.tables["organization"][0]["is_active"] = False
+                main.org_status_cache.invalidate(1)
+                return response
+            query.execute = deactivated_meanwhile
+        return query
+    monkeypatch.setattr(db, "table", table)
+
+    assert list_clients("admin-1") == (403, {"error": "Organization is not active"})
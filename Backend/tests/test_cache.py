@@ -0,0 +1,94 @@
+import threading
+import time
+
+from cache import MISSING, RefreshAheadCache, TTLCache
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(maxsize=10, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", None)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None  # None is a value, not a miss
+    time.sleep(0.06)
+    assert cache.get("a") is MISSING
+    assert cache.get("a", default="gone") == "gone"
+
+
+def test_ttl_cache_per_entry_ttl_and_invalidate():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("negative", None, ttl=0.05)
+    cache.set("positive", 1)
+    time.sleep(0.06)
+    assert cache.get("negative") is MISSING
+    assert cache.get("positive") == 1
+
+    cache.invalidate("positive")
+    cache.invalidate("never set")
+    assert cache.get("positive") is MISSING
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_refresh_ahead_loads_once_and_serves_from_memory():
+    calls = []
+    cache = RefreshAheadCache(lambda key: calls.append(key) or key * 2, ttl=60, refresh_after=60)
+    assert cache.get(2) == 4
+    assert cache.get(2) == 4
+    assert calls == [2]
+
+
+def test_refresh_ahead_invalidate_reloads():
+    values = {"org": True}
+    cache = RefreshAheadCache(values.get, ttl=60, refresh_after=60)
+    assert cache.get("org") is True
+    values["org"] = False
+    assert cache.get("org") is True
+    cache.invalidate("org")
+    assert cache.get("org") is False
+
+
+def test_invalidate_during_a_load_does_not_store_the_stale_value():
+    loading, release = threading.Event(), threading.Event()
+    values = {"org": True}
+
+    def loader(key):
+        value = values[key]
+        loading.set()
+        release.wait(5)
+        return value
+    cache = RefreshAheadCache(loader, ttl=60, refresh_after=60)
+
+    reader = threading.Thread(target=cache.get, args=("org",))
+    reader.start()
+    loading.wait(5)
+    values["org"] = False  # deactivated while the old flag is in flight
+    cache.invalidate("org")
+    release.set()
+    reader.join(5)
+
+    assert cache.get("org") is False
+
+
+def test_set_since_is_refused_after_an_invalidation():
+    cache = RefreshAheadCache(lambda key: "loaded", ttl=60, refresh_after=60)
+    since = cache.snapshot()
+    cache.invalidate("org")
+    assert not cache.set("org", "stale", since=since)
+    assert cache.get("org") == "loaded"
+
+    since = cache.snapshot()
+    cache.invalidate("other")  # invalidating another key doesn't block this one
+    assert cache.set("org", "fresh", since=since)
+    assert cache.get("org") == "fresh"
+    assert cache.set("org", "forced")  # without since the value is always stored
+    assert cache.get("org") == "forced"
@@ -0,0 +1,63 @@
+import pytest
+
+import main
+
+
+@pytest.fixture
+def db(fake_supabase):
+    return fake_supabase(
+        organization=[{"id": 1, "is_active": True}, {"id": 2, "is_active": True}],
+        employee=[{"id": 1, "auth_user_id": "admin-1", "organization_id": 1, "emp_role": "admin"}],
+        client=[{"id": 1, "organization_id": 1, "name": "Acme"}],
+    )
+
+
+def list_clients(etag=None):
+    headers = {"If-None-Match": etag} if etag else {}
+    return main.app.test_client().get("/organization/clients", json={"user_id": "admin-1"}, headers=headers)
+
+
+def test_matching_etag_gets_304_without_running_the_handler(db):
+    first = list_clients()
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    db.queries.clear()
+    second = list_clients(etag)
+    assert second.status_code == 304
+    assert second.headers["ETag"] == etag
+    assert second.get_data() == b""
+    assert db.queries == []  # organization version unchanged: answered from the ETag index
+
+
+def test_other_etag_gets_the_body(db):
+    etag = list_clients().headers["ETag"]
+    response = list_clients('"something-else"')
+    assert response.status_code == 200
+    assert response.headers["ETag"] == etag
+
+
+def test_bump_version_makes_the_handler_run_again(db):
+    etag = list_clients().headers["ETag"]
+
+    main.bump_version(1)
+    db.queries.clear()
+    unchanged = list_clients(etag)
+    assert unchanged.status_code == 304  # the content hash still matches
+    assert db.queries == ["client"]
+
+    db.tables["client"][0]["name"] = "Acme Corp"
+    main.bump_version(1)
+    changed = list_clients(etag)
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.get_json()[0]["name"] == "Acme Corp"
+
+
+def test_bumping_another_organization_keeps_the_fast_path(db):
+    etag = list_clients().headers["ETag"]
+    main.bump_version(2)
+    main.bump_version(None)  # writes without an organization are ignored
+    db.queries.clear()
+    assert list_clients(etag).status_code == 304
+    assert db.queries == []
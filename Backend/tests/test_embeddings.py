@@ -0,0 +1,25 @@
+import main
+import transcripts
+from transcripts import estimate_tokens, truncate_to_tokens
+
+
+def upper_bound_tokens(text):
+    if transcripts._encoding is not None:
+        return estimate_tokens(text)
+    return -(-len(text) // 3)  # truncate_to_tokens keeps up to 3 characters a token
+
+
+def test_batches_of_truncated_transcripts_fit_in_one_request():
+    longest = truncate_to_tokens("palabra " * 20000, main.EMBEDDING_MAX_INPUT_TOKENS)
+    items = [(call_id, longest) for call_id in range(200)]
+
+    batches = list(main.embedding_batches(items))
+    assert sum(len(batch) for batch in batches) == 200
+    for batch in batches:
+        sent = [truncate_to_tokens(text, main.EMBEDDING_MAX_INPUT_TOKENS) for _, text in batch]
+        assert sum(upper_bound_tokens(text) for text in sent) <= main.EMBEDDING_MAX_REQUEST_TOKENS
+
+
+def test_batches_respect_the_input_limit():
+    batches = list(main.embedding_batches(((i, "hola") for i in range(5)), max_inputs=2))
+    assert [len(batch) for batch in batches] == [2, 2, 1]
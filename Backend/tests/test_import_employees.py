@@ -0,0 +1,68 @@
+import pytest
+
+import main
+
+
+@pytest.fixture
+def db(fake_supabase):
+    return fake_supabase(
+        organization=[{"id": 1, "is_active": True}, {"id": 2, "is_active": True}],
+        employee=[
+            {"id": 1, "organization_id": 1, "email": "Ana@Org.com", "auth_user_id": "admin-1", "emp_role": "admin"},
+            {"id": 2, "organization_id": 2, "email": "luis@org2.com"},
+            {"id": 3, "organization_id": 1, "email": None},
+        ],
+    )
+
+
+def employee(email, role="employee"):
+    return {"first_name": "Test", "last_name": "User", "email": email, "emp_role": role}
+
+
+def import_employees(employees):
+    client = main.app.test_client()
+    return client.post("/employee/import", json={"user_id": "admin-1", "employees": employees})
+
+
+def test_import_skips_existing_and_repeated_emails(db):
+    response = import_employees([
+        employee("ana@org.com"),      # exists in the organization with another case
+        employee("luis@org2.com"),    # exists, but in another organization
+        employee("new@org.com"),
+        employee(" NEW@org.com "),    # repeats row 3
+        employee("bad", role="boss"),
+    ])
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["summary"] == {"total": 5, "created": 2, "skipped": 2, "failed": 1}
+    results = body["results"]
+    assert results[0] == {"row": 1, "email": "ana@org.com", "status": "skipped", "reason": "Employee already exists"}
+    assert results[1]["status"] == "created"
+    assert results[2]["status"] == "created"
+    assert results[3] == {"row": 4, "email": "new@org.com", "status": "skipped", "reason": "Duplicate of row 3"}
+    assert results[4]["status"] == "error"
+
+    org_emails = [row["email"] for row in db.tables["employee"] if row["organization_id"] == 1]
+    assert org_emails == ["Ana@Org.com", None, "luis@org2.com", "new@org.com"]
+
+
+def test_existing_emails_are_read_past_the_first_page(db, monkeypatch):
+    db.tables["employee"].extend({"id": i, "organization_id": 1, "email": f"e{i}@org.com"} for i in range(4, 30))
+    real_fetch_all = main.fetch_all
+    monkeypatch.setattr(main, "fetch_all", lambda *args, **kwargs: real_fetch_all(*args, page_size=5, **kwargs))
+
+    body = import_employees([employee("e29@org.com"), employee("e30@org.com")]).get_json()
+    assert [result["status"] for result in body["results"]] == ["skipped", "created"]
+
+
+def test_import_requires_a_list(db):
+    response = import_employees({"email": "a@org.com"})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("body", [b"[1, 2]", b'"text"', b"null", b"", b"{not json"])
+def test_import_rejects_a_body_that_is_not_an_object(db, body):
+    client = main.app.test_client()
+    response = client.post("/employee/import", data=body, content_type="application/json")
+    assert response.status_code == 400
+    assert "error" in response.get_json()
@@ -0,0 +1,182 @@
+import time
+
+import pytest
+
+from jobs import JobQueue, JobError, QUEUED, RUNNING, SUCCEEDED, DEAD
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.db"), workers=0, max_attempts=3, retry_delay=10, lease_seconds=60)
+
+
+def set_column(queue, job_id, column, value):
+    queue._conn().execute(f"UPDATE jobs SET {column} = ? WHERE id = ?", (value, job_id))
+
+
+def column(queue, job_id, name):
+    return queue._conn().execute(f"SELECT {name} FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+
+
+def test_run_one_stores_the_result(queue):
+    queue.register("echo", lambda payload: {"got": payload["value"]})
+    job_id = queue.submit("echo", {"value": 3})
+
+    assert queue.run_one()
+    job = queue.get(job_id)
+    assert job["status"] == SUCCEEDED
+    assert job["result"] == {"got": 3}
+    assert job["attempts"] == 1
+    assert not queue.run_one()
+
+
+def test_submit_unknown_kind(queue):
+    with pytest.raises(ValueError):
+        queue.submit("missing", {})
+
+
+def test_retryable_failure_is_requeued_with_backoff(queue):
+    def fail(payload):
+        raise JobError("upstream down")
+    queue.register("flaky", fail)
+    job_id = queue.submit("flaky", {})
+
+    before = time.time()
+    queue.run_one()
+    job = queue.get(job_id)
+    assert job["status"] == QUEUED
+    assert job["error"] == "upstream down"
+    assert column(queue, job_id, "run_after") >= before + 10
+    # not due yet
+    assert not queue.run_one()
+
+    set_column(queue, job_id, "run_after", 0)
+    queue.run_one()
+    assert column(queue, job_id, "run_after") >= before + 20  # doubled
+
+
+def test_dead_letter_after_the_last_attempt(queue):
+    calls = []
+
+    def fail(payload):
+        calls.append(1)
+        raise RuntimeError("boom")
+    queue.register("broken", fail)
+    job_id = queue.submit("broken", {"org_id": 1})
+
+    for _ in range(3):
+        set_column(queue, job_id, "run_after", 0)
+        queue.run_one()
+    job = queue.get(job_id)
+    assert job["status"] == DEAD
+    assert len(calls) == 3
+    assert [job["job_id"] for job in queue.dead_letters("broken")] == [job_id]
+
+    assert queue.requeue(job_id)
+    job = queue.get(job_id)
+    assert job["status"] == QUEUED and job["attempts"] == 0
+    assert not queue.requeue(job_id)  # only dead jobs
+
+
+def test_non_retryable_failure_goes_straight_to_dead(queue):
+    def reject(payload):
+        raise JobError("bad payload", retryable=False)
+    queue.register("strict", reject)
+    job_id = queue.submit("strict", {})
+
+    queue.run_one()
+    job = queue.get(job_id)
+    assert job["status"] == DEAD
+    assert job["attempts"] == 1
+
+
+def test_expired_lease_is_reclaimed(queue):
+    queue.register("slow", lambda payload: "done")
+    job_id = queue.submit("slow", {})
+
+    claimed = queue._claim()  # a worker took it and died
+    assert claimed["id"] == job_id
+    assert queue._claim() is None  # leased
+
+    set_column(queue, job_id, "lease_expires", time.time() - 1)
+    assert queue.run_one()
+    job = queue.get(job_id)
+    assert job["status"] == SUCCEEDED
+    assert job["attempts"] == 2
+
+
+def test_report_progress_renews_the_lease(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), workers=0, lease_seconds=0.5)
+    reclaimed = []
+
+    def long_job(payload):
+        for step in range(3):
+            time.sleep(0.3)
+            queue.report_progress({"step": step})
+            reclaimed.append(queue._claim())
+        return "done"
+    queue.register("long", long_job)
+    job_id = queue.submit("long", {})
+
+    queue.run_one()
+    assert reclaimed == [None, None, None]
+    job = queue.get(job_id)
+    assert job["status"] == SUCCEEDED
+    assert job["progress"] == {"step": 2}
+    assert column(queue, job_id, "lease_expires") is None
+
+
+def test_report_progress_outside_a_job_is_ignored(queue):
+    queue.report_progress({"step": 1})
+
+
+def test_report_progress_does_not_revive_a_finished_job(queue):
+    queue.register("echo", lambda payload: "ok")
+    job_id = queue.submit("echo", {})
+    queue.run_one()
+
+    queue._local.job_id = job_id
+    try:
+        queue.report_progress({"late": True})
+    finally:
+        queue._local.job_id = None
+    assert queue.get(job_id)["status"] == SUCCEEDED
+    assert column(queue, job_id, "lease_expires") is None
+    assert queue.get(job_id)["progress"] is None
+
+
+def test_running_jobs_keep_their_status(queue):
+    queue.register("echo", lambda payload: "ok")
+    job_id = queue.submit("echo", {})
+    queue._claim()
+    assert queue.get(job_id)["status"] == RUNNING
+
+
+def test_job_that_kills_its_worker_is_dead_lettered(queue):
+    queue.register("crash", lambda payload: "never finishes")
+    job_id = queue.submit("crash", {})
+
+    for attempt in range(3):  # the worker dies every time: the lease just expires
+        assert queue._claim()["attempts"] == attempt + 1
+        set_column(queue, job_id, "lease_expires", time.time() - 1)
+
+    assert queue._claim() is None
+    job = queue.get(job_id)
+    assert job["status"] == DEAD
+    assert job["attempts"] == 3
+    assert "Lease expired" in job["error"]
+
+
+def test_worker_that_lost_its_lease_cannot_finish_the_job(queue):
+    queue.register("echo", lambda payload: "ok")
+    job_id = queue.submit("echo", {})
+
+    stale = queue._claim()
+    set_column(queue, job_id, "lease_expires", time.time() - 1)
+    current = queue._claim()  # reclaimed by another worker
+    assert current["claim"] != stale["claim"]
+
+    queue._finish(stale, SUCCEEDED, result="stale")
+    assert queue.get(job_id)["status"] == RUNNING
+    queue._finish(current, SUCCEEDED, result="current")
+    assert queue.get(job_id)["result"] == "current"
@@ -0,0 +1,75 @@
+import pytest
+
+import main
+
+
+@pytest.mark.parametrize("query_string", ["limit=abc", "limit=", "limit=1.5", "limit=0", "limit=100000", "cursor=%%%"])
+def test_invalid_pagination_parameters_raise_value_error(query_string):
+    with main.app.test_request_context(f"/?{query_string}"):
+        with pytest.raises(ValueError):
+            main.paginate(None)  # rejected before any query is built
+
+
+@pytest.fixture
+def db(fake_supabase):
+    return fake_supabase(
+        organization=[{"id": 1, "is_active": True}],
+        employee=[{"id": 1, "auth_user_id": "admin-1", "organization_id": 1, "emp_role": "admin"},
+                  {"id": 2, "auth_user_id": "employee-1", "organization_id": 1, "emp_role": "employee"}],
+        client=[{"id": i, "organization_id": 1 if i % 3 else 2, "name": f"client {i}"} for i in range(1, 23)],
+        call=[{"id": i, "employee_id": "employee-1", "duration": 30} for i in range(1, 8)],
+    )
+
+
+def get(path, user_id="admin-1", **params):
+    return main.app.test_client().get(path, query_string=params, json={"user_id": user_id})
+
+
+def pages(path, user_id="admin-1", **params):
+    """Follow X-Next-Cursor from the first page to the last; returns the ids of every page."""
+    result = []
+    while True:
+        response = get(path, user_id, **params)
+        assert response.status_code == 200
+        result.append([row["id"] for row in response.get_json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return result
+        assert f"cursor={cursor}" in response.headers["Link"]
+        params["cursor"] = cursor
+
+
+def test_without_limit_or_cursor_every_row_is_returned(db):
+    response = get("/organization/clients")
+    assert [row["id"] for row in response.get_json()] == [i for i in range(1, 23) if i % 3]
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_keyset_pages_cover_every_row_once(db):
+    expected = [i for i in range(1, 23) if i % 3]
+    result = pages("/organization/clients", limit=4)
+    assert [len(page) for page in result] == [4, 4, 4, 3]
+    assert sum(result, []) == expected
+
+
+def test_rows_added_between_pages_do_not_shift_the_next_page(db):
+    first = get("/organization/clients", limit=3)
+    db.tables["client"].insert(0, {"id": 0, "organization_id": 1, "name": "inserted before the cursor"})
+    second = get("/organization/clients", limit=3, cursor=first.headers["X-Next-Cursor"])
+    assert [row["id"] for row in second.get_json()] == [5, 7, 8]
+
+
+def test_descending_pages(db):
+    assert pages("/employee/calls/recent", user_id="employee-1", limit=3) == [[7, 6, 5], [4, 3, 2], [1]]
+
+
+def test_invalid_parameters_are_a_bad_request(db):
+    for params in ({"limit": "abc"}, {"limit": 0}, {"cursor": "not a cursor"}):
+        response = get("/organization/clients", **params)
+        assert response.status_code == 400
+        assert "error" in response.get_json()
+
+
+def test_fields_are_projected_and_keep_the_id(db):
+    response = get("/organization/clients", limit=2, fields="name")
+    assert response.get_json() == [{"id": 1, "name": "client 1"}, {"id": 2, "name": "client 2"}]
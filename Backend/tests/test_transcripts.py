@@ -0,0 +1,96 @@
+import pytest
+
+import transcripts
+from transcripts import chunk_transcript, compact_transcript, estimate_tokens
+
+
+def meeting(turns):
+    speakers = ["Ana", "Luis", "María"]
+    return "\n".join(f"{speakers[i % 3]}: turno {i}" + " hablamos del presupuesto y del reporte." * 5
+                     for i in range(turns))
+
+
+def test_short_transcript_is_one_chunk():
+    assert chunk_transcript("Ana: hola\nLuis: hola") == ["Ana: hola\nLuis: hola"]
+    assert chunk_transcript("") == []
+
+
+def test_chunks_keep_whole_turns_within_the_budget():
+    transcript = meeting(60)
+    chunks = chunk_transcript(transcript, max_tokens=200)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 200 for chunk in chunks)
+    assert "\n".join(chunks) == transcript  # turns are never cut
+
+
+def test_continuation_lines_stay_with_their_turn():
+    chunks = chunk_transcript("Ana: primera línea\nsegunda línea\nLuis: hola", max_tokens=4000)
+    assert chunks == ["Ana: primera línea segunda línea\nLuis: hola"]
+
+
+@pytest.mark.parametrize("turn", [
+    "Ana: " + "una frase larga sobre el presupuesto del trimestre. " * 200,
+    "Ana: " + "palabra " * 3000,
+    "a" * 50000,
+    "Ana: https://example.com/" + "x9" * 20000 + " fin",
+])
+def test_a_turn_bigger_than_the_budget_is_split(turn):
+    chunks = chunk_transcript(turn, max_tokens=100)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 100 for chunk in chunks)
+    assert "".join("".join(chunks).split()) == "".join(turn.split())  # nothing is lost
+
+
+@pytest.mark.parametrize("text", [
+    "Luis: la formación es 4 4 2 1",
+    "Ana: Al este, el río",
+    "Ana: The tenant, as well, shall pay",
+    "Luis: No, no, no",
+    "Plan B - vender la casa",
+])
+def test_full_compaction_keeps_content(text):
+    assert compact_transcript(text) == text
+
+
+def test_full_compaction_removes_fillers_and_stutters():
+    assert compact_transcript("Ana: eh, bueno, creo que que sí") == "Ana: creo que sí"
+    assert compact_transcript("Luis: I think, you know, we are done, you know.") == "Luis: I think, we are done."
+
+
+def test_light_compaction():
+    raw = "\n".join([
+        "WEBVTT",
+        "[00:00:01] Ana: vamos a",
+        "[00:00:02] Ana: vamos a revisar el reporte",
+        "[00:00:05] Ana: vamos a revisar el reporte",
+        "[00:00:09] Luis: eh, de acuerdo",
+        "00:00:12 --> 00:00:14",
+        "Luis: lo   envío hoy",
+    ])
+    assert compact_transcript(raw, fillers=False) == "Ana: vamos a revisar el reporte\nLuis: eh, de acuerdo lo envío hoy"
+
+
+def test_speaker_dash_label_needs_a_number():
+    assert compact_transcript("Speaker 1 - hola\nSpeaker 1 - qué tal", fillers=False) == "Speaker 1: hola qué tal"
+
+
+def test_pdf_text_is_never_compacted():
+    assert "agent_pdf" not in transcripts.compaction_levels
+
+
+def test_only_the_previous_line_is_taken_for_a_partial_result():
+    raw = "\n".join([
+        "Ana: sí",
+        "Ana: el presupuesto es 40 mil",
+        "Ana: sí",                      # said again later in the turn: content
+        "Ana: no",
+        "Ana: el presupuesto es 40 mil",  # restated
+        "Ana: sí claro",
+        "Ana: sí",                      # shorter after longer: a new answer
+        "Ana: lo envío",
+        "Ana: lo envío hoy",            # partial, then the final line
+        "Ana: lo envío hoy",            # repeated line
+    ])
+    assert compact_transcript(raw, fillers=False) == (
+        "Ana: sí el presupuesto es 40 mil sí no el presupuesto es 40 mil sí claro sí lo envío hoy"
+    )
@@ -0,0 +1,66 @@
+import numpy as np
+
+from vector_index import VectorIndex
+
+
+class Embeddings:
+    """transcript_embeddings of several projects, as the loader and counter see them."""
+
+    def __init__(self, projects, per_project, dim=8):
+        rng = np.random.default_rng(0)
+        self.rows = {project_id: [(f"{project_id}-{i}", rng.normal(size=dim).tolist()) for i in range(per_project)]
+                     for project_id in projects}
+        self.loaded = []
+
+    def load(self, project_id):
+        self.loaded.append(project_id)
+        return list(self.rows[project_id])
+
+    def count(self, project_id):
+        return len(self.rows[project_id])
+
+
+def test_loaded_project_is_served_until_the_ttl():
+    db = Embeddings([1], 3)
+    index = VectorIndex(db.load, coarse_dims=0, ttl=60, counter=db.count)
+    index.get(1)
+    db.rows[1].append(("1-new", [1.0] * 8))  # written by another process
+    assert len(index.get(1)) == 3
+    assert db.loaded == [1]
+
+
+def test_project_is_reloaded_when_its_count_changed():
+    db = Embeddings([1], 3)
+    index = VectorIndex(db.load, coarse_dims=0, ttl=0, counter=db.count)
+    index.get(1)
+    index.get(1)
+    assert db.loaded == [1]  # same count, the loaded index is kept
+
+    db.rows[1].append(("1-new", [1.0] * 8))
+    assert len(index.get(1)) == 4
+    assert db.loaded == [1, 1]
+    assert index.search([1], [1.0] * 8, k=1)[0]["call_id"] == "1-new"
+    assert index.stats()["reloads"] == 1
+
+
+def test_project_is_reloaded_every_ttl_without_a_counter():
+    db = Embeddings([1], 3)
+    index = VectorIndex(db.load, coarse_dims=0, ttl=0)
+    index.get(1)
+    index.get(1)
+    assert db.loaded == [1, 1]
+
+
+def test_search_over_budget_does_not_evict_its_own_projects():
+    db = Embeddings(range(11), 50)
+    project_bytes = 50 * 8 * 4
+    index = VectorIndex(db.load, max_bytes=3 * project_bytes, coarse_dims=0, ttl=60)
+    query = [1.0] * 8
+
+    first = index.search(range(10), query, k=5)
+    assert sorted(db.loaded) == list(range(10))
+    assert index.search(range(10), query, k=5) == first
+    assert len(db.loaded) == 10  # the second search reloads nothing
+
+    index.get(10)  # a load outside a search evicts down to the budget again
+    assert index.stats()["projects"] == 3